@@ -1,11 +1,64 @@
 """Zentraler API-Client für den Feuerwehr-Versorgungs-Helfer."""
 
 import logging
+import uuid
+import api_health
 import handle_requests as hr
 import config
+import personen_cache
+import transaktions_journal
 
 logger = logging.getLogger(__name__)
 
+# Lokales Journal, damit bei fehlender Verbindung keine Buchung verloren geht
+JOURNAL = transaktions_journal.TransaktionsJournal(config.JOURNAL_PATH) if config.JOURNAL_ENABLED else None
+
+# Personendaten und Kontostände, damit die Abfrage "k" ohne API-Aufruf beantwortet werden kann
+PERSONEN_CACHE = personen_cache.PersonenCache(config.PERSONEN_CACHE_GROESSE, config.PERSONEN_CACHE_TTL,
+                                              config.PERSONEN_CACHE_MAX_ALTER) if config.PERSONEN_CACHE_ENABLED else None
+
+# GET-Endpunkte, deren Antworten per ETag / Last-Modified nachgefragt werden
+if hr.VALIDATOR_CACHE:
+    hr.VALIDATOR_CACHE.regel(f"{config.API_URL}/version", frisch=config.HTTP_CACHE_VERSION_FRISCH)
+    hr.VALIDATOR_CACHE.regel(f"{config.API_URL}/saldo-alle")
+    hr.VALIDATOR_CACHE.regel(f"{config.API_URL}/person/")
+
+# Wird von allen Aufrufen abgefragt, damit bei einem Ausfall nicht jeder Scan den Timeout abwartet
+BREAKER = api_health.CircuitBreaker(config.CIRCUIT_FEHLER_SCHWELLE, config.CIRCUIT_OEFFNUNGSDAUER)
+
+
+def _senden(request_funktion, *args, **kwargs):
+    """
+    Führt einen Request aus handle_requests über den Circuit Breaker aus.
+
+    Returns:
+        requests.Response or None: Die Antwort oder None, wenn der Breaker offen ist
+                                   oder keine Antwort kam.
+    """
+    if request_funktion is hr.get_request and hr.ist_frisch_gespeichert(args[0], kwargs.get("params")):
+        # Wird ohne Netzwerkzugriff beantwortet und sagt nichts über die Erreichbarkeit aus
+        return request_funktion(*args, **kwargs)
+    if not BREAKER.darf_senden():
+        logger.debug("Circuit Breaker offen, Request an %s wird nicht gesendet.", args[0])
+        return None
+    response = None
+    try:
+        response = request_funktion(*args, **kwargs)
+    finally:
+        if ist_offline(response):
+            BREAKER.fehler()
+        else:
+            BREAKER.erfolg()
+    return response
+
+
+def api_erreichbar():
+    """
+    Returns:
+        bool: False, solange der Circuit Breaker offen ist (Ausfall erkannt, Aufrufe schlagen sofort fehl).
+    """
+    return not BREAKER.ist_offen()
+
 
 def healthcheck():
     """
@@ -19,7 +72,7 @@ def healthcheck():
         'X-API-Key': config.API_KEY
     }
 
-    get_response = hr.get_request(get_url, get_headers)
+    get_response = _senden(hr.get_request, get_url, get_headers, timeout=config.API_TIMEOUTS["health"])
     if get_response:
         return get_response.json()
     return None
@@ -37,9 +90,9 @@ def get_api_version():
         'X-API-Key': config.API_KEY
     }
 
-    get_response = hr.get_request(get_url, get_headers)
+    get_response = _senden(hr.get_request, get_url, get_headers, timeout=config.API_TIMEOUTS["version"])
     if get_response:
-        return get_response.json().get('version')
+        return hr.json_daten(get_response).get('version')
     return None
 
 
@@ -55,9 +108,9 @@ def daten_lesen_alle():
         'X-API-Key': config.API_KEY
     }
 
-    get_response = hr.get_request(get_url, get_headers)
+    get_response = _senden(hr.get_request, get_url, get_headers, timeout=config.API_TIMEOUTS["saldo_alle"])
     if get_response:
-        return get_response.json()
+        return hr.json_daten(get_response)
     return None
 
 
@@ -65,37 +118,78 @@ def person_daten_lesen(code):
     """
     Daten einer Person anzeigen, gibt den aktuellen Saldo zurück.
 
+    Aktuelle Einträge aus dem Personen-Cache werden ohne API-Aufruf geliefert. Ist
+    die API nicht erreichbar, wird notfalls ein älterer Stand aus dem Cache verwendet.
+
     Args:
         code (str): Der Code der Person, deren Daten gelesen werden sollen.
 
     Returns:
         tuple or None: Ein Tupel mit (nachname, vorname, saldo) oder None bei einem Fehler.
     """
+    if PERSONEN_CACHE:
+        treffer = PERSONEN_CACHE.hole(code)
+        if treffer:
+            return treffer
+
     get_url = f"{config.API_URL}/person/{code}"
     get_headers = {
         'X-API-Key': config.API_KEY
     }
 
-    get_response = hr.get_request(get_url, get_headers)
-    if get_response is None:
-        return None
+    get_response = _senden(hr.get_request, get_url, get_headers, timeout=config.API_TIMEOUTS["person"])
+    return person_daten_auswerten(code, get_response)
+
+
+def person_daten_auswerten(code, get_response):
+    """
+    Wertet die Antwort auf eine Personenabfrage aus und pflegt den Personen-Cache.
+
+    Args:
+        code (str): Der Code der Person.
+        get_response (requests.Response or None): Die Antwort der API.
+
+    Returns:
+        tuple or None: Ein Tupel mit (nachname, vorname, saldo) oder None bei einem Fehler.
+    """
+    if ist_offline(get_response):
+        return PERSONEN_CACHE.hole(code, erlaube_veraltet=True) if PERSONEN_CACHE else None
 
-    person_daten = get_response.json()
+    person_daten = hr.json_daten(get_response)
     if 'error' in person_daten:
         logger.error("Fehler beim Abrufen der Personendaten: %s.", person_daten['error'])
+        if PERSONEN_CACHE:
+            PERSONEN_CACHE.entfernen(code)
         return None
     if person_daten:
+        if PERSONEN_CACHE:
+            PERSONEN_CACHE.speichern(code, person_daten['nachname'], person_daten['vorname'], person_daten['saldo'])
         return (person_daten['nachname'], person_daten['vorname'], person_daten['saldo'])
     return None
 
 
-def person_transaktion_erstellen(code, beschreibung):
+def saldo_uebernehmen(code, response):
+    """Übernimmt den Saldo aus der Antwort einer Buchung in den Personen-Cache."""
+    if not PERSONEN_CACHE or not response.ok:
+        return
+    try:
+        saldo = response.json().get('saldo')
+    except ValueError:
+        return
+    if saldo is not None:
+        PERSONEN_CACHE.saldo_aktualisieren(code, saldo)
+
+
+def person_transaktion_erstellen(code, beschreibung, idempotency_key=None, anzahl=1):
     """
     Transaktion für eine Person ausführen.
 
     Args:
         code (str): Der Code der Person, für die die Transaktion erstellt wird.
         beschreibung (str): Die Beschreibung der Buchung.
+        idempotency_key (str, optional): Wird als Header "Idempotency-Key" mitgesendet.
+                                         Ohne Angabe wird ein neuer Schlüssel erzeugt.
+        anzahl (int): Anzahl der gebuchten Artikel, wird nur bei mehr als einem mitgesendet.
 
     Returns:
         requests.Response or None: Das Response-Objekt oder None bei einem Fehler.
@@ -104,23 +198,31 @@ def person_transaktion_erstellen(code, beschreibung):
     put_headers = {
         'X-API-Key': config.API_KEY
     }
+    # Erlaubt handle_requests, die Buchung bei Netzwerkfehlern gefahrlos zu wiederholen
+    put_headers['Idempotency-Key'] = idempotency_key or str(uuid.uuid4())
     put_daten = {
         'beschreibung': beschreibung,
     }
+    if anzahl > 1:
+        put_daten['anzahl'] = anzahl
 
-    put_response = hr.put_request(put_url, put_headers, put_daten)
+    put_response = _senden(hr.put_request, put_url, put_headers, put_daten, timeout=config.API_TIMEOUTS["transaktion"])
     if put_response is not None:
+        saldo_uebernehmen(code, put_response)
         return put_response
     return None
 
 
-def nfc_transaktion_erstellen(token_base64, beschreibung):
+def nfc_transaktion_erstellen(token_base64, beschreibung, idempotency_key=None, anzahl=1):
     """
     Transaktion für ein NFC-Token ausführen.
 
     Args:
         token_base64 (str): Der base64-kodierte Token.
         beschreibung (str): Die Beschreibung der Buchung.
+        idempotency_key (str, optional): Wird als Header "Idempotency-Key" mitgesendet.
+                                         Ohne Angabe wird ein neuer Schlüssel erzeugt.
+        anzahl (int): Anzahl der gebuchten Artikel, wird nur bei mehr als einem mitgesendet.
 
     Returns:
         requests.Response or None: Das Response-Objekt oder None bei einem Fehler.
@@ -129,12 +231,178 @@ def nfc_transaktion_erstellen(token_base64, beschreibung):
     put_headers = {
         'X-API-Key': config.API_KEY
     }
+    # Erlaubt handle_requests, die Buchung bei Netzwerkfehlern gefahrlos zu wiederholen
+    put_headers['Idempotency-Key'] = idempotency_key or str(uuid.uuid4())
     put_daten = {
         'token': token_base64,
         'beschreibung': beschreibung,
     }
+    if anzahl > 1:
+        put_daten['anzahl'] = anzahl
 
-    put_response = hr.put_request(put_url, put_headers, put_daten)
+    put_response = _senden(hr.put_request, put_url, put_headers, put_daten, timeout=config.API_TIMEOUTS["transaktion"])
     if put_response is not None:
         return put_response
     return None
+
+
+def _transaktion_senden(art, kennung, beschreibung, idempotency_key=None, anzahl=1):
+    """Sendet eine NFC- oder Personen-Transaktion."""
+    if art == "nfc":
+        return nfc_transaktion_erstellen(kennung, beschreibung, idempotency_key, anzahl)
+    return person_transaktion_erstellen(kennung, beschreibung, idempotency_key, anzahl)
+
+
+def ist_offline(response):
+    """
+    Prüft, ob eine Antwort auf eine nicht erreichbare API hindeutet.
+
+    Args:
+        response (requests.Response or None): Die Antwort eines Requests.
+
+    Returns:
+        bool: True bei fehlender Antwort oder Serverfehler (5xx).
+    """
+    return response is None or response.status_code >= 500
+
+
+def fehlschlag_einordnen(response, zustellung, eintrag_id):
+    """
+    Entscheidet, wie eine Buchung ohne gültige Antwort im Journal vermerkt wird.
+
+    Nachgetragen wird nur, was das Backend sicher nicht gebucht hat: Circuit Breaker
+    offen, Verbindungsaufbau gescheitert oder Serverfehler (5xx). Blieb die Antwort
+    nach dem Senden aus (z.B. Lese-Timeout durch das Scan-Budget), kann die Buchung
+    bereits ausgeführt sein. Ein erneutes Senden wäre dann nur mit einem Backend
+    sicher, das den Idempotency-Key auswertet (config.HTTP_RETRY_WRITES), sonst
+    bleibt der Eintrag als UNKLAR liegen.
+
+    Args:
+        response (requests.Response or None): Die Antwort der Buchung.
+        zustellung (handle_requests.Zustellung): Zustellung der Buchung (siehe handle_requests.zustellung_verfolgen).
+        eintrag_id (str): Die ID des Journal-Eintrags (für das Log).
+
+    Returns:
+        tuple or None: None, wenn die Antwort gilt, sonst (Journal-Status, Fehlerbeschreibung).
+    """
+    if not ist_offline(response):
+        return None
+    if response is not None:
+        fehler = f"HTTP {response.status_code}"
+    elif zustellung.unklar:
+        fehler = "Keine Antwort nach dem Senden"
+    else:
+        fehler = "API nicht erreichbar"
+    if response is None and zustellung.unklar and not config.HTTP_RETRY_WRITES:
+        logger.error("Keine Antwort auf Transaktion %s, sie wurde evtl. gebucht und wird nicht nachgetragen.",
+                     eintrag_id)
+        return transaktions_journal.UNKLAR, fehler
+    logger.warning("API nicht erreichbar, Transaktion %s wird nachgetragen.", eintrag_id)
+    return transaktions_journal.OFFEN, fehler
+
+
+def transaktion_zustellen(art, kennung, beschreibung, eintrag_id, anzahl=1):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Sendet eine Transaktion aus dem Journal und ordnet das Ergebnis ein.
+
+    Args:
+        art (str): "nfc" oder "person".
+        kennung (str): Der Token bzw. Code.
+        beschreibung (str): Die Beschreibung der Buchung.
+        eintrag_id (str): Die ID des Journal-Eintrags (Idempotency-Key).
+        anzahl (int): Anzahl der gebuchten Artikel.
+
+    Returns:
+        tuple: (requests.Response or None, Ergebnis von `fehlschlag_einordnen`)
+    """
+    with hr.zustellung_verfolgen() as zustellung:
+        response = _transaktion_senden(art, kennung, beschreibung, eintrag_id, anzahl)
+    return response, fehlschlag_einordnen(response, zustellung, eintrag_id)
+
+
+def transaktion_buchen(art, kennung, beschreibung, anzahl=1):
+    """
+    Bucht eine Transaktion über das lokale Journal.
+
+    Die Transaktion wird vor dem Senden im Journal festgehalten. Hat sie die API
+    sicher nicht erreicht, bleibt sie dort vorgemerkt und wird im Hintergrund
+    nachgetragen (siehe `fehlschlag_einordnen`).
+
+    Args:
+        art (str): "nfc" (kennung = base64-Token) oder "person" (kennung = Benutzercode).
+        kennung (str): Der Token bzw. Code.
+        beschreibung (str): Die Beschreibung der Buchung.
+        anzahl (int): Anzahl der gebuchten Artikel (mehrere Scans im Sammelfenster).
+
+    Returns:
+        tuple: (requests.Response or None, True wenn die Buchung zum Nachtragen vorgemerkt wurde)
+    """
+    if JOURNAL is None:
+        return _transaktion_senden(art, kennung, beschreibung, anzahl=anzahl), False
+
+    eintrag_id = JOURNAL.erfassen(art, kennung, beschreibung, config.MY_NAME, anzahl)
+    response, fehlschlag = transaktion_zustellen(art, kennung, beschreibung, eintrag_id, anzahl)
+    if fehlschlag:
+        status, fehler = fehlschlag
+        JOURNAL.fehlversuch(eintrag_id, fehler, status)
+        return None, status == transaktions_journal.OFFEN
+    JOURNAL.abschliessen(eintrag_id, response.status_code)
+    return response, False
+
+
+def _health_pruefen():
+    """Fragt den Health-Endpunkt ohne Circuit Breaker und ohne Wiederholungen ab."""
+    response = hr.get_request(f"{config.API_URL}/health-protected", {'X-API-Key': config.API_KEY},
+                              policy=hr.RetryPolicy(versuche=1, read_timeout=config.API_TIMEOUTS["health"]))
+    return response is not None and response.ok
+
+
+def health_monitor_starten():
+    """
+    Startet die regelmäßige Prüfung der API im Hintergrund.
+
+    Returns:
+        api_health.HealthMonitor or None: Der Monitor oder None, wenn er deaktiviert ist.
+    """
+    if config.HEALTH_INTERVAL <= 0:
+        return None
+    monitor = api_health.HealthMonitor(_health_pruefen, BREAKER, config.HEALTH_INTERVAL)
+    monitor.starten()
+    return monitor
+
+
+def journal_replay_starten():
+    """
+    Startet das Nachtragen offener Transaktionen im Hintergrund.
+
+    Returns:
+        transaktions_journal.JournalReplay or None: Der Replay-Worker oder None ohne Journal.
+    """
+    if JOURNAL is None:
+        return None
+    offen = JOURNAL.anzahl_offen()
+    if offen:
+        logger.info("%d Transaktion(en) im Journal warten auf Nachtragen.", offen)
+    unklar = JOURNAL.anzahl_unklar()
+    if unklar:
+        logger.warning("%d Transaktion(en) im Journal blieben ohne Antwort und müssen im Backend geprüft werden.",
+                       unklar)
+    replay = transaktions_journal.JournalReplay(JOURNAL, transaktion_zustellen,
+                                                config.JOURNAL_REPLAY_INTERVAL, config.JOURNAL_BATCH_SIZE)
+    replay.starten()
+    return replay
+
+
+def scan_budget():
+    """
+    Begrenzt die Gesamtdauer aller API-Aufrufe eines Scans auf config.SCAN_BUDGET.
+
+    Returns:
+        contextmanager: Zu verwenden als `with api_client.scan_budget(): ...`.
+    """
+    return hr.zeitbudget(config.SCAN_BUDGET)
+
+
+def verbindungen_schliessen():
+    """Schließt die offenen Keep-Alive-Verbindungen zum Backend."""
+    hr.close_sessions()
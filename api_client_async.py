@@ -0,0 +1,230 @@
+"""
+Asynchrone Variante des API-Clients (siehe api_client).
+
+Dieselben Endpunkte mit denselben Rückgabewerten wie die synchronen Funktionen,
+aber als Koroutinen auf der gemeinsamen Ereignisschleife. Circuit Breaker,
+Journal, Personen- und Validator-Cache werden mit dem synchronen Client geteilt.
+Aus einem Thread heraus z.B.:
+
+    ereignis_schleife.SCHLEIFE.ausfuehren(api_client_async.transaktion_buchen("nfc", token, beschreibung))
+"""
+
+import asyncio
+import logging
+import uuid
+import api_client
+import config
+import handle_requests as hr
+import handle_requests_async as hra
+import transaktions_journal
+
+logger = logging.getLogger(__name__)
+
+
+async def _senden(request_funktion, *args, **kwargs):
+    """
+    Führt einen Request aus handle_requests_async über den Circuit Breaker aus.
+
+    Returns:
+        handle_requests_async.Antwort or None: Die Antwort oder None, wenn der Breaker
+                                               offen ist oder keine Antwort kam.
+    """
+    if request_funktion is hra.get_request and hr.ist_frisch_gespeichert(args[0], kwargs.get("params")):
+        # Wird ohne Netzwerkzugriff beantwortet und sagt nichts über die Erreichbarkeit aus
+        return await request_funktion(*args, **kwargs)
+    if not api_client.BREAKER.darf_senden():
+        logger.debug("Circuit Breaker offen, Request an %s wird nicht gesendet.", args[0])
+        return None
+    response = None
+    try:
+        response = await request_funktion(*args, **kwargs)
+    finally:
+        if api_client.ist_offline(response):
+            api_client.BREAKER.fehler()
+        else:
+            api_client.BREAKER.erfolg()
+    return response
+
+
+def _kopfzeilen():
+    return {'X-API-Key': config.API_KEY}
+
+
+async def healthcheck():
+    """
+    Healthcheck gegen API ausführen.
+
+    Returns:
+        dict or None: Die JSON-Antwort des Healthcheck-Endpunktes oder None bei einem Fehler.
+    """
+    get_response = await _senden(hra.get_request, f"{config.API_URL}/health-protected", _kopfzeilen(),
+                                 timeout=config.API_TIMEOUTS["health"])
+    if get_response:
+        return get_response.json()
+    return None
+
+
+async def get_api_version():
+    """
+    API nach aktueller Version fragen.
+
+    Returns:
+        str or None: Die Versionsnummer oder None bei einem Fehler.
+    """
+    get_response = await _senden(hra.get_request, f"{config.API_URL}/version", _kopfzeilen(),
+                                 timeout=config.API_TIMEOUTS["version"])
+    if get_response:
+        return hr.json_daten(get_response).get('version')
+    return None
+
+
+async def daten_lesen_alle():
+    """
+    Daten aller Benutzer anzeigen.
+
+    Returns:
+        dict or None: Die JSON-Antwort der API oder None bei einem Fehler.
+    """
+    get_response = await _senden(hra.get_request, f"{config.API_URL}/saldo-alle", _kopfzeilen(),
+                                 timeout=config.API_TIMEOUTS["saldo_alle"])
+    if get_response:
+        return hr.json_daten(get_response)
+    return None
+
+
+async def person_daten_lesen(code):
+    """
+    Daten einer Person anzeigen, gibt den aktuellen Saldo zurück (bevorzugt aus dem Personen-Cache).
+
+    Args:
+        code (str): Der Code der Person, deren Daten gelesen werden sollen.
+
+    Returns:
+        tuple or None: Ein Tupel mit (nachname, vorname, saldo) oder None bei einem Fehler.
+    """
+    if api_client.PERSONEN_CACHE:
+        treffer = api_client.PERSONEN_CACHE.hole(code)
+        if treffer:
+            return treffer
+
+    get_response = await _senden(hra.get_request, f"{config.API_URL}/person/{code}", _kopfzeilen(),
+                                 timeout=config.API_TIMEOUTS["person"])
+    return api_client.person_daten_auswerten(code, get_response)
+
+
+async def person_transaktion_erstellen(code, beschreibung, idempotency_key=None, anzahl=1):
+    """
+    Transaktion für eine Person ausführen.
+
+    Args:
+        code (str): Der Code der Person, für die die Transaktion erstellt wird.
+        beschreibung (str): Die Beschreibung der Buchung.
+        idempotency_key (str, optional): Wird als Header "Idempotency-Key" mitgesendet.
+                                         Ohne Angabe wird ein neuer Schlüssel erzeugt.
+        anzahl (int): Anzahl der gebuchten Artikel, wird nur bei mehr als einem mitgesendet.
+
+    Returns:
+        handle_requests_async.Antwort or None: Die Antwort oder None bei einem Fehler.
+    """
+    put_headers = {**_kopfzeilen(), 'Idempotency-Key': idempotency_key or str(uuid.uuid4())}
+    put_daten = {'beschreibung': beschreibung}
+    if anzahl > 1:
+        put_daten['anzahl'] = anzahl
+
+    put_response = await _senden(hra.put_request, f"{config.API_URL}/person/{code}/transaktion", put_headers,
+                                 put_daten, timeout=config.API_TIMEOUTS["transaktion"])
+    if put_response is not None:
+        api_client.saldo_uebernehmen(code, put_response)
+    return put_response
+
+
+async def nfc_transaktion_erstellen(token_base64, beschreibung, idempotency_key=None, anzahl=1):
+    """
+    Transaktion für ein NFC-Token ausführen.
+
+    Args:
+        token_base64 (str): Der base64-kodierte Token.
+        beschreibung (str): Die Beschreibung der Buchung.
+        idempotency_key (str, optional): Wird als Header "Idempotency-Key" mitgesendet.
+                                         Ohne Angabe wird ein neuer Schlüssel erzeugt.
+        anzahl (int): Anzahl der gebuchten Artikel, wird nur bei mehr als einem mitgesendet.
+
+    Returns:
+        handle_requests_async.Antwort or None: Die Antwort oder None bei einem Fehler.
+    """
+    put_headers = {**_kopfzeilen(), 'Idempotency-Key': idempotency_key or str(uuid.uuid4())}
+    put_daten = {'token': token_base64, 'beschreibung': beschreibung}
+    if anzahl > 1:
+        put_daten['anzahl'] = anzahl
+
+    return await _senden(hra.put_request, f"{config.API_URL}/nfc-transaktion", put_headers,
+                         put_daten, timeout=config.API_TIMEOUTS["transaktion"])
+
+
+async def _transaktion_senden(art, kennung, beschreibung, idempotency_key=None, anzahl=1):
+    """Sendet eine NFC- oder Personen-Transaktion."""
+    if art == "nfc":
+        return await nfc_transaktion_erstellen(kennung, beschreibung, idempotency_key, anzahl)
+    return await person_transaktion_erstellen(kennung, beschreibung, idempotency_key, anzahl)
+
+
+async def transaktion_buchen(art, kennung, beschreibung, anzahl=1):
+    """
+    Bucht eine Transaktion über das lokale Journal (siehe api_client.transaktion_buchen).
+
+    Args:
+        art (str): "nfc" (kennung = base64-Token) oder "person" (kennung = Benutzercode).
+        kennung (str): Der Token bzw. Code.
+        beschreibung (str): Die Beschreibung der Buchung.
+        anzahl (int): Anzahl der gebuchten Artikel (mehrere Scans im Sammelfenster).
+
+    Returns:
+        tuple: (handle_requests_async.Antwort or None, True wenn die Buchung zum Nachtragen vorgemerkt wurde)
+    """
+    journal = api_client.JOURNAL
+    if journal is None:
+        return await _transaktion_senden(art, kennung, beschreibung, anzahl=anzahl), False
+
+    # SQLite blockiert (fsync, Sperre eines anderen Prozesses), daher nicht auf der Ereignisschleife
+    eintrag_id = await asyncio.to_thread(journal.erfassen, art, kennung, beschreibung, config.MY_NAME, anzahl)
+    with hr.zustellung_verfolgen() as zustellung:
+        response = await _transaktion_senden(art, kennung, beschreibung, eintrag_id, anzahl)
+    fehlschlag = api_client.fehlschlag_einordnen(response, zustellung, eintrag_id)
+    if fehlschlag:
+        status, fehler = fehlschlag
+        await asyncio.to_thread(journal.fehlversuch, eintrag_id, fehler, status)
+        return None, status == transaktions_journal.OFFEN
+    await asyncio.to_thread(journal.abschliessen, eintrag_id, response.status_code)
+    return response, False
+
+
+async def startdaten_lesen(mit_personen=False):
+    """
+    Fragt Healthcheck, API-Version und ggf. alle Benutzer gleichzeitig ab (beim Start der Reader).
+
+    Args:
+        mit_personen (bool): Auch die Daten aller Benutzer lesen.
+
+    Returns:
+        tuple: (Ergebnis von healthcheck, von get_api_version, von daten_lesen_alle oder None)
+    """
+    abfragen = [healthcheck(), get_api_version()]
+    if mit_personen:
+        abfragen.append(daten_lesen_alle())
+    ergebnisse = await asyncio.gather(*abfragen)
+    return tuple(ergebnisse) if mit_personen else (*ergebnisse, None)
+
+
+def scan_budget():
+    """
+    Begrenzt die Gesamtdauer aller API-Aufrufe eines Scans auf config.SCAN_BUDGET.
+
+    Returns:
+        contextmanager: Zu verwenden innerhalb einer Koroutine als `with api_client_async.scan_budget(): ...`.
+    """
+    return hra.zeitbudget(config.SCAN_BUDGET)
+
+
+async def verbindungen_schliessen():
+    """Schließt die offenen Keep-Alive-Verbindungen der asynchronen Session."""
+    await hra.close_sessions()
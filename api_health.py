@@ -0,0 +1,138 @@
+"""
+Circuit Breaker und Health-Monitor für die API.
+
+Der Circuit Breaker merkt sich, ob die API zuletzt erreichbar war. Nach mehreren
+Fehlern in Folge wird er geöffnet und alle Aufrufe schlagen sofort fehl, statt
+jeweils den vollen Timeout abzuwarten. Nach einer Wartezeit wird ein einzelner
+Probe-Aufruf durchgelassen (halb offen); ist er erfolgreich, wird der Breaker
+wieder geschlossen. Der Health-Monitor prüft zusätzlich regelmäßig den
+Health-Endpunkt, damit ein Ausfall auch ohne Scans erkannt wird.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Zustände des Circuit Breakers
+GESCHLOSSEN = "geschlossen"  # API erreichbar, alle Aufrufe werden gesendet
+OFFEN = "offen"              # API nicht erreichbar, Aufrufe schlagen sofort fehl
+HALB_OFFEN = "halb_offen"    # ein einzelner Probe-Aufruf ist unterwegs
+
+
+class CircuitBreaker:
+    """Threadsicherer Circuit Breaker mit den Zuständen geschlossen, offen und halb offen."""
+
+    def __init__(self, fehler_schwelle=3, oeffnungsdauer=15.0):
+        """
+        Args:
+            fehler_schwelle (int): Anzahl Fehler in Folge, nach denen der Breaker öffnet.
+            oeffnungsdauer (float): Sekunden, nach denen ein Probe-Aufruf erlaubt wird.
+        """
+        self.fehler_schwelle = fehler_schwelle
+        self.oeffnungsdauer = oeffnungsdauer
+        self._zustand = GESCHLOSSEN
+        self._fehler_in_folge = 0
+        self._geoeffnet_um = 0.0
+        self._abgewiesen = 0
+        self._lock = threading.Lock()
+
+    @property
+    def zustand(self):
+        """str: Der aktuelle Zustand (GESCHLOSSEN, OFFEN oder HALB_OFFEN)."""
+        with self._lock:
+            return self._zustand
+
+    def ist_offen(self):
+        """
+        Returns:
+            bool: True, solange die API als nicht erreichbar gilt.
+        """
+        return self.zustand != GESCHLOSSEN
+
+    def darf_senden(self):
+        """
+        Prüft vor einem Aufruf, ob er gesendet werden darf.
+
+        Im offenen Zustand wird nach Ablauf der Öffnungsdauer genau ein Aufruf als
+        Probe durchgelassen; das Ergebnis muss mit `erfolg` bzw. `fehler` gemeldet werden.
+
+        Returns:
+            bool: True, wenn der Aufruf gesendet werden soll.
+        """
+        with self._lock:
+            if self._zustand == GESCHLOSSEN:
+                return True
+            if self._zustand == OFFEN and time.monotonic() - self._geoeffnet_um >= self.oeffnungsdauer:
+                self._wechseln(HALB_OFFEN)
+                return True
+            self._abgewiesen += 1
+            return False
+
+    def erfolg(self):
+        """Meldet einen erfolgreichen Aufruf und schließt den Breaker."""
+        with self._lock:
+            self._fehler_in_folge = 0
+            if self._zustand != GESCHLOSSEN:
+                self._wechseln(GESCHLOSSEN)
+
+    def fehler(self):
+        """Meldet einen fehlgeschlagenen Aufruf; öffnet den Breaker bei Erreichen der Schwelle."""
+        with self._lock:
+            self._fehler_in_folge += 1
+            if self._zustand == HALB_OFFEN or self._fehler_in_folge >= self.fehler_schwelle:
+                self._geoeffnet_um = time.monotonic()
+                if self._zustand != OFFEN:
+                    self._wechseln(OFFEN)
+
+    def _wechseln(self, zustand):
+        if zustand == OFFEN:
+            logger.warning("API nicht erreichbar, Circuit Breaker geöffnet (nächste Probe in %.0f s).",
+                           self.oeffnungsdauer)
+        elif zustand == GESCHLOSSEN:
+            logger.info("API wieder erreichbar, Circuit Breaker geschlossen (%d Aufrufe abgewiesen).",
+                        self._abgewiesen)
+            self._abgewiesen = 0
+        else:
+            logger.debug("Circuit Breaker halb offen, sende Probe-Aufruf.")
+        self._zustand = zustand
+
+
+class HealthMonitor:
+    """Prüft den Health-Endpunkt der API im Hintergrund und meldet das Ergebnis an den Circuit Breaker."""
+
+    def __init__(self, pruefen, breaker, intervall=10.0):
+        """
+        Args:
+            pruefen (callable): Funktion ohne Argumente, die True liefert, wenn die API gesund ist.
+                                Sie darf den Circuit Breaker nicht selbst abfragen.
+            breaker (CircuitBreaker): Der zu steuernde Circuit Breaker.
+            intervall (float): Sekunden zwischen zwei Prüfungen.
+        """
+        self.pruefen = pruefen
+        self.breaker = breaker
+        self.intervall = intervall
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._laufen, name="api-health", daemon=True)
+
+    def starten(self):
+        """Startet den Hintergrund-Thread."""
+        self._thread.start()
+
+    def stoppen(self):
+        """Beendet den Hintergrund-Thread."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _laufen(self):
+        while not self._stop.wait(self.intervall):
+            try:
+                gesund = self.pruefen()
+            except Exception as e:  # pylint: disable=W0718
+                logger.debug("Healthcheck fehlgeschlagen: %s", e)
+                gesund = False
+            if gesund:
+                self.breaker.erfolg()
+            else:
+                self.breaker.fehler()
@@ -0,0 +1,184 @@
+"""Langlebige Audio-Engine: hält den pygame-Mixer offen und die Soundeffekte dekodiert im Speicher."""
+
+import logging
+import os
+import threading
+from contextlib import redirect_stdout
+from io import StringIO
+with redirect_stdout(StringIO()):
+    import pygame
+
+logger = logging.getLogger(__name__)
+
+
+class Wiedergabe:
+    """
+    Handle für einen laufenden Sound.
+
+    Das Ende der Wiedergabe wird über ein threading.Event signalisiert, optional
+    wird zusätzlich ein Callback aufgerufen. Es gibt keine Warteschleife: ein
+    Timer prüft erst zum erwarteten Ende, ob der Kanal fertig ist.
+    """
+
+    NACHLAUF = 0.02  # Sekunden, um die nachgeprüft wird, falls der Kanal noch spielt
+
+    def __init__(self, sound, kanal, bei_ende=None):
+        self.sound = sound
+        self.kanal = kanal
+        self.fertig = threading.Event()
+        self._bei_ende = bei_ende
+        self._timer = None
+        self._planen(sound.get_length())
+
+    def _planen(self, sekunden):
+        self._timer = threading.Timer(sekunden, self._pruefen)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _pruefen(self):
+        if self.kanal.get_busy() and self.kanal.get_sound() is self.sound:
+            self._planen(self.NACHLAUF)
+            return
+        self._beenden()
+
+    def _beenden(self):
+        if self.fertig.is_set():
+            return
+        self.fertig.set()
+        if self._bei_ende:
+            try:
+                self._bei_ende(self)
+            except Exception as e:  # pylint: disable=W0718
+                logger.error("Fehler im Callback nach Soundende: %s", e, exc_info=True)
+
+    def warte(self, timeout=None):
+        """
+        Blockiert, bis der Sound zu Ende gespielt ist.
+
+        Args:
+            timeout (float, optional): Maximale Wartezeit in Sekunden.
+
+        Returns:
+            bool: True, wenn der Sound beendet ist.
+        """
+        return self.fertig.wait(timeout)
+
+    def stop(self):
+        """Bricht die Wiedergabe ab."""
+        if self._timer:
+            self._timer.cancel()
+        if self.kanal.get_sound() is self.sound:
+            self.kanal.stop()
+        self._beenden()
+
+
+class AudioEngine:
+    """
+    Besitzt den pygame-Mixer für die gesamte Laufzeit des Prozesses.
+
+    Beim Start werden alle Dateien aus dem Sound-Verzeichnis dekodiert, damit ein
+    Soundeffekt ohne erneutes Öffnen des Audiogeräts und ohne Dekodieren sofort
+    abgespielt werden kann.
+    """
+
+    def __init__(self, sound_verzeichnis, kanaele=8):
+        """
+        Args:
+            sound_verzeichnis (str): Verzeichnis mit den Soundeffekten (*.mp3).
+            kanaele (int): Anzahl der Mixer-Kanäle für gleichzeitige Wiedergaben.
+        """
+        self.sound_verzeichnis = sound_verzeichnis
+        self.kanaele = kanaele
+        self._sounds = {}
+        self._lock = threading.RLock()
+
+    def starten(self):
+        """
+        Initialisiert den Mixer und lädt alle Soundeffekte (idempotent).
+
+        Raises:
+            pygame.error: Wenn der Mixer nicht initialisiert werden kann.
+        """
+        with self._lock:
+            if pygame.mixer.get_init():
+                return
+            try:
+                pygame.mixer.init()
+                pygame.mixer.set_num_channels(self.kanaele)
+                # Kanal 0 ist für gestreamte Ansagen reserviert, damit ihn kein Effekt belegt
+                pygame.mixer.set_reserved(1)
+                logger.debug("Pygame mixer wurde initialisiert: %s", pygame.mixer.get_init())
+            except pygame.error as e:  # pylint: disable=no-member
+                logger.error("Pygame-Mixer konnte nicht initialisiert werden: %s", e)
+                raise
+            self._sounds.clear()
+            self._vorladen()
+
+    def _vorladen(self):
+        if not os.path.isdir(self.sound_verzeichnis):
+            logger.warning("Sound-Verzeichnis nicht gefunden: %s", self.sound_verzeichnis)
+            return
+        for datei in sorted(os.listdir(self.sound_verzeichnis)):
+            if not datei.endswith(".mp3"):
+                continue
+            try:
+                self._sounds[datei[:-4]] = pygame.mixer.Sound(os.path.join(self.sound_verzeichnis, datei))
+            except pygame.error as e:  # pylint: disable=no-member
+                logger.warning("Sound '%s' konnte nicht geladen werden: %s", datei, e)
+        logger.debug("%d Soundeffekte vorgeladen.", len(self._sounds))
+
+    def ist_bereit(self):
+        """
+        Returns:
+            bool: True, wenn der Mixer initialisiert ist.
+        """
+        return pygame.mixer.get_init() is not None
+
+    def sound(self, name):
+        """
+        Liefert einen vorgeladenen Soundeffekt.
+
+        Args:
+            name (str): Dateiname ohne Endung (z.B. "beep1").
+
+        Returns:
+            pygame.mixer.Sound or None: Der Sound oder None, wenn er nicht existiert.
+        """
+        self.starten()
+        return self._sounds.get(name)
+
+    def abspielen(self, sound, bei_ende=None):
+        """
+        Startet die Wiedergabe eines Sounds, ohne zu blockieren.
+
+        Args:
+            sound (pygame.mixer.Sound): Der abzuspielende Sound.
+            bei_ende (callable, optional): Wird mit der Wiedergabe aufgerufen, sobald sie beendet ist.
+
+        Returns:
+            Wiedergabe: Handle zum Warten auf bzw. Abbrechen der Wiedergabe.
+        """
+        self.starten()
+        with self._lock:
+            kanal = pygame.mixer.find_channel(True)
+            kanal.play(sound)
+        return Wiedergabe(sound, kanal, bei_ende)
+
+    def stream_kanal(self):
+        """
+        Liefert den für gestreamte Ansagen reservierten Kanal.
+
+        Returns:
+            pygame.mixer.Channel: Kanal 0, der von `abspielen` nie vergeben wird.
+        """
+        self.starten()
+        return pygame.mixer.Channel(0)
+
+    def beenden(self):
+        """Stoppt alle Wiedergaben und gibt das Audiogerät frei."""
+        with self._lock:
+            if pygame.mixer.get_init():
+                pygame.mixer.stop()
+                pygame.mixer.quit()
+                logger.debug("Pygame-Mixer wurde beendet.")
+            self._sounds.clear()
@@ -12,14 +12,115 @@ load_dotenv()
 API_URL = os.environ.get("API_URL")
 API_KEY = os.environ.get("API_KEY")
 
+# HTTP-Einstellungen (gemeinsamer Verbindungspool für alle API-Aufrufe)
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "4"))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3"))
+
+# Zwischenspeicher für GET-Antworten mit ETag / Last-Modified (Anzahl und Größe in MB)
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE_ENABLED", "True") == "True"
+HTTP_CACHE_GROESSE = int(os.environ.get("HTTP_CACHE_GROESSE", "64"))
+HTTP_CACHE_MAX_MB = int(os.environ.get("HTTP_CACHE_MAX_MB", "8"))
+# Sekunden, in denen die API-Version ohne erneute Nachfrage verwendet wird
+HTTP_CACHE_VERSION_FRISCH = float(os.environ.get("HTTP_CACHE_VERSION_FRISCH", "300"))
+
+# Wiederholungen bei Verbindungsfehlern und 502/503/504 (exponentielles Backoff mit Jitter)
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "0.2"))
+HTTP_BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", "2"))
+# Auch PUT/POST mit Idempotency-Key wiederholen (nur wenn das Backend den Schlüssel auswertet)
+HTTP_RETRY_WRITES = os.environ.get("HTTP_RETRY_WRITES", "False") == "True"
+
+# Maximale Gesamtdauer aller API-Aufrufe eines Scans in Sekunden (0 = unbegrenzt)
+SCAN_BUDGET = float(os.environ.get("SCAN_BUDGET", "4"))
+
+# Timeouts je Endpunkt in Sekunden (Standard: HTTP_TIMEOUT)
+API_TIMEOUTS = {
+    "health": float(os.getenv("API_TIMEOUT_HEALTH", str(HTTP_TIMEOUT))),
+    "version": float(os.getenv("API_TIMEOUT_VERSION", str(HTTP_TIMEOUT))),
+    "saldo_alle": float(os.getenv("API_TIMEOUT_SALDO_ALLE", str(HTTP_TIMEOUT))),
+    "person": float(os.getenv("API_TIMEOUT_PERSON", str(HTTP_TIMEOUT))),
+    "transaktion": float(os.getenv("API_TIMEOUT_TRANSAKTION", str(HTTP_TIMEOUT))),
+}
+
+# Circuit Breaker: nach so vielen Fehlern in Folge schlagen Aufrufe sofort fehl,
+# nach der Öffnungsdauer (Sekunden) wird ein einzelner Probe-Aufruf gesendet
+CIRCUIT_FEHLER_SCHWELLE = int(os.getenv("CIRCUIT_FEHLER_SCHWELLE", "3"))
+CIRCUIT_OEFFNUNGSDAUER = float(os.getenv("CIRCUIT_OEFFNUNGSDAUER", "15"))
+# Sekunden zwischen zwei Healthchecks im Hintergrund (0 = aus)
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "10"))
+
+# Lokaler Cache für Personendaten und Kontostände (Sekunden bis ein Eintrag als veraltet gilt
+# bzw. bis er auch bei fehlender API-Verbindung nicht mehr verwendet wird)
+PERSONEN_CACHE_ENABLED = os.getenv("PERSONEN_CACHE_ENABLED", "True") == "True"
+PERSONEN_CACHE_GROESSE = int(os.getenv("PERSONEN_CACHE_GROESSE", "500"))
+PERSONEN_CACHE_TTL = float(os.getenv("PERSONEN_CACHE_TTL", "60"))
+PERSONEN_CACHE_MAX_ALTER = float(os.getenv("PERSONEN_CACHE_MAX_ALTER", "3600"))
+
+# Lokales Transaktions-Journal für Buchungen ohne API-Verbindung
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "True") == "True"
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", "journal.sqlite3")
+JOURNAL_REPLAY_INTERVAL = float(os.getenv("JOURNAL_REPLAY_INTERVAL", "30"))
+JOURNAL_BATCH_SIZE = int(os.getenv("JOURNAL_BATCH_SIZE", "20"))
+
 # Allgemeine Einstellungen
 MY_NAME = os.environ.get("MY_NAME", "give me a name")
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 
 # Reader-spezifische Einstellungen
 CAMERA_INDEX = int(os.environ.get("CAMERA_INDEX", "-1"))
+# Bilder im Kamera-Treiberpuffer (V4L2), 1 = immer das aktuelle Bild, 0 = Treiber-Standard
+CAMERA_BUFFER_SIZE = int(os.environ.get("CAMERA_BUFFER_SIZE", "1"))
+# Aufnahmeprofil der Kamera ("qr", "grau" oder "treiber") und optionale Abweichungen davon:
+# Auflösung "breitexhoehe", Bildrate (0 = laut Profil) und Pixelformat (FourCC, z.B. "MJPG")
+CAMERA_PROFILE = os.environ.get("CAMERA_PROFILE", "qr")
+CAMERA_RESOLUTION = os.environ.get("CAMERA_RESOLUTION", "")
+CAMERA_FPS = float(os.environ.get("CAMERA_FPS", "0"))
+CAMERA_FOURCC = os.environ.get("CAMERA_FOURCC", "")
+# QR-Dekodierung nur bei Bewegung vor der Kamera (Anteil geänderter Pixel, Nachlauf in Sekunden)
+QR_MOTION_GATE = os.environ.get("QR_MOTION_GATE", "True") == "True"
+QR_MOTION_THRESHOLD = float(os.environ.get("QR_MOTION_THRESHOLD", "0.01"))
+QR_MOTION_HOLD = float(os.environ.get("QR_MOTION_HOLD", "2"))
+# Abstand zweier Dekodierversuche in Sekunden, solange sich etwas bewegt, bei ruhigem Bild
+# und im Leerlauf (nach QR_SLEEP_AFTER Sekunden ohne Bewegung)
+QR_DECODE_INTERVAL_ACTIVE = float(os.environ.get("QR_DECODE_INTERVAL_ACTIVE", "0.05"))
+QR_DECODE_INTERVAL = float(os.environ.get("QR_DECODE_INTERVAL", "0.15"))
+QR_DECODE_INTERVAL_SLEEP = float(os.environ.get("QR_DECODE_INTERVAL_SLEEP", "1"))
+QR_SLEEP_AFTER = float(os.environ.get("QR_SLEEP_AFTER", "120"))
+# Kamera-Bildrate und Auflösung ("breitexhoehe") im Leerlauf (0 bzw. leer = unverändert)
+QR_SLEEP_FPS = float(os.environ.get("QR_SLEEP_FPS", "5"))
+QR_SLEEP_RESOLUTION = os.environ.get("QR_SLEEP_RESOLUTION", "")
+# Höchster Anteil der Zeit, den die Dekodierung belegen darf (0-1, 0 = unbegrenzt)
+QR_DECODE_CPU_SHARE = float(os.environ.get("QR_DECODE_CPU_SHARE", "0.5"))
+# Sekunden, die derselbe Code nach seiner letzten Erkennung ignoriert wird (andere Codes sofort)
+QR_SCAN_COOLDOWN = float(os.environ.get("QR_SCAN_COOLDOWN", "5"))
+# Bildbereich für die Suche als "x,y,breite,hoehe" in Anteilen des Bildes (leer = ganzes Bild)
+QR_ROI = os.environ.get("QR_ROI", "")
+# Rand um den zuletzt erkannten Code, der beim nächsten Scan zuerst durchsucht wird
+QR_ROI_MARGIN = float(os.environ.get("QR_ROI_MARGIN", "0.5"))
+# QR-Dekoder ("pyzbar" oder "opencv") und Faktor für einen verkleinerten Vorab-Versuch (0 = aus)
+QR_DECODER = os.environ.get("QR_DECODER", "pyzbar")
+QR_DECODER_SCALE = float(os.environ.get("QR_DECODER_SCALE", "0"))
+# Anzahl der Prozesse für die QR-Dekodierung (Bilder über Shared Memory), 0 = im Hauptprozess
+QR_DECODE_PROCESSES = int(os.environ.get("QR_DECODE_PROCESSES", "0"))
 TOKEN_DELAY = int(os.environ.get("TOKEN_DELAY", "3"))
 DISABLE_BUZZER = os.getenv('DISABLE_BUZZER', 'False') == 'True'
+# Ereignisquelle des NFC-Lesers: "monitor" (CardMonitor von pyscard) oder "status"
+# (eigene Schleife mit SCardGetStatusChange, maximale Dauer eines Wartens in Sekunden)
+NFC_ENGINE = os.getenv("NFC_ENGINE", "monitor")
+NFC_STATUS_TIMEOUT = float(os.getenv("NFC_STATUS_TIMEOUT", "1"))
+# Übereinstimmende Scans eines ATR über die ATS, ab denen direkt die ATS gelesen wird (0 = nie)
+NFC_STRATEGY_CONFIRMATIONS = int(os.getenv("NFC_STRATEGY_CONFIRMATIONS", "3"))
+# Jeder n-te abgekürzte Scan liest trotzdem zuerst die UID, um Karten mit fester UID zu erkennen (0 = nie)
+NFC_STRATEGY_RECHECK = int(os.getenv("NFC_STRATEGY_RECHECK", "10"))
+
+# Scan-Pipeline (Eingabe -> API -> Feedback) mit begrenzten Queues
+PIPELINE_ENABLED = os.getenv("PIPELINE_ENABLED", "True") == "True"
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "5"))
+PIPELINE_TIMEOUT = float(os.getenv("PIPELINE_TIMEOUT", "2"))
+# Sekunden nach dem letzten Scan desselben Tokens/Codes, bis alle Scans als eine Buchung
+# mit Anzahl gesendet werden (0 = jeder Scan wird sofort einzeln gebucht)
+SCAN_COALESCE_WINDOW = float(os.getenv("SCAN_COALESCE_WINDOW", "0"))
 
 # Sound-Konfigurationen
 SOUND_CONFIG = {
@@ -35,6 +136,19 @@ SOUND_CONFIG = {
 
 TTS_VOICE = os.getenv("TTS_VOICE", "de-DE-KillianNeural")
 
+# TTS-Cache (0 deaktiviert den Cache)
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "cache/tts")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "50"))
+
+# Nicht gecachte Ansagen bereits während der Übertragung abspielen
+TTS_STREAMING = os.getenv("TTS_STREAMING", "True") == "True"
+
+# Dynamische Ansagen aus gecachten Textbausteinen zusammensetzen (benötigt den TTS-Cache)
+TTS_FRAGMENTS = os.getenv("TTS_FRAGMENTS", "True") == "True"
+TTS_FRAGMENT_PAUSE_MS = int(os.getenv("TTS_FRAGMENT_PAUSE_MS", "60"))
+TTS_SATZ_PAUSE_MS = int(os.getenv("TTS_SATZ_PAUSE_MS", "250"))
+TTS_FRAGMENT_ZAHLEN_MAX = int(os.getenv("TTS_FRAGMENT_ZAHLEN_MAX", "50"))
+
 # Logging-Konfiguration initialisieren
 logging.basicConfig(
     level=LOG_LEVEL,
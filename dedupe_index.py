@@ -0,0 +1,94 @@
+"""Unterdrückt wiederholte Scans desselben Tokens oder Codes mit eigener Ablaufzeit je Eintrag."""
+
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DedupeIndex:
+    """
+    Merkt sich verarbeitete Schlüssel (NFC-Token, QR-Code) bis zu ihrer Ablaufzeit.
+
+    Jeder Schlüssel läuft für sich ab: Person B kann direkt nach Person A
+    scannen, während ein versehentlicher zweiter Scan von A noch unterdrückt
+    wird. Die Ablaufzeiten liegen zusätzlich in einem Heap, sodass abgelaufene
+    Einträge ohne Durchsuchen aller Einträge entfernt werden. Veraltete
+    Heap-Einträge (nach einer Verlängerung oder `vergessen`) werden beim
+    Entnehmen übersprungen.
+    """
+
+    def __init__(self, max_eintraege=1024):
+        """
+        Args:
+            max_eintraege (int): Maximale Anzahl gleichzeitig gemerkter Schlüssel.
+        """
+        self.max_eintraege = max_eintraege
+        self._ablauf = {}  # Schlüssel -> Ablaufzeitpunkt (time.monotonic)
+        self._heap = []    # (Ablaufzeitpunkt, Schlüssel), älteste zuerst
+        self._unterdrueckt = 0
+        self._lock = threading.Lock()
+
+    def neu(self, schluessel, dauer, verlaengern=False):
+        """
+        Prüft, ob ein Schlüssel verarbeitet werden soll, und merkt ihn sich in diesem Fall.
+
+        Args:
+            schluessel (str): Der Token oder Code.
+            dauer (float): Sekunden, die der Schlüssel danach unterdrückt wird.
+            verlaengern (bool): Bei einem unterdrückten Scan die Ablaufzeit neu setzen, z.B.
+                                solange ein QR-Code vor der Kamera bleibt.
+
+        Returns:
+            bool: True, wenn der Schlüssel neu ist oder abgelaufen war.
+        """
+        jetzt = time.monotonic()
+        with self._lock:
+            self._aufraeumen(jetzt)
+            if schluessel in self._ablauf:
+                self._unterdrueckt += 1
+                if verlaengern:
+                    self._setzen(schluessel, jetzt + dauer)
+                return False
+            self._setzen(schluessel, jetzt + dauer)
+            while len(self._ablauf) > self.max_eintraege:
+                self._entfernen_aeltesten()
+            return True
+
+    def vergessen(self, schluessel):
+        """
+        Gibt einen Schlüssel sofort wieder frei (z.B. wenn die Verarbeitung fehlgeschlagen ist).
+
+        Args:
+            schluessel (str): Der Token oder Code.
+        """
+        with self._lock:
+            self._ablauf.pop(schluessel, None)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Anzahl gemerkter Schlüssel und unterdrückter Scans.
+        """
+        with self._lock:
+            self._aufraeumen(time.monotonic())
+            return {"eintraege": len(self._ablauf), "unterdrueckt": self._unterdrueckt}
+
+    def _setzen(self, schluessel, ablauf):
+        self._ablauf[schluessel] = ablauf
+        heapq.heappush(self._heap, (ablauf, schluessel))
+
+    def _aufraeumen(self, jetzt):
+        while self._heap and self._heap[0][0] <= jetzt:
+            ablauf, schluessel = heapq.heappop(self._heap)
+            if self._ablauf.get(schluessel) == ablauf:
+                del self._ablauf[schluessel]
+
+    def _entfernen_aeltesten(self):
+        while self._heap:
+            ablauf, schluessel = heapq.heappop(self._heap)
+            if self._ablauf.get(schluessel) == ablauf:
+                del self._ablauf[schluessel]
+                return
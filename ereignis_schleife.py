@@ -0,0 +1,129 @@
+"""
+Eine gemeinsame asyncio-Ereignisschleife für den ganzen Prozess.
+
+edge-tts und api_client_async arbeiten mit asyncio, der Rest der Anwendung mit
+Threads. Statt für jede Ansage mit asyncio.run eine neue Schleife anzulegen,
+laufen alle Koroutinen auf einer Schleife in einem eigenen Thread. Threads
+reichen sie mit `ausfuehren` (wartet auf das Ergebnis) oder `einplanen`
+(liefert ein Future) ein. Verbindungen wie die aiohttp-Session bleiben dadurch
+über einzelne Aufrufe hinweg offen.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class EreignisSchleife:
+    """Eine asyncio-Ereignisschleife in einem eigenen Thread, gestartet beim ersten Aufruf."""
+
+    def __init__(self, name="asyncio"):
+        """
+        Args:
+            name (str): Name des Threads.
+        """
+        self.name = name
+        self._schleife = None
+        self._thread = None
+        self._beim_beenden = []  # Koroutinenfunktionen, die vor dem Beenden abgewartet werden
+        self._lock = threading.Lock()
+
+    def _laufende_schleife(self):
+        with self._lock:
+            if self._schleife is None:
+                self._schleife = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._schleife.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                logger.debug("Ereignisschleife '%s' gestartet.", self.name)
+            return self._schleife
+
+    def einplanen(self, koroutine):
+        """
+        Startet eine Koroutine auf der Schleife, ohne auf sie zu warten.
+
+        Args:
+            koroutine: Die Koroutine.
+
+        Returns:
+            concurrent.futures.Future: Das Ergebnis der Koroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(koroutine, self._laufende_schleife())
+
+    def ausfuehren(self, koroutine, timeout=None):
+        """
+        Führt eine Koroutine auf der Schleife aus und wartet auf ihr Ergebnis.
+
+        Args:
+            koroutine: Die Koroutine.
+            timeout (float, optional): Maximale Wartezeit in Sekunden, danach wird die Koroutine abgebrochen.
+
+        Returns:
+            Das Ergebnis der Koroutine.
+
+        Raises:
+            RuntimeError: Beim Aufruf aus der Schleife selbst (würde sie blockieren).
+            TimeoutError: Wenn die Koroutine nicht rechtzeitig fertig wurde.
+        """
+        if threading.current_thread() is self._thread:
+            koroutine.close()
+            raise RuntimeError("ausfuehren() darf nicht in der Ereignisschleife selbst aufgerufen werden.")
+        future = self.einplanen(koroutine)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def beim_beenden(self, aufraeumen):
+        """
+        Registriert eine Koroutinenfunktion, die beim Beenden auf der Schleife abgewartet wird.
+
+        Args:
+            aufraeumen (callable): Koroutinenfunktion ohne Argumente, z.B. zum Schließen einer Session.
+        """
+        with self._lock:
+            if aufraeumen not in self._beim_beenden:
+                self._beim_beenden.append(aufraeumen)
+
+    def stoppen(self, timeout=5.0):
+        """
+        Räumt auf, bricht laufende Koroutinen ab und beendet die Schleife.
+
+        Args:
+            timeout (float): Maximale Wartezeit in Sekunden.
+        """
+        with self._lock:
+            schleife, thread, self._schleife, self._thread = self._schleife, self._thread, None, None
+            aufraeumen = list(self._beim_beenden)
+        if schleife is None:
+            return
+
+        async def _beenden():
+            for funktion in aufraeumen:
+                try:
+                    await funktion()
+                except Exception as e:  # pylint: disable=W0718
+                    logger.warning("Fehler beim Aufräumen der Ereignisschleife: %s", e)
+            aufgaben = [aufgabe for aufgabe in asyncio.all_tasks() if aufgabe is not asyncio.current_task()]
+            for aufgabe in aufgaben:
+                aufgabe.cancel()
+            await asyncio.gather(*aufgaben, return_exceptions=True)
+            await schleife.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_beenden(), schleife).result(timeout)
+        except Exception as e:  # pylint: disable=W0718
+            logger.warning("Ereignisschleife '%s' konnte nicht sauber beendet werden: %s", self.name, e)
+        schleife.call_soon_threadsafe(schleife.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            schleife.close()
+
+
+# Die gemeinsame Schleife für TTS und asynchrone API-Aufrufe
+SCHLEIFE = EreignisSchleife()
+atexit.register(SCHLEIFE.stoppen)
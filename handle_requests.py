@@ -1,25 +1,293 @@
 """Definiert gemeinsam genutzte Funktionen für HTTP-Anfragen."""
 
+import contextvars
 import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+import config
+import http_cache
 
 logger = logging.getLogger(__name__)
 
+# Gemeinsamer Verbindungspool für alle Threads. Der urllib3-Pool im Adapter ist
+# threadsicher und hält die Verbindungen zum Backend offen (Keep-Alive), damit
+# nicht bei jedem Scan ein neuer TCP-/TLS-Handshake nötig ist.
+_ADAPTER = HTTPAdapter(pool_connections=2, pool_maxsize=config.HTTP_POOL_SIZE)
 
-def delete_request(url, headers=None):
+# Gespeicherte GET-Antworten für URLs mit Cache-Regel (siehe http_cache.ValidatorCache.regel)
+VALIDATOR_CACHE = http_cache.ValidatorCache(config.HTTP_CACHE_GROESSE,
+                                            config.HTTP_CACHE_MAX_MB * 1024 * 1024) if config.HTTP_CACHE_ENABLED else None
+
+# requests.Session selbst ist nicht garantiert threadsicher, daher bekommt jeder
+# Thread eine eigene Session, die aber den gemeinsamen Adapter nutzt.
+_thread_lokal = threading.local()
+
+
+# Statuscodes, bei denen ein erneuter Versuch sinnvoll ist (Gateway/Backend kurzzeitig weg)
+WIEDERHOLBARE_STATUS = (502, 503, 504)
+
+
+class RetryPolicy:  # pylint: disable=too-few-public-methods
+    """
+    Regeln für Timeouts und Wiederholungen eines Requests.
+
+    Wiederholt wird bei Verbindungsfehlern, Timeouts und den Statuscodes aus
+    `status_codes`. GET und DELETE werden immer wiederholt, PUT und POST nur
+    mit Header "Idempotency-Key" und gesetztem config.HTTP_RETRY_WRITES, damit eine
+    Buchung nicht doppelt ausgeführt wird.
+    Zwischen den Versuchen wird exponentiell mit Jitter gewartet.
+    """
+
+    def __init__(self, versuche=None, connect_timeout=None, read_timeout=None,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 backoff=None, backoff_max=None, status_codes=WIEDERHOLBARE_STATUS):
+        """
+        Args:
+            versuche (int, optional): Maximale Anzahl Versuche. Standard: config.HTTP_RETRIES + 1.
+            connect_timeout (float, optional): Timeout für den Verbindungsaufbau in Sekunden.
+                                               Standard: config.HTTP_CONNECT_TIMEOUT.
+            read_timeout (float, optional): Timeout für die Antwort in Sekunden. Standard: config.HTTP_TIMEOUT.
+            backoff (float, optional): Basis der Wartezeit in Sekunden. Standard: config.HTTP_BACKOFF.
+            backoff_max (float, optional): Obergrenze der Wartezeit. Standard: config.HTTP_BACKOFF_MAX.
+            status_codes (tuple): Statuscodes, bei denen wiederholt wird.
+        """
+        self.versuche = versuche if versuche is not None else config.HTTP_RETRIES + 1
+        self.connect_timeout = connect_timeout or config.HTTP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or config.HTTP_TIMEOUT
+        self.backoff = config.HTTP_BACKOFF if backoff is None else backoff
+        self.backoff_max = config.HTTP_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.status_codes = status_codes
+
+    def wartezeit(self, versuch):
+        """
+        Wartezeit vor dem nächsten Versuch ("Full Jitter").
+
+        Args:
+            versuch (int): Nummer des fehlgeschlagenen Versuchs (ab 1).
+
+        Returns:
+            float: Wartezeit in Sekunden.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** (versuch - 1)))
+
+
+# Zeitbudget des aktuellen Threads (monotone Deadline), siehe `zeitbudget`
+_budget = threading.local()
+
+
+@contextmanager
+def zeitbudget(sekunden):
+    """
+    Begrenzt die Gesamtdauer aller Requests innerhalb des Blocks (inkl. Wiederholungen).
+
+    Ist das Budget aufgebraucht, wird kein weiterer Versuch gestartet und der
+    Request schlägt sofort fehl, statt den Scan minutenlang zu blockieren.
+
+    Args:
+        sekunden (float): Das Zeitbudget, z.B. config.SCAN_BUDGET. None oder 0 = unbegrenzt.
+    """
+    vorher = getattr(_budget, "deadline", None)
+    if sekunden:
+        deadline = time.monotonic() + sekunden
+        _budget.deadline = deadline if vorher is None else min(vorher, deadline)
+    try:
+        yield
+    finally:
+        _budget.deadline = vorher
+
+
+def _restzeit():
+    """Verbleibendes Zeitbudget des Threads in Sekunden oder None ohne Budget."""
+    deadline = getattr(_budget, "deadline", None)
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class Zustellung:  # pylint: disable=too-few-public-methods
+    """
+    Hält fest, ob ein Request ohne Antwort das Backend trotzdem erreicht haben kann.
+
+    `unklar` wird gesetzt, sobald ein Versuch nach dem Verbindungsaufbau scheitert
+    (z.B. Lese-Timeout): Das Backend kann die Anfrage dann bereits ausgeführt haben.
+    Scheitert nur der Verbindungsaufbau, ist sicher nichts angekommen.
+    """
+
+    def __init__(self):
+        self.unklar = False
+
+
+# Zustellung der Requests im aktuellen Thread bzw. in der aktuellen Aufgabe, siehe `zustellung_verfolgen`
+_zustellung = contextvars.ContextVar("zustellung", default=None)
+
+
+@contextmanager
+def zustellung_verfolgen():
+    """
+    Verfolgt, ob die Requests im Block (synchron oder asynchron) das Backend erreicht haben können.
+
+    Beispiel:
+        with zustellung_verfolgen() as zustellung:
+            response = put_request(url, headers, daten)
+        if response is None and zustellung.unklar:
+            ...
+
+    Yields:
+        Zustellung: Das Ergebnis, gültig nach Ende des Blocks.
+    """
+    zustellung = Zustellung()
+    token = _zustellung.set(zustellung)
+    try:
+        yield zustellung
+    finally:
+        _zustellung.reset(token)
+
+
+def zustellung_unklar():
+    """Vermerkt für `zustellung_verfolgen`, dass ein Versuch nach dem Senden ohne Antwort blieb."""
+    zustellung = _zustellung.get()
+    if zustellung is not None:
+        zustellung.unklar = True
+
+
+def _nicht_gesendet(fehler):
+    """Ist der Versuch sicher schon beim Verbindungsaufbau gescheitert?"""
+    if isinstance(fehler, requests.exceptions.ConnectTimeout):
+        return True
+    # requests verpackt den Fehler des Verbindungsaufbaus in urllib3.MaxRetryError
+    grund = getattr(fehler.args[0], "reason", None) if fehler.args else None
+    return isinstance(grund, NewConnectionError)
+
+
+def _wiederholbar(methode, headers):
+    """Darf ein Request dieser Methode gefahrlos wiederholt werden?"""
+    if methode in ("GET", "DELETE"):
+        return True
+    # Schreibende Requests nur, wenn das Backend den Idempotency-Key nachweislich auswertet
+    return config.HTTP_RETRY_WRITES and bool(headers and "Idempotency-Key" in headers)
+
+
+def _sende_request(methode, url, headers, policy, timeout, **kwargs):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Sendet einen Request nach den Regeln der RetryPolicy.
+
+    Returns:
+        requests.Response: Die letzte Antwort (kann einen Fehlerstatus haben).
+
+    Raises:
+        requests.exceptions.RequestException: Wenn keine Antwort empfangen wurde.
+    """
+    policy = policy or RetryPolicy()
+    read_timeout = timeout or policy.read_timeout
+    versuche = policy.versuche if _wiederholbar(methode, headers) else 1
+
+    versuch = 0
+    while True:
+        versuch += 1
+        rest = _restzeit()
+        if rest is not None and rest <= 0:
+            raise requests.exceptions.Timeout(f"Zeitbudget für {methode} {url} aufgebraucht")
+        connect = policy.connect_timeout if rest is None else min(policy.connect_timeout, rest)
+        lesen = read_timeout if rest is None else min(read_timeout, rest)
+
+        try:
+            response = get_session().request(methode, url, headers=headers, timeout=(connect, lesen), **kwargs)
+            if response.status_code not in policy.status_codes or versuch >= versuche:
+                return response
+            grund = f"Status {response.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if not _nicht_gesendet(e):
+                zustellung_unklar()
+            if versuch >= versuche:
+                raise
+            grund = type(e).__name__
+
+        pause = policy.wartezeit(versuch)
+        rest = _restzeit()
+        if rest is not None and pause >= rest:
+            raise requests.exceptions.Timeout(f"Zeitbudget für {methode} {url} reicht nicht für einen weiteren Versuch")
+        logger.warning("%s-Request an %s fehlgeschlagen (%s), Versuch %d/%d in %.2f s.",
+                       methode, url, grund, versuch + 1, versuche, pause)
+        time.sleep(pause)
+
+
+def get_session():
+    """
+    Liefert die Session des aktuellen Threads (wird beim ersten Aufruf angelegt).
+
+    Returns:
+        requests.Session: Session, die den gemeinsamen Verbindungspool verwendet.
+    """
+    session = getattr(_thread_lokal, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("http://", _ADAPTER)
+        session.mount("https://", _ADAPTER)
+        _thread_lokal.session = session
+    return session
+
+
+def close_sessions():
+    """Schließt alle offenen Verbindungen des gemeinsamen Verbindungspools."""
+    _ADAPTER.close()
+    logger.debug("HTTP-Verbindungspool geschlossen.")
+
+
+def ist_frisch_gespeichert(url, params=None):
+    """
+    Prüft, ob ein GET-Request ohne Netzwerkzugriff aus dem Validator-Cache beantwortet wird.
+
+    Args:
+        url (str): Die URL.
+        params (dict, optional): Die Query-Parameter.
+
+    Returns:
+        bool: True, wenn eine frische Antwort gespeichert ist.
+    """
+    if not VALIDATOR_CACHE:
+        return False
+    eintrag = VALIDATOR_CACHE.hole(url, params)
+    return eintrag is not None and eintrag.frisch_bis > time.monotonic()
+
+
+def json_daten(response):
+    """
+    Liefert den JSON-Inhalt einer Antwort und merkt ihn sich am Response-Objekt.
+
+    Antworten aus dem Validator-Cache werden dadurch nur einmal je Version geparst.
+    Das Ergebnis wird von allen Aufrufern geteilt und darf nicht verändert werden.
+
+    Args:
+        response (requests.Response): Die Antwort.
+
+    Returns:
+        Der geparste JSON-Inhalt.
+    """
+    daten = getattr(response, "json_daten", None)
+    if daten is None:
+        daten = response.json()
+        response.json_daten = daten
+    return daten
+
+
+def delete_request(url, headers=None, timeout=None, policy=None):
     """
     Führt einen DELETE-Request an die angegebene URL aus.
 
     Args:
         url (str): Die URL, an die der Request gesendet werden soll.
         headers (dict, optional): Ein Dictionary mit zu sendenden Request-Headern.
+        timeout (float, optional): Lese-Timeout in Sekunden. Standard: config.HTTP_TIMEOUT.
+        policy (RetryPolicy, optional): Abweichende Regeln für Timeouts und Wiederholungen.
 
     Returns:
         requests.Response: Das Response-Objekt.
     """
     response = None
     try:
-        response = requests.delete(url, headers=headers, timeout=10)
+        response = _sende_request("DELETE", url, headers, policy, timeout)
         response.raise_for_status()
         return response
     except requests.exceptions.RequestException as e:
@@ -30,21 +298,38 @@ def delete_request(url, headers=None):
         return response
 
 
-def get_request(url, headers=None, params=None):
+def get_request(url, headers=None, params=None, timeout=None, policy=None):
     """Führt einen GET-Request an die angegebene URL aus.
 
+    Für URLs mit Cache-Regel wird eine gespeicherte Antwort innerhalb ihrer
+    Frischezeit direkt geliefert, danach per If-None-Match / If-Modified-Since
+    nachgefragt und bei 304 wiederverwendet.
+
     Args:
         url (str): Die URL, an die der Request gesendet werden soll.
         headers (dict, optional): Ein Dictionary mit zu sendenden Request-Headern.
         params (dict, optional): Ein Dictionary mit Query-Parametern. Defaults to None.
+        timeout (float, optional): Lese-Timeout in Sekunden. Standard: config.HTTP_TIMEOUT.
+        policy (RetryPolicy, optional): Abweichende Regeln für Timeouts und Wiederholungen.
 
     Returns:
         requests.Response: Das Response-Objekt.
     """
     response = None
+    eintrag = VALIDATOR_CACHE.hole(url, params) if VALIDATOR_CACHE else None
+    if eintrag is not None:
+        if eintrag.frisch_bis > time.monotonic():
+            VALIDATOR_CACHE.frisch_geliefert()
+            return eintrag.response
+        headers = {**(headers or {}), **eintrag.bedingungen()}
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = _sende_request("GET", url, headers, policy, timeout, params=params)
+        if response.status_code == 304 and eintrag is not None:
+            logger.debug("GET-Request an %s: nicht geändert, verwende gespeicherte Antwort.", url)
+            return VALIDATOR_CACHE.nicht_geaendert(url, params, eintrag)
         response.raise_for_status()  # Wirft eine Exception für fehlerhafte Statuscodes
+        if VALIDATOR_CACHE:
+            VALIDATOR_CACHE.speichern(url, params, response)
         return response
     except requests.exceptions.RequestException as e:
         if response is not None and response.status_code in (403, 404):
@@ -54,21 +339,24 @@ def get_request(url, headers=None, params=None):
         return response
 
 
-def post_request(url, headers=None, json_data=None):
+def post_request(url, headers=None, json_data=None, timeout=None, policy=None):
     """Führt einen POST-Request an die angegebene URL aus.
 
     Args:
         url (str): Die URL, an die der Request gesendet werden soll.
         headers (dict, optional): Ein Dictionary mit zu sendenden Request-Headern.
         json_data (dict, optional): Ein Dictionary, das als JSON-Daten gesendet wird. Defaults to None.
+        timeout (float, optional): Lese-Timeout in Sekunden. Standard: config.HTTP_TIMEOUT.
+        policy (RetryPolicy, optional): Abweichende Regeln für Timeouts und Wiederholungen.
+                                        Wiederholt wird nur mit Header "Idempotency-Key"
+                                        und config.HTTP_RETRY_WRITES.
 
     Returns:
         requests.Response: Das Response-Objekt.
     """
     response = None
     try:
-        response = requests.post(url, headers=headers,
-                                 json=json_data, timeout=10)
+        response = _sende_request("POST", url, headers, policy, timeout, json=json_data)
         response.raise_for_status()
         return response
     except requests.exceptions.RequestException as e:
@@ -79,7 +367,7 @@ def post_request(url, headers=None, json_data=None):
         return response
 
 
-def put_request(url, headers=None, json_data=None):
+def put_request(url, headers=None, json_data=None, timeout=None, policy=None):
     """
     Führt einen PUT-Request an die angegebene URL aus.
 
@@ -87,14 +375,17 @@ def put_request(url, headers=None, json_data=None):
         url (str): Die URL, an die der Request gesendet werden soll.
         headers (dict, optional): Ein Dictionary mit zu sendenden Request-Headern.
         json_data (dict, optional): Ein Dictionary, das als JSON-Daten gesendet wird. Defaults to None.
+        timeout (float, optional): Lese-Timeout in Sekunden. Standard: config.HTTP_TIMEOUT.
+        policy (RetryPolicy, optional): Abweichende Regeln für Timeouts und Wiederholungen.
+                                        Wiederholt wird nur mit Header "Idempotency-Key"
+                                        und config.HTTP_RETRY_WRITES.
 
     Returns:
         requests.Response: Das Response-Objekt.
     """
     response = None
     try:
-        response = requests.put(url, headers=headers,
-                                json=json_data, timeout=10)
+        response = _sende_request("PUT", url, headers, policy, timeout, json=json_data)
         response.raise_for_status()
         return response
     except requests.exceptions.RequestException as e:
@@ -0,0 +1,270 @@
+"""
+Asynchrone Variante von handle_requests auf Basis von aiohttp.
+
+Es gelten dieselbe RetryPolicy, dasselbe Zeitbudget und derselbe Validator-Cache
+wie bei den synchronen Funktionen. Die Antworten werden vollständig gelesen und
+als `Antwort` mit der Schnittstelle von requests.Response geliefert. Fehler
+werden wie dort als requests-Exceptions gemeldet, damit aufrufender Code
+unverändert bleiben kann. Alle Koroutinen laufen auf der gemeinsamen Schleife
+aus ereignis_schleife.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+import config
+import ereignis_schleife
+import handle_requests as hr
+
+logger = logging.getLogger(__name__)
+
+# Eine Session je Ereignisschleife; sie hält die Verbindungen zum Backend offen (Keep-Alive)
+_sessions = {}
+
+# Zeitbudget der aktuellen Aufgabe (monotone Deadline), siehe `zeitbudget`
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class Antwort:
+    """Eine vollständig gelesene Antwort mit der Schnittstelle von requests.Response."""
+
+    def __init__(self, url, status_code, headers, content, reason=""):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Args:
+            url (str): Die URL des Requests.
+            status_code (int): Der HTTP-Statuscode.
+            headers (Mapping): Die Header der Antwort.
+            content (bytes): Der Inhalt der Antwort.
+            reason (str): Der Statustext.
+        """
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.reason = reason
+
+    def __bool__(self):
+        """Wie bei requests.Response: False bei einem Fehlerstatus."""
+        return self.ok
+
+    @property
+    def ok(self):
+        """True bei einem Statuscode unter 400."""
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        """Der Inhalt als Text."""
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        """
+        Returns:
+            Der geparste JSON-Inhalt.
+
+        Raises:
+            ValueError: Wenn der Inhalt kein gültiges JSON ist.
+        """
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        """
+        Raises:
+            requests.exceptions.HTTPError: Bei einem Statuscode ab 400.
+        """
+        if self.status_code >= 400:
+            art = "Client" if self.status_code < 500 else "Server"
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {art} Error: {self.reason} for url: {self.url}", response=self)
+
+
+@contextmanager
+def zeitbudget(sekunden):
+    """
+    Begrenzt die Gesamtdauer aller Requests innerhalb des Blocks (inkl. Wiederholungen).
+
+    Wie handle_requests.zeitbudget, gilt aber je asyncio-Aufgabe statt je Thread.
+
+    Args:
+        sekunden (float): Das Zeitbudget, z.B. config.SCAN_BUDGET. None oder 0 = unbegrenzt.
+    """
+    vorher = _deadline.get()
+    token = None
+    if sekunden:
+        deadline = time.monotonic() + sekunden
+        token = _deadline.set(deadline if vorher is None else min(vorher, deadline))
+    try:
+        yield
+    finally:
+        if token is not None:
+            _deadline.reset(token)
+
+
+def _restzeit():
+    """Verbleibendes Zeitbudget der Aufgabe in Sekunden oder None ohne Budget."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _wiederholbar(methode, headers):
+    """Darf ein Request dieser Methode gefahrlos wiederholt werden?"""
+    if methode in ("GET", "DELETE"):
+        return True
+    # Schreibende Requests nur, wenn das Backend den Idempotency-Key nachweislich auswertet
+    return config.HTTP_RETRY_WRITES and bool(headers and "Idempotency-Key" in headers)
+
+
+def get_session():
+    """
+    Liefert die Session der laufenden Ereignisschleife (wird beim ersten Aufruf angelegt).
+
+    Returns:
+        aiohttp.ClientSession: Session mit höchstens config.HTTP_POOL_SIZE Verbindungen.
+    """
+    schleife = asyncio.get_running_loop()
+    session = _sessions.get(schleife)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=config.HTTP_POOL_SIZE))
+        _sessions[schleife] = session
+        ereignis_schleife.SCHLEIFE.beim_beenden(close_sessions)
+    return session
+
+
+async def close_sessions():
+    """Schließt die Session der laufenden Ereignisschleife und ihre Verbindungen."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+        logger.debug("Asynchroner HTTP-Verbindungspool geschlossen.")
+
+
+async def _sende_request(methode, url, headers, policy, timeout, **kwargs):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Sendet einen Request nach den Regeln der RetryPolicy.
+
+    Returns:
+        Antwort: Die letzte Antwort (kann einen Fehlerstatus haben).
+
+    Raises:
+        requests.exceptions.RequestException: Wenn keine Antwort empfangen wurde.
+    """
+    policy = policy or hr.RetryPolicy()
+    read_timeout = timeout or policy.read_timeout
+    versuche = policy.versuche if _wiederholbar(methode, headers) else 1
+
+    versuch = 0
+    while True:
+        versuch += 1
+        rest = _restzeit()
+        if rest is not None and rest <= 0:
+            raise requests.exceptions.Timeout(f"Zeitbudget für {methode} {url} aufgebraucht")
+        zeitlimit = aiohttp.ClientTimeout(total=rest, sock_connect=policy.connect_timeout, sock_read=read_timeout)
+
+        try:
+            async with get_session().request(methode, url, headers=headers, timeout=zeitlimit, **kwargs) as antwort:
+                response = Antwort(url, antwort.status, antwort.headers, await antwort.read(), antwort.reason or "")
+            if response.status_code not in policy.status_codes or versuch >= versuche:
+                return response
+            grund = f"Status {response.status_code}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if not isinstance(e, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)):
+                # Nach dem Verbindungsaufbau kann das Backend den Request bereits erhalten haben
+                hr.zustellung_unklar()
+            if versuch >= versuche:
+                if isinstance(e, asyncio.TimeoutError):
+                    raise requests.exceptions.Timeout(f"Timeout beim {methode}-Request an {url}") from e
+                raise requests.exceptions.ConnectionError(str(e)) from e
+            grund = type(e).__name__
+
+        pause = policy.wartezeit(versuch)
+        rest = _restzeit()
+        if rest is not None and pause >= rest:
+            raise requests.exceptions.Timeout(f"Zeitbudget für {methode} {url} reicht nicht für einen weiteren Versuch")
+        logger.warning("%s-Request an %s fehlgeschlagen (%s), Versuch %d/%d in %.2f s.",
+                       methode, url, grund, versuch + 1, versuche, pause)
+        await asyncio.sleep(pause)
+
+
+async def _request(methode, url, headers, policy, timeout, **kwargs):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Sendet einen DELETE-, POST- oder PUT-Request und protokolliert Fehler wie handle_requests."""
+    response = None
+    try:
+        response = await _sende_request(methode, url, headers, policy, timeout, **kwargs)
+        response.raise_for_status()
+        return response
+    except requests.exceptions.RequestException as e:
+        if response is not None and response.status_code in (403, 404):
+            logger.info("Meldung beim %s-Request an %s (Status: %s)", methode, url, response.status_code)
+        else:
+            logger.error("Fehler beim %s-Request an %s: %s", methode, url, e)
+        return response
+
+
+async def delete_request(url, headers=None, timeout=None, policy=None):
+    """
+    Führt einen DELETE-Request an die angegebene URL aus (siehe handle_requests.delete_request).
+
+    Returns:
+        Antwort or None: Die Antwort oder None, wenn keine empfangen wurde.
+    """
+    return await _request("DELETE", url, headers, policy, timeout)
+
+
+async def get_request(url, headers=None, params=None, timeout=None, policy=None):
+    """
+    Führt einen GET-Request an die angegebene URL aus (siehe handle_requests.get_request).
+
+    Nutzt denselben Validator-Cache wie die synchronen Requests.
+
+    Returns:
+        Antwort or requests.Response or None: Die Antwort (aus dem Cache ggf. die
+                                              gespeicherte) oder None, wenn keine empfangen wurde.
+    """
+    response = None
+    eintrag = hr.VALIDATOR_CACHE.hole(url, params) if hr.VALIDATOR_CACHE else None
+    if eintrag is not None:
+        if eintrag.frisch_bis > time.monotonic():
+            hr.VALIDATOR_CACHE.frisch_geliefert()
+            return eintrag.response
+        headers = {**(headers or {}), **eintrag.bedingungen()}
+    try:
+        response = await _sende_request("GET", url, headers, policy, timeout, params=params)
+        if response.status_code == 304 and eintrag is not None:
+            logger.debug("GET-Request an %s: nicht geändert, verwende gespeicherte Antwort.", url)
+            return hr.VALIDATOR_CACHE.nicht_geaendert(url, params, eintrag)
+        response.raise_for_status()
+        if hr.VALIDATOR_CACHE:
+            hr.VALIDATOR_CACHE.speichern(url, params, response)
+        return response
+    except requests.exceptions.RequestException as e:
+        if response is not None and response.status_code in (403, 404):
+            logger.info("Meldung beim GET-Request an %s (Status: %s)", url, response.status_code)
+        else:
+            logger.error("Fehler beim GET-Request an %s: %s", url, e)
+        return response
+
+
+async def post_request(url, headers=None, json_data=None, timeout=None, policy=None):
+    """
+    Führt einen POST-Request an die angegebene URL aus (siehe handle_requests.post_request).
+
+    Returns:
+        Antwort or None: Die Antwort oder None, wenn keine empfangen wurde.
+    """
+    return await _request("POST", url, headers, policy, timeout, json=json_data)
+
+
+async def put_request(url, headers=None, json_data=None, timeout=None, policy=None):
+    """
+    Führt einen PUT-Request an die angegebene URL aus (siehe handle_requests.put_request).
+
+    Returns:
+        Antwort or None: Die Antwort oder None, wenn keine empfangen wurde.
+    """
+    return await _request("PUT", url, headers, policy, timeout, json=json_data)
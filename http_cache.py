@@ -0,0 +1,147 @@
+"""Validator-Cache für GET-Requests (ETag / Last-Modified)."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEintrag:  # pylint: disable=too-few-public-methods
+    """Eine gespeicherte Antwort mit ihren Validatoren."""
+
+    def __init__(self, response, frisch):
+        self.response = response
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.groesse = len(response.content)
+        self.frisch_bis = time.monotonic() + frisch
+
+    def bedingungen(self):
+        """
+        Returns:
+            dict: Header für einen bedingten Request (If-None-Match / If-Modified-Since).
+        """
+        bedingungen = {}
+        if self.etag:
+            bedingungen["If-None-Match"] = self.etag
+        if self.last_modified:
+            bedingungen["If-Modified-Since"] = self.last_modified
+        return bedingungen
+
+
+class ValidatorCache:
+    """
+    Begrenzter In-Memory-Cache für GET-Antworten.
+
+    Gespeichert wird nur für URLs, für die mit `regel` eine Regel hinterlegt ist.
+    Innerhalb der Frischezeit einer Regel wird die gespeicherte Antwort ohne
+    Request geliefert, danach wird mit If-None-Match / If-Modified-Since
+    nachgefragt und bei 304 die gespeicherte Antwort verwendet.
+    """
+
+    def __init__(self, max_eintraege=64, max_bytes=8 * 1024 * 1024):
+        """
+        Args:
+            max_eintraege (int): Maximale Anzahl gespeicherter Antworten.
+            max_bytes (int): Maximale Gesamtgröße der gespeicherten Antworten in Bytes.
+        """
+        self.max_eintraege = max_eintraege
+        self.max_bytes = max_bytes
+        self._regeln = {}                # URL-Präfix -> Frischezeit in Sekunden
+        self._eintraege = OrderedDict()  # (url, params) -> CacheEintrag, älteste zuerst
+        self._groesse = 0
+        self._zaehler = {"frisch": 0, "nicht_geaendert": 0, "geaendert": 0}
+        self._lock = threading.Lock()
+
+    def regel(self, url_praefix, frisch=0.0):
+        """
+        Aktiviert den Cache für alle URLs, die mit dem Präfix beginnen.
+
+        Args:
+            url_praefix (str): Anfang der URL, z.B. f"{config.API_URL}/saldo-alle".
+            frisch (float): Sekunden, in denen die Antwort ohne Nachfrage verwendet wird.
+                            0 = immer mit bedingtem Request nachfragen.
+        """
+        with self._lock:
+            self._regeln[url_praefix] = frisch
+
+    def _frischezeit(self, url):
+        """Frischezeit der längsten passenden Regel oder None, wenn keine Regel passt."""
+        passend = [praefix for praefix in self._regeln if url.startswith(praefix)]
+        return self._regeln[max(passend, key=len)] if passend else None
+
+    @staticmethod
+    def _schluessel(url, params):
+        return url, tuple(sorted((params or {}).items()))
+
+    def hole(self, url, params=None):
+        """
+        Sucht die gespeicherte Antwort zu einer URL.
+
+        Args:
+            url (str): Die URL.
+            params (dict, optional): Die Query-Parameter.
+
+        Returns:
+            CacheEintrag or None: Der Eintrag oder None.
+        """
+        with self._lock:
+            return self._eintraege.get(self._schluessel(url, params))
+
+    def frisch_geliefert(self):
+        """Vermerkt eine Antwort, die ohne Request aus dem Cache geliefert wurde."""
+        with self._lock:
+            self._zaehler["frisch"] += 1
+
+    def nicht_geaendert(self, url, params, eintrag):
+        """
+        Vermerkt eine 304-Antwort und verlängert die Frischezeit des Eintrags.
+
+        Returns:
+            requests.Response: Die gespeicherte Antwort.
+        """
+        with self._lock:
+            self._zaehler["nicht_geaendert"] += 1
+            eintrag.frisch_bis = time.monotonic() + (self._frischezeit(url) or 0.0)
+            schluessel = self._schluessel(url, params)
+            if schluessel in self._eintraege:
+                self._eintraege.move_to_end(schluessel)
+        return eintrag.response
+
+    def speichern(self, url, params, response):
+        """
+        Speichert eine erfolgreiche Antwort, sofern für die URL eine Regel existiert
+        und die Antwort einen Validator oder die Regel eine Frischezeit hat.
+
+        Args:
+            url (str): Die angefragte URL.
+            params (dict, optional): Die Query-Parameter.
+            response (requests.Response): Die Antwort (Status 200).
+        """
+        with self._lock:
+            frisch = self._frischezeit(url)
+            if frisch is None or response.status_code != 200:
+                return
+            eintrag = CacheEintrag(response, frisch)
+            if not (eintrag.etag or eintrag.last_modified or frisch) or eintrag.groesse > self.max_bytes:
+                return
+            schluessel = self._schluessel(url, params)
+            alt = self._eintraege.pop(schluessel, None)
+            if alt is not None:
+                self._groesse -= alt.groesse
+            self._zaehler["geaendert"] += 1
+            self._eintraege[schluessel] = eintrag
+            self._groesse += eintrag.groesse
+            while len(self._eintraege) > self.max_eintraege or self._groesse > self.max_bytes:
+                _, verdraengt = self._eintraege.popitem(last=False)
+                self._groesse -= verdraengt.groesse
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Antworten ohne Request (frisch), per 304 bestätigte, neu geladene, Einträge und Bytes.
+        """
+        with self._lock:
+            return {**self._zaehler, "eintraege": len(self._eintraege), "bytes": self._groesse}
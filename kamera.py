@@ -0,0 +1,235 @@
+"""
+Kamera-Thread mit Puffer für das jeweils neueste Bild.
+
+Der Thread liest die Kamera ununterbrochen aus, damit sich im Treiber keine
+alten Bilder stauen. Gespeichert wird immer nur das zuletzt gelesene Bild, ältere
+werden verworfen. Der Dekoder holt sich bei Bedarf das neueste Bild und wartet
+nie auf ein Bild, das schon beim Lesen veraltet war.
+
+Die Bilder werden reihum in drei vorab angelegte Puffer gelesen (einer wird
+beschrieben, einer hält das neueste Bild, einer wird gerade ausgewertet), sodass
+im laufenden Betrieb kein Speicher für neue Bilder angelegt wird.
+"""
+
+import logging
+import threading
+import cv2
+
+logger = logging.getLogger(__name__)
+
+
+# Aufnahmeprofile: Auflösung (breite, hoehe), Bildrate und Pixelformat (FourCC)
+PROFILE = {
+    "treiber": {},
+    # MJPG hält die USB-Bandbreite klein; 640x480 reicht für Codes in Armlänge
+    "qr": {"aufloesung": (640, 480), "fps": 15, "fourcc": "MJPG"},
+    # Graubild direkt von der Kamera, sofern sie GREY/Y800 unterstützt
+    "grau": {"aufloesung": (640, 480), "fps": 15, "fourcc": "GREY"},
+}
+GRAU_FORMATE = ("GREY", "Y800")
+
+
+def profil_eigenschaften(aufloesung=None, fps=0, fourcc=""):
+    """
+    Übersetzt ein Aufnahmeprofil in Kamera-Eigenschaften.
+
+    Args:
+        aufloesung (tuple, optional): (breite, hoehe) in Pixeln.
+        fps (float): Bildrate, 0 = Einstellung des Treibers.
+        fourcc (str): Pixelformat, z.B. "MJPG" oder "GREY", leer = Einstellung des Treibers.
+
+    Returns:
+        dict: cv2.CAP_PROP_* -> Wert, in der Reihenfolge, in der V4L2 sie erwartet.
+    """
+    eigenschaften = {}
+    if fourcc:
+        # Ob ein Graubild ohne Umweg über BGR übernommen wird, entscheidet KameraLeser,
+        # sobald feststeht, welches Format die Kamera tatsächlich liefert
+        eigenschaften[cv2.CAP_PROP_FOURCC] = cv2.VideoWriter_fourcc(*fourcc.ljust(4)[:4])
+    if aufloesung:
+        eigenschaften[cv2.CAP_PROP_FRAME_WIDTH], eigenschaften[cv2.CAP_PROP_FRAME_HEIGHT] = aufloesung
+    if fps > 0:
+        eigenschaften[cv2.CAP_PROP_FPS] = fps
+    return eigenschaften
+
+
+def fourcc_text(wert):
+    """
+    Args:
+        wert (float): Wert von cv2.CAP_PROP_FOURCC.
+
+    Returns:
+        str: Das Pixelformat als Text, z.B. "MJPG".
+    """
+    return int(wert).to_bytes(4, "little").decode("ascii", "replace")
+
+
+def aufloesung_parse(wert):
+    """
+    Liest eine Auflösung aus der Konfiguration ("breitexhoehe", z.B. "640x480").
+
+    Args:
+        wert (str): Der Konfigurationswert, leer für keine Vorgabe.
+
+    Returns:
+        tuple or None: (breite, hoehe) oder None.
+    """
+    if not wert:
+        return None
+    try:
+        breite, hoehe = (int(teil) for teil in wert.lower().split("x"))
+    except ValueError:
+        logger.error("Ungültige Auflösung '%s', erwartet z.B. '640x480'.", wert)
+        return None
+    return breite, hoehe
+
+
+class KameraLeser:  # pylint: disable=too-many-instance-attributes
+    """Liest eine cv2.VideoCapture in einem eigenen Thread aus."""
+
+    def __init__(self, cap_video, puffer_groesse=1, profil=None):
+        """
+        Args:
+            cap_video (cv2.VideoCapture): Die geöffnete Kamera.
+            puffer_groesse (int): Anzahl der Bilder im Treiberpuffer (CAP_PROP_BUFFERSIZE, V4L2).
+                                  0 lässt die Einstellung des Treibers unverändert.
+            profil (dict, optional): Kamera-Eigenschaften (siehe `profil_eigenschaften`).
+        """
+        self.cap_video = cap_video
+        self._puffer = [None, None, None]
+        self._neuestes = None   # Index des neuesten Bildes
+        self._in_arbeit = None  # Index des zuletzt abgeholten Bildes
+        self._nummer = 0        # fortlaufende Nummer des zuletzt gelesenen Bildes
+        self._abgeholt = 0      # Nummer des zuletzt abgeholten Bildes
+        self._verworfen = 0
+        self._beendet = False
+        self._profil = None     # angeforderte Eigenschaften, übernommen im Lese-Thread
+        self._original = {}     # Werte der Eigenschaften vor der ersten Änderung
+        self._bedingung = threading.Condition()
+        self._thread = threading.Thread(target=self._lesen, name="kamera", daemon=True)
+
+        if puffer_groesse > 0 and not cap_video.set(cv2.CAP_PROP_BUFFERSIZE, puffer_groesse):
+            logger.debug("Kamera unterstützt CAP_PROP_BUFFERSIZE nicht.")
+        if profil:
+            self._eigenschaften_setzen(profil)
+            logger.info("Kamera: %dx%d, %.0f fps, %s",
+                        cap_video.get(cv2.CAP_PROP_FRAME_WIDTH), cap_video.get(cv2.CAP_PROP_FRAME_HEIGHT),
+                        cap_video.get(cv2.CAP_PROP_FPS), fourcc_text(cap_video.get(cv2.CAP_PROP_FOURCC)))
+
+    def starten(self):
+        """Startet den Lese-Thread."""
+        self._thread.start()
+
+    def stoppen(self):
+        """Beendet den Lese-Thread (die Kamera selbst bleibt geöffnet)."""
+        with self._bedingung:
+            self._beendet = True
+            self._bedingung.notify_all()
+        self._thread.join(timeout=2)
+
+    def profil_setzen(self, eigenschaften=None):
+        """
+        Ändert Eigenschaften der Kamera, z.B. Bildrate und Auflösung im Leerlauf.
+
+        Die Änderung übernimmt der Lese-Thread vor dem nächsten Bild, weil
+        cv2.VideoCapture nicht threadsicher ist.
+
+        Args:
+            eigenschaften (dict, optional): cv2.CAP_PROP_* -> Wert. Ohne Angabe werden die
+                                            ursprünglichen Werte wiederhergestellt.
+        """
+        with self._bedingung:
+            self._profil = dict(eigenschaften or {})
+
+    def _profil_uebernehmen(self):
+        with self._bedingung:
+            eigenschaften, self._profil = self._profil, None
+        if eigenschaften is None:
+            return
+        if eigenschaften:
+            for eigenschaft in eigenschaften:
+                self._original.setdefault(eigenschaft, self.cap_video.get(eigenschaft))
+        else:
+            eigenschaften, self._original = self._original, {}
+        self._eigenschaften_setzen(eigenschaften)
+
+    def _eigenschaften_setzen(self, eigenschaften):
+        for eigenschaft, wert in eigenschaften.items():
+            if not self.cap_video.set(eigenschaft, wert):
+                logger.debug("Kamera unterstützt Eigenschaft %s nicht.", eigenschaft)
+        if cv2.CAP_PROP_FOURCC in eigenschaften:
+            self._konvertierung_setzen(fourcc_text(eigenschaften[cv2.CAP_PROP_FOURCC]))
+
+    def _konvertierung_setzen(self, angefordert):
+        """
+        Übernimmt ein Graubild ohne Umweg über BGR, aber nur, wenn die Kamera das
+        Format GREY/Y800 tatsächlich angenommen hat. Sonst lieferte OpenCV ohne
+        Konvertierung rohe YUYV- oder MJPG-Daten.
+        """
+        geliefert = fourcc_text(self.cap_video.get(cv2.CAP_PROP_FOURCC))
+        grau = geliefert.upper() in GRAU_FORMATE
+        if angefordert.upper() in GRAU_FORMATE and not grau:
+            logger.warning("Kamera liefert %s statt %s, Bilder werden weiter nach BGR konvertiert.",
+                           geliefert, angefordert)
+        self.cap_video.set(cv2.CAP_PROP_CONVERT_RGB, 0 if grau else 1)
+
+    def _lesen(self):
+        while not self._beendet:
+            self._profil_uebernehmen()
+            with self._bedingung:
+                # weder das neueste noch das gerade ausgewertete Bild überschreiben
+                frei = next(i for i in range(3) if i not in (self._neuestes, self._in_arbeit))
+            ret, bild = self.cap_video.read(self._puffer[frei])
+            with self._bedingung:
+                if not ret:
+                    logger.error("Frame konnte nicht gelesen werden!")
+                    self._beendet = True
+                    self._bedingung.notify_all()
+                    break
+                if bild.ndim == 3 and bild.shape[2] == 1:
+                    bild = bild[:, :, 0]  # Graubild der Kamera (GREY) ohne Kanal-Achse
+                if self._nummer > self._abgeholt:
+                    self._verworfen += 1
+                self._puffer[frei] = bild
+                self._neuestes = frei
+                self._nummer += 1
+                self._bedingung.notify_all()
+
+    def neuestes_bild(self, timeout=None):
+        """
+        Liefert das neueste, noch nicht abgeholte Bild und wartet ggf. darauf.
+
+        Das Bild bleibt nur bis zum nächsten Aufruf gültig, danach wird sein Puffer
+        wiederverwendet.
+
+        Args:
+            timeout (float, optional): Maximale Wartezeit in Sekunden.
+
+        Returns:
+            numpy.ndarray or None: Das Bild oder None, wenn die Kamera nicht mehr liefert
+                                   oder der Timeout abgelaufen ist.
+        """
+        with self._bedingung:
+            if not self._bedingung.wait_for(lambda: self._beendet or self._nummer > self._abgeholt, timeout):
+                return None
+            if self._nummer <= self._abgeholt:
+                return None
+            self._abgeholt = self._nummer
+            self._in_arbeit = self._neuestes
+            return self._puffer[self._neuestes]
+
+    def laeuft(self):
+        """
+        Returns:
+            bool: False, sobald die Kamera keine Bilder mehr liefert oder der Thread gestoppt wurde.
+        """
+        with self._bedingung:
+            return not self._beendet
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Anzahl gelesener und ungenutzt verworfener Bilder.
+        """
+        with self._bedingung:
+            return {"gelesen": self._nummer, "verworfen": self._verworfen}
@@ -7,9 +7,12 @@ Umgebungsvariablen (.env-Datei) geladen.
 
 import base64
 import binascii
+import functools
 import logging
+import threading
 import time
 import os
+import signal
 import sys
 import requests
 from smartcard.Exceptions import NoCardException, CardConnectionException, SmartcardException, NoReadersException
@@ -17,13 +20,31 @@ from smartcard.System import readers
 from smartcard.util import toHexString
 from smartcard.CardConnection import CardConnection
 from smartcard.CardMonitoring import CardMonitor, CardObserver
+from smartcard.ReaderMonitoring import ReaderMonitor, ReaderObserver
 import sound_ausgabe
 import config
 import api_client
+import api_client_async
+import dedupe_index
+import ereignis_schleife
+import pcsc_ereignisse
+import pipeline
+import sammel_fenster
+import token_strategie
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "1"
 logger = logging.getLogger(__name__)
 
+OFFLINE_ANSAGE = "Keine Verbindung zum Server. Deine Buchung wurde gespeichert und wird nachgetragen."
+KEINE_VERBINDUNG_ANSAGE = "Keine Verbindung zum Server. Bitte versuche es später noch einmal."
+API_FEHLER_ANSAGE = "API-Fehler, bitte informiere einen Administrator."
+# Feste Ansagen, die beim Start vorab erzeugt werden (ohne Verbindung geht das nicht mehr)
+VORAB_ANSAGEN = (OFFLINE_ANSAGE, KEINE_VERBINDUNG_ANSAGE, API_FEHLER_ANSAGE,
+                 "Ungültiger Token gelesen.", "Ein unerwarteter Fehler ist aufgetreten.")
+
+# Unterstützte Reader (Teil des PC/SC-Namens)
+KOMPATIBLE_READER = ("ACR122U", "ACR1252")
+
 
 class NFCCardObserver(CardObserver):  # pylint: disable=too-few-public-methods
     """
@@ -31,9 +52,12 @@ class NFCCardObserver(CardObserver):  # pylint: disable=too-few-public-methods
     Reagiert auf das Auflegen und Entfernen von Token.
     """
 
-    def __init__(self, target_reader):
+    def __init__(self, target_reader, scan_pipeline=None, strategien=None, dedupe=None, sammler=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self.target_reader = target_reader
-        self.last_token_time = None
+        self.scan_pipeline = scan_pipeline
+        self.strategien = strategien
+        self.dedupe = dedupe if dedupe is not None else dedupe_index.DedupeIndex()
+        self.sammler = sammler
 
     def update(self, observable, handlers):
         (addedcards, removedcards) = handlers
@@ -49,22 +73,24 @@ class NFCCardObserver(CardObserver):  # pylint: disable=too-few-public-methods
     def _handle_removed_card(self, card):
         if card.reader == self.target_reader.name:
             logger.info("Token entfernt.")
-            self.last_token_time = None
 
     def _handle_added_card(self, card):
         if card.reader != self.target_reader.name:
             return
 
+        # Zeitpunkt der Meldung durch den Treiber (nur bei NFC_ENGINE=status bekannt)
+        aufgelegt = getattr(card, "zeitpunkt", None) or time.monotonic()
         connection = None
         try:
             connection = card.createConnection()
             # Bevorzuge T=1 Protokoll für schnellere Verbindung
             connection.connect(CardConnection.T1_protocol)
 
-            token_hex = self._determine_token_hex(connection)
+            token_hex = self._determine_token_hex(connection, getattr(card, "atr", None))
 
             if token_hex:
-                self.last_token_time = verarbeite_token(token_hex, self.last_token_time)
+                logger.debug("Token %.1f ms nach dem Auflegen gelesen.", (time.monotonic() - aufgelegt) * 1000)
+                verarbeite_token(token_hex, self.dedupe, self.scan_pipeline, self.sammler)
 
         except CardConnectionException as e:
             logger.debug("Verbindungsfehler beim Auflegen des Tokens: %s", e)
@@ -77,94 +103,176 @@ class NFCCardObserver(CardObserver):  # pylint: disable=too-few-public-methods
                 except Exception:  # pylint: disable=W0718
                     pass
 
-    def _determine_token_hex(self, connection):
+    def _determine_token_hex(self, connection, atr=None):
         """
         Ermittelt den NFC-Token-Hexwert (bevorzugt UID, oder ATS bei Zufalls-UIDs/Fallback).
+
+        Ist für Reader und ATR bekannt, dass der Token über die ATS identifiziert
+        wird (z.B. Handys), wird die ATS ohne vorherige UID-Abfrage gelesen. Sonst
+        und bei jeder Stichprobe wird die UID gelesen und die Strategie gemeldet.
+        """
+        reader = self.target_reader.name
+        apdus = 0
+        if self.strategien and self.strategien.strategie(reader, atr) == token_strategie.ATS:
+            ats_hex = lese_nfc_token_ats(connection)
+            apdus += 1
+            if ats_hex:
+                self.strategien.scan_gezaehlt(apdus)
+                return ats_hex
+
+        token_hex, strategie, gesendet = self._token_identifizieren(connection)
+        if self.strategien:
+            if token_hex:
+                self.strategien.beobachtet(reader, atr, strategie)
+            self.strategien.scan_gezaehlt(apdus + gesendet)
+        return token_hex
+
+    @staticmethod
+    def _token_identifizieren(connection):
+        """
+        Returns:
+            tuple: (Token-Hexwert oder None, verwendete Strategie, Anzahl gesendeter APDUs)
         """
         # 1. Zuerst UID prüfen (Schnelle Abfrage für reguläre Karten)
         uid_hex = lese_nfc_token_uid(connection)
         if not uid_hex:
             # Fallback falls UID nicht lesbar war, aber ATS existiert
-            return lese_nfc_token_ats(connection)
+            return lese_nfc_token_ats(connection), token_strategie.ATS, 2
 
         uid_clean = uid_hex.replace(" ", "")
         # Wenn die UID mit "08" beginnt (Zufalls-UID z.B. bei Handys),
         # versuchen wir die stabilere ATS auszulesen
         if uid_clean.startswith("08"):
             ats_hex = lese_nfc_token_ats(connection)
-            return ats_hex if ats_hex else uid_hex
-        return uid_hex
-
-
-def person_transaktion_erstellen(token_hex: str) -> bool:
+            if ats_hex:
+                return ats_hex, token_strategie.ATS, 2
+            return uid_hex, token_strategie.UID, 2
+        return uid_hex, token_strategie.UID, 1
+
+
+def _ohne_antwort_ansagen() -> list:
+    """Feedback, wenn die API keine Antwort geliefert hat (nicht erreichbar oder Fehler)."""
+    if not api_client.api_erreichbar():
+        return [("error", KEINE_VERBINDUNG_ANSAGE)]
+    return [("error", API_FEHLER_ANSAGE)]
+
+
+def _antwort_ansagen(antwort_json: dict) -> list:
+    """Feedback für eine erfolgreiche Antwort (2xx) der API."""
+    nachricht = antwort_json.get('message', 'Aktion erfolgreich.')
+    if antwort_json.get('action') == 'block':
+        return [("blocked", nachricht)]
+    if int(antwort_json.get('saldo')) == 0:
+        return [("zero_balance", nachricht), ("transaction_end", None)]
+    return [("success", nachricht), ("transaction_end", None)]
+
+
+def _fehler_ansagen(response, token_hex_sauber: str, fehler: Exception) -> list:
+    """Feedback für eine abgelehnte oder fehlgeschlagene API-Anfrage."""
+    if response is not None and response.status_code == 404:
+        fehler_nachricht = response.json().get('error', 'Dieser Token wurde noch nicht registriert. Die Administratoren wurden per E-Mail informiert.')
+        logger.warning("Token %s nicht registriert (404): %s", token_hex_sauber, fehler_nachricht)
+        return [("error", fehler_nachricht)]
+    if response is not None and response.status_code == 403:
+        fehler_nachricht = response.json().get('error', 'Benutzer gesperrt.')
+        logger.warning("Benutzer ist gesperrt (403): %s", fehler_nachricht)
+        return [("locked", fehler_nachricht)]
+    logger.error("Fehler bei der API-Anfrage: %s", fehler)
+    return [("error", API_FEHLER_ANSAGE)]
+
+
+def transaktion_ausfuehren(token_hex: str, anzahl: int = 1) -> tuple[bool, list]:
     """
-    Verarbeitet eine NFC-Token-Transaktion durch Senden der UID an eine API.
+    Sendet die Transaktion für einen NFC-Token an die API und ermittelt das Feedback.
 
-    Diese Funktion nimmt die Hex-UID eines NFC-Tokens entgegen, konvertiert sie,
-    sendet sie an einen API-Endpunkt und verarbeitet die Antwort. Sie gibt
-    akustisches Feedback basierend auf dem Ergebnis.
+    Die Ansagen werden nicht abgespielt, sondern zurückgegeben, damit sie in der
+    Pipeline von einem eigenen Worker ausgegeben werden können.
 
     Args:
         token_hex: Die eindeutige ID (UID) des erkannten NFC-Tokens
                    als Hex-String.
+        anzahl: Anzahl der gebuchten Artikel (mehrere Scans im Sammelfenster).
 
     Returns:
-        True, wenn die API-Transaktion erfolgreich war (Status 2xx),
-        andernfalls False bei jeglicher Art von Fehler.
+        tuple: (True, wenn die API-Transaktion erfolgreich war (Status 2xx),
+                Liste von (Sound, Text) für sound_ausgabe.ansagen_abspielen)
     """
-    erfolgreich = False
     response = None
+    token_hex_sauber = token_hex.replace(" ", "")
 
     try:
         # 1. Token vorbereiten und validieren
-        token_hex_sauber = token_hex.replace(" ", "")
         token_bytes = binascii.unhexlify(token_hex_sauber)
         token_base64 = base64.b64encode(token_bytes).decode('utf-8')
 
         # 2. API-Anfrage senden und auf HTTP-Fehler prüfen
-        logger.info("Sende NFC-Token %s an die API...", token_hex_sauber)
-        response = api_client.nfc_transaktion_erstellen(token_base64, config.MY_NAME)
+        logger.info("Sende NFC-Token %s (Anzahl %d) an die API...", token_hex_sauber, anzahl)
+        with api_client.scan_budget():
+            response, vorgemerkt = api_client.transaktion_buchen("nfc", token_base64, config.MY_NAME, anzahl)
+        if vorgemerkt:
+            return True, [("success", OFFLINE_ANSAGE)]
         if response is None:
-            sound_ausgabe.sprich_text("error", "API-Fehler, bitte informiere einen Administrator.", sprache="de")
-            return False
+            return False, _ohne_antwort_ansagen()
         response.raise_for_status()  # Löst bei 4xx/5xx eine Exception aus
 
         # 3. Erfolgreiche Antwort (2xx) verarbeiten
-        antwort_json = response.json()
-        nachricht = antwort_json.get('message', 'Aktion erfolgreich.')
-
-        if antwort_json.get('action') == 'block':
-            sound_ausgabe.sprich_text("blocked", nachricht, sprache="de")
-        else:
-            if int(antwort_json.get('saldo')) == 0:
-                sound_ausgabe.sprich_text("zero_balance", nachricht, sprache="de")
-            else:
-                sound_ausgabe.sprich_text("success", nachricht, sprache="de")
-            sound_ausgabe.play_sound_effect("transaction_end")
-        erfolgreich = True
+        return True, _antwort_ansagen(response.json())
 
     except requests.exceptions.RequestException as e:
         # Gezielte Fehlerbehandlung für HTTP-Statuscodes
-        if response is not None and response.status_code == 404:
-            fehler_nachricht = response.json().get('error', 'Dieser Token wurde noch nicht registriert. Die Administratoren wurden per E-Mail informiert.')
-            logger.warning("Token %s nicht registriert (404): %s", token_hex_sauber, fehler_nachricht)
-            sound_ausgabe.sprich_text("error", fehler_nachricht, sprache="de")
-        elif response is not None and response.status_code == 403:
-            fehler_nachricht = response.json().get('error', 'Benutzer gesperrt.')
-            logger.warning("Benutzer ist gesperrt (403): %s", fehler_nachricht)
-            sound_ausgabe.sprich_text("locked", fehler_nachricht, sprache="de")
-        else:
-            logger.error("Fehler bei der API-Anfrage: %s", e)
-            sound_ausgabe.sprich_text("error", "API-Fehler, bitte informiere einen Administrator.", sprache="de")
+        return False, _fehler_ansagen(response, token_hex_sauber, e)
 
     except binascii.Error:
         logger.error("Fehler: Ungültiger Hexadezimalstring: %s", token_hex_sauber)
-        sound_ausgabe.sprich_text("error", "Ungültiger Token gelesen.", sprache="de")
+        return False, [("error", "Ungültiger Token gelesen.")]
 
     except Exception as e:  # pylint: disable=W0718
         logger.error("Allgemeiner Fehler: %s", e, exc_info=True)
-        sound_ausgabe.sprich_text("error", "Ein unerwarteter Fehler ist aufgetreten.", sprache="de")
+        return False, [("error", "Ein unerwarteter Fehler ist aufgetreten.")]
 
+
+def transaktion_feedback(auftrag, bei_fehler=None) -> list:
+    """
+    API-Stufe der Pipeline: führt die Transaktion aus und liefert nur das Feedback.
+
+    Args:
+        auftrag: Die UID bzw. ATS des Tokens als Hex-String oder (Hex-String, Anzahl)
+                 aus dem Sammelfenster.
+        bei_fehler (callable, optional): Wird nach einer fehlgeschlagenen Transaktion mit dem
+                                         Token aufgerufen, damit er sofort erneut gescannt werden kann.
+
+    Returns:
+        list: Liste von (Sound, Text) für sound_ausgabe.ansagen_abspielen.
+    """
+    token_hex, anzahl = sammel_fenster.aufteilen(auftrag)
+    erfolgreich, ansagen = transaktion_ausfuehren(token_hex, anzahl)
+    if not erfolgreich and bei_fehler is not None:
+        # Wie im synchronen Betrieb darf derselbe Token nach einem Fehler sofort erneut versucht werden
+        bei_fehler(token_hex)
+    return ansagen
+
+
+def person_transaktion_erstellen(token_hex: str, anzahl: int = 1, vorher=None) -> bool:
+    """
+    Verarbeitet eine NFC-Token-Transaktion durch Senden der UID an eine API.
+
+    Diese Funktion nimmt die Hex-UID eines NFC-Tokens entgegen, konvertiert sie,
+    sendet sie an einen API-Endpunkt und verarbeitet die Antwort. Sie gibt
+    akustisches Feedback basierend auf dem Ergebnis.
+
+    Args:
+        token_hex: Die eindeutige ID (UID) des erkannten NFC-Tokens
+                   als Hex-String.
+        anzahl: Anzahl der gebuchten Artikel (mehrere Scans im Sammelfenster).
+        vorher: Laufende Wiedergabe (audio_engine.Wiedergabe, z.B. der Piepton), deren
+                Ende vor dem Feedback abgewartet wird.
+
+    Returns:
+        True, wenn die API-Transaktion erfolgreich war (Status 2xx),
+        andernfalls False bei jeglicher Art von Fehler.
+    """
+    erfolgreich, ansagen = transaktion_ausfuehren(token_hex, anzahl)
+    sound_ausgabe.ansagen_abspielen(ansagen, vorher)
     return erfolgreich
 
 
@@ -214,29 +322,71 @@ def lese_nfc_token_ats(connection):
         return None
 
 
-def verarbeite_token(token_hex, last_token_time):
+def verarbeite_token(token_hex, dedupe, scan_pipeline=None, sammler=None):
     """
     Verarbeitet den gelesenen Token.
 
+    Derselbe Token wird danach TOKEN_DELAY Sekunden ignoriert, andere Token
+    werden sofort verarbeitet.
+
     Args:
         token_hex: Daten des Tokens (UID oder ATS)
-        last_token_time:  Zeitpunkt der letzten erfolgreichen Verarbeitung des Tokens.
+        dedupe (dedupe_index.DedupeIndex): Die zuletzt verarbeiteten Token (gemeinsam für alle Reader).
+        scan_pipeline (pipeline.ScanPipeline, optional): Wenn gesetzt, wird der Token nur
+                      eingereiht und API-Aufruf sowie Ansage laufen im Hintergrund.
+        sammler (sammel_fenster.SammelFenster, optional): Wenn gesetzt, wird der Scan nur
+                 gezählt und nach Ablauf des Fensters gemeinsam mit weiteren Scans gebucht.
 
     Returns:
-        float: Aktualisierte letzte Verarbeitungszeit oder None.
+        bool: True, wenn der Token verarbeitet bzw. eingereiht wurde.
+    """
+
+    if not dedupe.neu(token_hex, config.TOKEN_DELAY):
+        logger.info("Token %s wurde kürzlich verarbeitet. Ignoriere.", token_hex)
+        return False
+    if sammler is not None:
+        sound_ausgabe.play_sound_effect("scan", warten=False)
+        anzahl = sammler.scan(token_hex)
+        logger.info("Token %s: %d. Scan im Sammelfenster.", token_hex, anzahl)
+        return True
+    if scan_pipeline is not None:
+        if scan_pipeline.einreichen(token_hex):
+            sound_ausgabe.play_sound_effect("scan", warten=False)
+            return True
+        sound_ausgabe.play_sound_effect("error", warten=False)
+        dedupe.vergessen(token_hex)
+        return False
+    # Die Buchung wird schon gesendet, während der Piepton noch läuft
+    piepton = sound_ausgabe.starte_sound_effect("scan")
+    if not person_transaktion_erstellen(token_hex, vorher=piepton):
+        # Nach einem Fehler darf derselbe Token sofort erneut versucht werden
+        dedupe.vergessen(token_hex)
+        return False
+    return True
+
+
+def erstelle_sammler(scan_pipeline=None):
     """
+    Erstellt das Sammelfenster laut config.SCAN_COALESCE_WINDOW.
 
-    jetzt = time.time()
+    Args:
+        scan_pipeline (pipeline.ScanPipeline, optional): Erhält die gesammelten Scans als
+                      (Token, Anzahl); ohne Pipeline wird direkt gebucht und angesagt.
 
-    if last_token_time is None or jetzt - last_token_time >= config.TOKEN_DELAY:
-        # beep sound wenn Token gescannt wurde
-        sound_ausgabe.play_sound_effect("scan")
-        transaktion_erfolgreich = person_transaktion_erstellen(token_hex)
-        if transaktion_erfolgreich:
-            return jetzt  # Aktualisiere den Zeitstempel
+    Returns:
+        sammel_fenster.SammelFenster or None: Das Sammelfenster oder None, wenn es deaktiviert ist.
+    """
+    if config.SCAN_COALESCE_WINDOW <= 0:
         return None
-    logger.info("Token %s wurde kürzlich verarbeitet. Ignoriere.", token_hex)
-    return last_token_time
+
+    def abschliessen(token_hex, anzahl):
+        if scan_pipeline is None:
+            person_transaktion_erstellen(token_hex, anzahl)
+        elif not scan_pipeline.einreichen((token_hex, anzahl)):
+            logger.error("Pipeline voll, %d Scan(s) von Token %s wurden nicht gebucht.", anzahl, token_hex)
+            sound_ausgabe.play_sound_effect("error", warten=False)
+
+    return sammel_fenster.SammelFenster(config.SCAN_COALESCE_WINDOW, abschliessen, "nfc")
 
 
 def schalte_buzzer_ab(nfc_reader):
@@ -284,64 +434,182 @@ def schalte_buzzer_ab(nfc_reader):
                 pass  # Fehler beim Trennen sind nicht kritisch
 
 
-def lies_nfc_kontinuierlich(nfc_reader):
+def ist_kompatibel(reader):
     """
-    Startet eine kontinuierliche, eventbasierte NFC-Lesung.
-
     Args:
-        nfc_reader (smartcard.pcsc.PCSCReader): Das Reader-Objekt, das für die NFC-Kommunikation verwendet wird.
+        reader: Ein PC/SC-Reader.
+
+    Returns:
+        bool: True für die NFC-Schnittstelle eines unterstützten Readers (nicht dessen SAM-Slot).
+    """
+    name = str(reader)
+    return any(modell in name for modell in KOMPATIBLE_READER) and "SAM" not in name
+
+
+class ReaderVerwaltung(ReaderObserver):
+    """
+    Überwacht alle kompatiblen Reader, auch wenn sie im laufenden Betrieb an- oder abgesteckt werden.
+
+    Jeder Reader erhält einen eigenen NFCCardObserver; Pipeline, API-Client,
+    Audio, Token-Strategien, die zuletzt verarbeiteten Token und das Sammelfenster
+    teilen sich alle Reader im selben Prozess.
+    """
+
+    def __init__(self, scan_pipeline=None, strategien=None, dedupe=None, sammler=None):
+        super().__init__()
+        self.scan_pipeline = scan_pipeline
+        self.strategien = strategien
+        self.dedupe = dedupe if dedupe is not None else dedupe_index.DedupeIndex()
+        self.sammler = sammler
+        self._card_monitor = CardMonitor() if config.NFC_ENGINE != "status" else None
+        self._reader = {}  # Name -> (NFCCardObserver, StatusLeser oder None)
+        self._lock = threading.Lock()
+
+    def update(self, _observable, handlers):
+        """
+        Wird vom ReaderMonitor bei angesteckten und abgezogenen Readern aufgerufen.
+
+        Args:
+            _observable: Der ReaderMonitor (nicht verwendet).
+            handlers (tuple): (hinzugefügte Reader, entfernte Reader)
+        """
+        (added_readers, removed_readers) = handlers
+        for reader in removed_readers:
+            self._entfernen(reader)
+        for reader in added_readers:
+            self._hinzufuegen(reader)
+
+    def _hinzufuegen(self, reader):
+        if not ist_kompatibel(reader):
+            return
+        with self._lock:
+            if reader.name in self._reader:
+                return
+            logger.info("Reader angeschlossen: %s", reader)
+            if config.DISABLE_BUZZER:
+                logger.info("Deaktiviere Buzzer...")
+                schalte_buzzer_ab(reader)
+            observer = NFCCardObserver(reader, self.scan_pipeline, self.strategien, self.dedupe, self.sammler)
+            status_leser = None
+            if self._card_monitor is None:
+                # Eigene Ereignisschleife mit SCardGetStatusChange
+                status_leser = pcsc_ereignisse.StatusLeser(reader, observer, config.NFC_STATUS_TIMEOUT)
+                status_leser.starten()
+            else:
+                self._card_monitor.addObserver(observer)
+            self._reader[reader.name] = (observer, status_leser)
+
+    def _entfernen(self, reader):
+        with self._lock:
+            eintrag = self._reader.pop(reader.name, None)
+        if eintrag is None:
+            return
+        logger.info("Reader entfernt: %s", reader)
+        self._beenden(*eintrag)
+
+    def _beenden(self, observer, status_leser):
+        if status_leser is not None:
+            status_leser.stoppen()
+            logger.info("PC/SC %s: %s", observer.target_reader, status_leser.statistik())
+        else:
+            self._card_monitor.deleteObserver(observer)
+
+    def anzahl(self):
+        """
+        Returns:
+            int: Anzahl der überwachten Reader.
+        """
+        with self._lock:
+            return len(self._reader)
+
+    def stoppen(self):
+        """Beendet die Überwachung aller Reader."""
+        with self._lock:
+            eintraege, self._reader = list(self._reader.values()), {}
+        for eintrag in eintraege:
+            self._beenden(*eintrag)
+
+
+def beenden_bei_sigterm(signum, frame):  # pylint: disable=unused-argument
     """
+    Behandelt SIGTERM (systemctl stop) wie Strg+C, damit die finally-Blöcke offene Scans
+    im Sammelfenster noch buchen. Ein weiteres SIGTERM unterbricht das Aufräumen nicht.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
 
-    logger.info("Starte kontinuierliche NFC-Lesung auf Reader: %s", nfc_reader)
 
-    # Observer und Monitor initialisieren und registrieren
-    observer = NFCCardObserver(nfc_reader)
-    monitor = CardMonitor()
-    monitor.addObserver(observer)
+def lies_nfc_kontinuierlich():
+    """
+    Startet eine kontinuierliche, eventbasierte NFC-Lesung auf allen kompatiblen Readern.
+    """
+
+    logger.info("Starte kontinuierliche NFC-Lesung.")
+
+    dedupe = dedupe_index.DedupeIndex()
+    # Scans werden in der Pipeline verarbeitet, damit der Monitor-Thread nicht auf Ansagen wartet
+    scan_pipeline = None
+    if config.PIPELINE_ENABLED:
+        scan_pipeline = pipeline.ScanPipeline("nfc", functools.partial(transaktion_feedback, bei_fehler=dedupe.vergessen),
+                                              sound_ausgabe.ansagen_abspielen,
+                                              config.PIPELINE_QUEUE_SIZE, config.PIPELINE_TIMEOUT)
+
+    strategien = token_strategie.StrategieCache(config.NFC_STRATEGY_CONFIRMATIONS,
+                                                pruefintervall=config.NFC_STRATEGY_RECHECK)
+    # Mehrere Scans desselben Tokens kurz hintereinander werden eine Buchung mit Anzahl
+    sammler = erstelle_sammler(scan_pipeline)
+    verwaltung = ReaderVerwaltung(scan_pipeline, strategien, dedupe, sammler)
+    # Meldet die vorhandenen Reader sofort und danach jedes An- und Abstecken
+    reader_monitor = ReaderMonitor()
+    reader_monitor.addObserver(verwaltung)
 
     try:
-        # Halteschleife, um den Hauptthread am Leben zu erhalten
-        while True:
-            time.sleep(1)
+        # Der Hauptthread wartet nur noch auf Strg+C bzw. SIGTERM
+        threading.Event().wait()
     except KeyboardInterrupt:
-        logger.info("NFC-Leser wird durch Benutzer beendet.")
+        logger.info("NFC-Leser wird beendet.")
     finally:
-        monitor.removeObserver(observer)
+        reader_monitor.deleteObserver(verwaltung)
+        verwaltung.stoppen()
+        if sammler is not None:
+            # Offene Scans buchen, solange die Pipeline noch läuft
+            sammler.stoppen()
+            logger.info("Sammelfenster: %s", sammler.statistik())
+        if scan_pipeline is not None:
+            scan_pipeline.stoppen()
+        logger.info("Token-Strategien: %s", strategien.statistik())
+        logger.info("Doppelte Scans: %s", verwaltung.dedupe.statistik())
         logger.info("NFC-Leser beendet.")
 
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, beenden_bei_sigterm)
     config.validate_config()
+    sound_ausgabe.initialisieren()
+    journal_replay = None  # pylint: disable=C0103
+    health_monitor = None  # pylint: disable=C0103
 
     try:
-        if api_client.healthcheck() is None:
+        # Healthcheck und Version gleichzeitig abfragen
+        health_status, version, _ = ereignis_schleife.SCHLEIFE.ausfuehren(api_client_async.startdaten_lesen())
+        if health_status is None:
             logger.critical("Healthcheck fehlgeschlagen. Beende Skript.")
             sys.exit(1)
         logger.info("API Healthcheck erfolgreich.")
 
         reader_list = readers()
-        if not reader_list:
-            logger.critical("Keine PC/SC-Reader gefunden.")
-            sys.exit()
         logger.info("Verfügbare Reader: %s", reader_list)
+        if not any(ist_kompatibel(reader) for reader in reader_list):
+            logger.warning("Kein kompatibler Reader gefunden, warte auf einen Reader.")
 
-        version = api_client.get_api_version()
         logger.info("Bereitschaft (Version %s).", version)
+        sound_ausgabe.fragmente_vorrendern()
+        sound_ausgabe.ansagen_vorrendern(VORAB_ANSAGEN)
+        journal_replay = api_client.journal_replay_starten()
+        health_monitor = api_client.health_monitor_starten()
 
-        acr_reader = None  # pylint: disable=C0103
-        for reader in reader_list:
-            if "ACR122U" in str(reader) or "ACR1252" in str(reader):
-                acr_reader = reader
-                break
-
-        if acr_reader:
-            if config.DISABLE_BUZZER:
-                logger.info("Deaktiviere Buzzer...")
-                schalte_buzzer_ab(acr_reader)
-            # Starte Leseschleife
-            lies_nfc_kontinuierlich(acr_reader)
-        else:
-            logger.critical("Kein kompatibler Reader gefunden.")
+        # Starte Leseschleife
+        lies_nfc_kontinuierlich()
 
     except NoReadersException as e:
         logger.critical("Fehler: %s", e)
@@ -356,4 +624,9 @@ if __name__ == "__main__":
         logger.critical("Ein unerwarteter Fehler im Hauptteil ist aufgetreten: %s", e)
         sys.exit(1)
     finally:
+        if journal_replay is not None:
+            journal_replay.stoppen()
+        if health_monitor is not None:
+            health_monitor.stoppen()
+        api_client.verbindungen_schliessen()
         logger.info("Programm beendet.")
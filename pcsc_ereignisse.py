@@ -0,0 +1,133 @@
+"""
+Direkte PC/SC-Ereignisschleife für einen NFC-Reader.
+
+Der CardMonitor von pyscard wartet mit fest eingestellter Wartezeit und liest
+bei jedem Durchlauf die Reader-Liste neu. `StatusLeser` wartet stattdessen
+selbst mit SCardGetStatusChange auf Änderungen an genau einem Reader. Die
+Wartezeit ist einstellbar, ein laufendes Warten wird beim Beenden mit
+SCardCancel sofort abgebrochen, und jede aufgelegte Karte trägt den Zeitpunkt,
+zu dem der Treiber sie gemeldet hat. Gemeldet wird an einen CardObserver
+(z.B. nfc_reader.NFCCardObserver), wie beim CardMonitor.
+"""
+
+import logging
+import threading
+import time
+from smartcard.scard import (SCARD_E_CANCELLED, SCARD_E_TIMEOUT, SCARD_S_SUCCESS, SCARD_SCOPE_USER,
+                             SCARD_STATE_CHANGED, SCARD_STATE_MUTE, SCARD_STATE_PRESENT, SCARD_STATE_UNAWARE,
+                             SCardCancel, SCardEstablishContext, SCardGetErrorMessage, SCardGetStatusChange,
+                             SCardReleaseContext)
+
+logger = logging.getLogger(__name__)
+
+# Wartezeit nach einem Fehler des PC/SC-Dienstes, bevor erneut gewartet wird
+FEHLER_PAUSE = 1.0
+
+
+class AufgelegteKarte:  # pylint: disable=too-few-public-methods
+    """Eine aufgelegte Karte mit der Schnittstelle von smartcard.Card.Card."""
+
+    def __init__(self, reader, atr, zeitpunkt):
+        """
+        Args:
+            reader (smartcard.pcsc.PCSCReader): Der Reader.
+            atr (list[int]): Der ATR der Karte.
+            zeitpunkt (float): time.monotonic() bei der Meldung durch den Treiber.
+        """
+        self.reader = reader.name
+        self.atr = atr
+        self.zeitpunkt = zeitpunkt
+        self._reader = reader
+
+    def createConnection(self):  # pylint: disable=invalid-name
+        """Wie smartcard.Card.Card.createConnection, ohne die Reader-Liste neu zu lesen."""
+        return self._reader.createConnection()
+
+
+class StatusLeser:  # pylint: disable=too-many-instance-attributes
+    """Wartet in einem eigenen Thread mit SCardGetStatusChange auf Karten eines Readers."""
+
+    def __init__(self, reader, observer, timeout=1.0):
+        """
+        Args:
+            reader (smartcard.pcsc.PCSCReader): Der zu überwachende Reader.
+            observer (smartcard.CardMonitoring.CardObserver): Erhält update(self, (aufgelegt, entfernt)).
+            timeout (float): Maximale Dauer eines einzelnen Wartens in Sekunden.
+        """
+        self.reader = reader
+        self.observer = observer
+        self.timeout = timeout
+        self._kontext = None
+        self._beendet = threading.Event()
+        self._karte = None
+        self._ereignisse = 0
+        self._fehler = 0
+        self._thread = threading.Thread(target=self._lauf, name=f"pcsc-{reader.name}", daemon=True)
+
+    def starten(self):
+        """
+        Öffnet den PC/SC-Kontext und startet den Thread.
+
+        Raises:
+            RuntimeError: Wenn der PC/SC-Dienst nicht erreichbar ist.
+        """
+        hresult, self._kontext = SCardEstablishContext(SCARD_SCOPE_USER)
+        if hresult != SCARD_S_SUCCESS:
+            raise RuntimeError(f"PC/SC-Kontext konnte nicht geöffnet werden: {SCardGetErrorMessage(hresult)}")
+        self._thread.start()
+
+    def stoppen(self):
+        """Bricht das laufende Warten ab und beendet den Thread."""
+        self._beendet.set()
+        if self._kontext is None:
+            return
+        SCardCancel(self._kontext)
+        self._thread.join(timeout=self.timeout + 1)
+        SCardReleaseContext(self._kontext)
+        self._kontext = None
+
+    def warten(self):
+        """Blockiert, bis der Thread beendet ist (unterbrechbar mit Strg+C)."""
+        while self._thread.is_alive():
+            self._thread.join(timeout=self.timeout)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Anzahl gemeldeter Ereignisse und Fehler des PC/SC-Dienstes.
+        """
+        return {"ereignisse": self._ereignisse, "fehler": self._fehler}
+
+    def _lauf(self):
+        zustand = SCARD_STATE_UNAWARE
+        while not self._beendet.is_set():
+            hresult, neue_zustaende = SCardGetStatusChange(
+                self._kontext, int(self.timeout * 1000), [(self.reader.name, zustand)])
+            jetzt = time.monotonic()
+            if hresult == SCARD_E_TIMEOUT:
+                continue
+            if hresult == SCARD_E_CANCELLED:
+                break
+            if hresult != SCARD_S_SUCCESS:
+                self._fehler += 1
+                logger.error("PC/SC-Fehler auf %s: %s", self.reader.name, SCardGetErrorMessage(hresult))
+                zustand = SCARD_STATE_UNAWARE
+                self._beendet.wait(FEHLER_PAUSE)
+                continue
+
+            _, ereignis, atr = neue_zustaende[0]
+            zustand = ereignis & ~SCARD_STATE_CHANGED
+            if ereignis & SCARD_STATE_PRESENT and not ereignis & SCARD_STATE_MUTE:
+                if self._karte is None:
+                    self._karte = AufgelegteKarte(self.reader, atr, jetzt)
+                    self._melden([self._karte], [])
+            elif self._karte is not None:
+                karte, self._karte = self._karte, None
+                self._melden([], [karte])
+
+    def _melden(self, aufgelegt, entfernt):
+        self._ereignisse += 1
+        try:
+            self.observer.update(self, (aufgelegt, entfernt))
+        except Exception as e:  # pylint: disable=W0718
+            logger.error("Fehler im Observer: %s", e)
@@ -0,0 +1,118 @@
+"""Lokaler Cache für Personendaten und Kontostände (Abfrage "k" per QR-Code)."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class PersonenCache:
+    """
+    LRU-Cache für (nachname, vorname, saldo) je Benutzercode.
+
+    Ein Eintrag gilt `ttl` Sekunden als aktuell. Danach wird er nur noch
+    ausgeliefert, wenn ausdrücklich veraltete Daten erlaubt sind (z.B. wenn die
+    API nicht erreichbar ist), und auch dann höchstens bis `max_alter`. Befüllt
+    wird der Cache bei Einzelabfragen und über den Saldo, den die API nach einer
+    Buchung zurückliefert. /saldo-alle enthält keine Benutzercodes und eignet
+    sich daher nicht zum Befüllen.
+    """
+
+    def __init__(self, max_eintraege=500, ttl=60.0, max_alter=3600.0):
+        """
+        Args:
+            max_eintraege (int): Maximale Anzahl Personen im Cache.
+            ttl (float): Sekunden, die ein Eintrag als aktuell gilt.
+            max_alter (float): Sekunden, nach denen ein Eintrag gar nicht mehr verwendet wird.
+        """
+        self.max_eintraege = max_eintraege
+        self.ttl = ttl
+        self.max_alter = max_alter
+        self._eintraege = OrderedDict()  # code -> [nachname, vorname, saldo, zeitpunkt], älteste zuerst
+        self._zaehler = {"treffer": 0, "veraltet": 0, "fehlschlaege": 0}
+        self._lock = threading.Lock()
+
+    def hole(self, code, erlaube_veraltet=False):
+        """
+        Sucht eine Person im Cache.
+
+        Args:
+            code (str): Der Benutzercode.
+            erlaube_veraltet (bool): Auch Einträge älter als die TTL liefern (bis max_alter).
+
+        Returns:
+            tuple or None: (nachname, vorname, saldo) oder None.
+        """
+        with self._lock:
+            eintrag = self._eintraege.get(code)
+            alter = time.monotonic() - eintrag[3] if eintrag else None
+            if eintrag is None or alter > self.max_alter:
+                if eintrag is not None:
+                    del self._eintraege[code]
+                self._zaehler["fehlschlaege"] += 1
+                return None
+            if alter > self.ttl and not erlaube_veraltet:
+                self._zaehler["fehlschlaege"] += 1
+                return None
+            self._zaehler["veraltet" if alter > self.ttl else "treffer"] += 1
+            self._eintraege.move_to_end(code)
+            return tuple(eintrag[:3])
+
+    def speichern(self, code, nachname, vorname, saldo):
+        """
+        Legt eine Person an oder ersetzt ihren Eintrag.
+
+        Args:
+            code (str): Der Benutzercode.
+            nachname (str): Nachname.
+            vorname (str): Vorname.
+            saldo: Aktueller Kontostand.
+        """
+        with self._lock:
+            self._eintraege[code] = [nachname, vorname, saldo, time.monotonic()]
+            self._eintraege.move_to_end(code)
+            while len(self._eintraege) > self.max_eintraege:
+                self._eintraege.popitem(last=False)
+
+    def saldo_aktualisieren(self, code, saldo):
+        """
+        Übernimmt einen neuen Saldo für eine bekannte Person (Write-Through nach einer Buchung).
+
+        Args:
+            code (str): Der Benutzercode.
+            saldo: Der von der API gemeldete Kontostand.
+
+        Returns:
+            bool: True, wenn die Person im Cache war.
+        """
+        with self._lock:
+            eintrag = self._eintraege.get(code)
+            if eintrag is None:
+                return False
+            eintrag[2] = saldo
+            eintrag[3] = time.monotonic()
+            self._eintraege.move_to_end(code)
+            return True
+
+    def entfernen(self, code):
+        """Entfernt eine Person aus dem Cache (z.B. wenn die API sie nicht mehr kennt)."""
+        with self._lock:
+            self._eintraege.pop(code, None)
+
+    def statistik(self):
+        """
+        Liefert Kennzahlen zum Cache.
+
+        Returns:
+            dict: Treffer, veraltete Treffer, Fehlschläge, Trefferquote und Anzahl Einträge.
+        """
+        with self._lock:
+            anfragen = sum(self._zaehler.values())
+            treffer = self._zaehler["treffer"] + self._zaehler["veraltet"]
+            return {
+                **self._zaehler,
+                "trefferquote": treffer / anfragen if anfragen else 0.0,
+                "eintraege": len(self._eintraege),
+            }
@@ -0,0 +1,156 @@
+"""
+Gestufte Verarbeitung von Scans: Eingabe -> API-Worker -> Feedback-Worker.
+
+Die Stufen sind über begrenzte Queues verbunden. Der Reader kann dadurch schon
+den nächsten Token bzw. QR-Code annehmen, während die Ansage für die vorherige
+Person noch läuft. Ist eine Queue voll, blockiert die vorgelagerte Stufe
+(Backpressure), der Reader selbst wartet höchstens eine konfigurierbare Zeit.
+"""
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class Stufe:
+    """Eine Pipeline-Stufe mit begrenzter Eingangs-Queue und eigenem Worker-Thread."""
+
+    def __init__(self, name, verarbeite, max_laenge, naechste=None):
+        """
+        Args:
+            name (str): Name der Stufe (für Logs und Kennzahlen).
+            verarbeite (callable): Funktion, die einen Auftrag verarbeitet. Ihr Rückgabewert
+                                   wird an die nächste Stufe weitergereicht (None wird verworfen).
+            max_laenge (int): Maximale Anzahl wartender Aufträge.
+            naechste (Stufe, optional): Die nachgelagerte Stufe.
+        """
+        self.name = name
+        self.verarbeite = verarbeite
+        self.naechste = naechste
+        self._zaehler = {"max_tiefe": 0, "eingereiht": 0, "verarbeitet": 0, "fehler": 0, "abgewiesen": 0}
+        self._queue = queue.Queue(maxsize=max_laenge)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._arbeiten, name=f"pipeline-{name}", daemon=True)
+        self._thread.start()
+
+    def einreihen(self, auftrag, timeout=None):
+        """
+        Reiht einen Auftrag ein.
+
+        Args:
+            auftrag: Der Auftrag für die Verarbeitungsfunktion.
+            timeout (float, optional): Maximale Wartezeit bei voller Queue in Sekunden.
+                                       None wartet unbegrenzt.
+
+        Returns:
+            bool: True, wenn der Auftrag angenommen wurde.
+        """
+        try:
+            self._queue.put(auftrag, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._zaehler["abgewiesen"] += 1
+            logger.warning("Pipeline-Stufe '%s' ist ausgelastet, Auftrag abgewiesen.", self.name)
+            return False
+        with self._lock:
+            self._zaehler["eingereiht"] += 1
+            self._zaehler["max_tiefe"] = max(self._zaehler["max_tiefe"], self._queue.qsize())
+        return True
+
+    def _arbeiten(self):
+        while True:
+            auftrag = self._queue.get()
+            if auftrag is _STOP:
+                break
+            try:
+                ergebnis = self.verarbeite(auftrag)
+                if self.naechste is not None and ergebnis is not None:
+                    # Blockiert bei voller Folgestufe und bremst damit diese Stufe (Backpressure)
+                    self.naechste.einreihen(ergebnis)
+                with self._lock:
+                    self._zaehler["verarbeitet"] += 1
+            except Exception as e:  # pylint: disable=W0718
+                with self._lock:
+                    self._zaehler["fehler"] += 1
+                logger.error("Fehler in Pipeline-Stufe '%s': %s", self.name, e, exc_info=True)
+            logger.debug("Pipeline-Stufe '%s' fertig, noch %d wartend.", self.name, self._queue.qsize())
+
+    def stoppen(self, timeout=None):
+        """
+        Beendet den Worker, nachdem alle bereits eingereihten Aufträge verarbeitet sind.
+
+        Args:
+            timeout (float, optional): Maximale Wartezeit in Sekunden, je für das Einreihen
+                                       des Stopp-Signals und das Ende des Workers.
+        """
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            # Worker hängt (z.B. in einem API-Aufruf); er ist ein Daemon-Thread und endet mit dem Prozess
+            logger.warning("Pipeline-Stufe '%s' reagiert nicht, %d Aufträge bleiben unbearbeitet.", self.name, self._queue.qsize())
+            return
+        self._thread.join(timeout)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Aktuelle und maximale Queue-Tiefe sowie Zähler der Stufe.
+        """
+        with self._lock:
+            return {"tiefe": self._queue.qsize(), **self._zaehler}
+
+
+class ScanPipeline:
+    """
+    Verbindet API-Worker und Feedback-Worker zu einer Pipeline.
+
+    Der API-Worker liefert eine Liste von Ansagen, die der Feedback-Worker abspielt.
+    """
+
+    def __init__(self, name, api_funktion, feedback_funktion, queue_groesse=5, einreihen_timeout=2.0):
+        """
+        Args:
+            name (str): Name der Pipeline (z.B. "nfc" oder "qr").
+            api_funktion (callable): Verarbeitet einen Scan und liefert das Feedback.
+            feedback_funktion (callable): Gibt das Feedback aus.
+            queue_groesse (int): Maximale Anzahl wartender Aufträge je Stufe.
+            einreihen_timeout (float): Maximale Wartezeit des Readers bei voller Pipeline in Sekunden.
+        """
+        self.name = name
+        self.einreihen_timeout = einreihen_timeout
+        self.feedback = Stufe(f"{name}-feedback", feedback_funktion, queue_groesse)
+        self.api = Stufe(f"{name}-api", api_funktion, queue_groesse, naechste=self.feedback)
+
+    def einreichen(self, auftrag):
+        """
+        Übergibt einen Scan an die Pipeline.
+
+        Args:
+            auftrag: Der Scan (z.B. Token-Hexwert oder QR-Code-Inhalt).
+
+        Returns:
+            bool: True, wenn der Scan angenommen wurde, False bei voller Pipeline.
+        """
+        return self.api.einreihen(auftrag, timeout=self.einreihen_timeout)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Kennzahlen je Stufe.
+        """
+        return {"api": self.api.statistik(), "feedback": self.feedback.statistik()}
+
+    def stoppen(self, timeout=5.0):
+        """
+        Arbeitet die wartenden Aufträge ab und beendet die Worker.
+
+        Args:
+            timeout (float): Maximale Wartezeit je Stufe in Sekunden.
+        """
+        self.api.stoppen(timeout)
+        self.feedback.stoppen(timeout)
+        logger.info("Pipeline '%s' beendet: %s", self.name, self.statistik())
@@ -0,0 +1,205 @@
+"""
+Vergleicht die QR-Dekoder auf Kamerabildern, ohne dass eine Webcam nötig ist.
+
+Beispiele:
+    python qr_benchmark.py aufnahmen/ --dekoder pyzbar opencv --skalierung 0 0.5
+    python qr_benchmark.py --synthetisch 200 --min-erkennung 0.9 --max-p95-ms 40
+
+Die Bilder laufen über eine FakeVideoCapture durch denselben Pfad wie im
+QR-Leser (Graukonvertierung und Dekodierung, qr_dekoder.dekodiere_frame). Für
+jeden Dekoder werden Bilder pro Sekunde, die Latenz je Bild (p50/p95/p99), der
+Speicherbedarf je Bild und die Erkennungsrate ausgegeben. Heißen Dateien
+"<erwarteter Inhalt>__<beliebig>.png", wird zusätzlich geprüft, ob der richtige
+Inhalt erkannt wurde; synthetische Bilder werden immer geprüft.
+
+Mit --min-erkennung und --max-p95-ms endet das Programm mit Exit-Code 1, wenn
+ein Dekoder die Grenzen verletzt, und eignet sich so als Regressionstest.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import cv2
+import qr_dekoder
+import qr_synthetisch
+
+logger = logging.getLogger(__name__)
+
+BILD_ENDUNGEN = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def bilder_laden(verzeichnis):
+    """
+    Lädt alle Bilder eines Verzeichnisses.
+
+    Args:
+        verzeichnis (str): Das Verzeichnis.
+
+    Returns:
+        list[tuple]: (Bild im BGR-Format, erwarteter Inhalt oder None)
+    """
+    bilder = []
+    for name in sorted(os.listdir(verzeichnis)):
+        if not name.lower().endswith(BILD_ENDUNGEN):
+            continue
+        frame = cv2.imread(os.path.join(verzeichnis, name), cv2.IMREAD_COLOR)
+        if frame is None:
+            logger.warning("Bild %s konnte nicht gelesen werden.", name)
+            continue
+        bilder.append((frame, name.split("__", 1)[0] if "__" in name else None))
+    return bilder
+
+
+def perzentil(werte, anteil):
+    """
+    Args:
+        werte (list[float]): Die Messwerte.
+        anteil (float): Das Perzentil als Anteil (z.B. 0.95).
+
+    Returns:
+        float: Der Wert, unter dem der Anteil der Messwerte liegt (nächster Rang).
+    """
+    sortiert = sorted(werte)
+    return sortiert[min(len(sortiert) - 1, max(0, round(anteil * len(sortiert)) - 1))]
+
+
+def _speicher_je_bild(dekoder, frames):
+    """Spitzenwert der Python-/numpy-Allokationen je Bild in Bytes (eigener Durchlauf mit tracemalloc)."""
+    spitzen = []
+    tracemalloc.start()
+    try:
+        for frame in frames:
+            tracemalloc.reset_peak()
+            vorher = tracemalloc.get_traced_memory()[0]
+            qr_dekoder.dekodiere_frame(frame, dekoder)
+            spitzen.append(tracemalloc.get_traced_memory()[1] - vorher)
+    finally:
+        tracemalloc.stop()
+    return statistics.fmean(spitzen)
+
+
+def messen(dekoder, bilder, wiederholungen=3):
+    """
+    Misst einen Dekoder auf allen Bildern.
+
+    Args:
+        dekoder: Der Dekoder (siehe qr_dekoder.erstelle_dekoder).
+        bilder (list[tuple]): (Bild, erwarteter Inhalt oder None)
+        wiederholungen (int): Anzahl der Durchläufe über alle Bilder.
+
+    Returns:
+        dict: Kennzahlen des Dekoders.
+    """
+    frames = [frame for frame, _ in bilder]
+    cap = qr_synthetisch.FakeVideoCapture(frames, wiederholen=True)
+    qr_dekoder.dekodiere_frame(frames[0], dekoder)  # Aufwärmen
+
+    zeiten = []
+    erkannt = 0
+    richtig = 0
+    mit_erwartung = 0
+    start_gesamt = time.perf_counter()
+    for durchlauf in range(wiederholungen):
+        for _, erwartet in bilder:
+            _, frame = cap.read()
+            start = time.perf_counter()
+            text = qr_dekoder.dekodiere_frame(frame, dekoder)
+            zeiten.append((time.perf_counter() - start) * 1000)
+            if durchlauf == 0:
+                erkannt += text is not None
+                if erwartet is not None:
+                    mit_erwartung += 1
+                    richtig += text == erwartet
+    dauer = time.perf_counter() - start_gesamt
+
+    return {
+        "dekoder": dekoder.name,
+        "bilder": len(bilder),
+        "erkannt": erkannt / len(bilder),
+        "richtig": richtig / mit_erwartung if mit_erwartung else None,
+        "fps": len(zeiten) / dauer,
+        "p50_ms": statistics.median(zeiten),
+        "p95_ms": perzentil(zeiten, 0.95),
+        "p99_ms": perzentil(zeiten, 0.99),
+        "kb_je_bild": _speicher_je_bild(dekoder, frames) / 1024,
+    }
+
+
+def ausgeben(ergebnisse):
+    """Gibt die Ergebnisse als Tabelle aus, schnellster Dekoder zuerst."""
+    print(f"{'Dekoder':<24}{'Bilder':>7}{'erkannt':>9}{'richtig':>9}{'Bilder/s':>10}"
+          f"{'p50':>10}{'p95':>10}{'p99':>10}{'Speicher':>11}")
+    for e in sorted(ergebnisse, key=lambda e: e["p50_ms"]):
+        richtig = f"{e['richtig']:.0%}" if e["richtig"] is not None else "-"
+        print(f"{e['dekoder']:<24}{e['bilder']:>7}{e['erkannt']:>9.0%}{richtig:>9}{e['fps']:>10.1f}"
+              f"{e['p50_ms']:>8.1f}ms{e['p95_ms']:>8.1f}ms{e['p99_ms']:>8.1f}ms{e['kb_je_bild']:>8.0f} KB")
+
+
+def grenzen_pruefen(ergebnisse, min_erkennung=None, max_p95_ms=None):
+    """
+    Prüft die Ergebnisse gegen die vorgegebenen Grenzen.
+
+    Returns:
+        bool: True, wenn alle Dekoder die Grenzen einhalten.
+    """
+    eingehalten = True
+    for e in ergebnisse:
+        quote = e["richtig"] if e["richtig"] is not None else e["erkannt"]
+        if min_erkennung is not None and quote < min_erkennung:
+            logger.error("%s: Erkennungsrate %.0f%% unter %.0f%%.", e["dekoder"], quote * 100, min_erkennung * 100)
+            eingehalten = False
+        if max_p95_ms is not None and e["p95_ms"] > max_p95_ms:
+            logger.error("%s: p95 %.1f ms über %.1f ms.", e["dekoder"], e["p95_ms"], max_p95_ms)
+            eingehalten = False
+    return eingehalten
+
+
+def main(argumente=None):
+    """Einstiegspunkt für die Kommandozeile."""
+    parser = argparse.ArgumentParser(description="Vergleicht die QR-Dekoder auf Kamerabildern.")
+    parser.add_argument("verzeichnis", nargs="?", help="Verzeichnis mit Bildern (png, jpg, bmp)")
+    parser.add_argument("--synthetisch", type=int, default=0, metavar="ANZAHL",
+                        help="Statt eines Verzeichnisses ANZAHL synthetische Bilder erzeugen")
+    parser.add_argument("--seed", type=int, default=0, help="Startwert für die synthetischen Bilder")
+    parser.add_argument("--dekoder", nargs="+", default=list(qr_dekoder.DEKODER),
+                        help="Zu vergleichende Dekoder (Standard: alle)")
+    parser.add_argument("--skalierung", nargs="+", type=float, default=[0.0],
+                        help="Faktoren für den verkleinerten Vorab-Versuch, 0 = ohne (Standard: 0)")
+    parser.add_argument("--wiederholungen", type=int, default=3, help="Durchläufe über alle Bilder (Standard: 3)")
+    parser.add_argument("--min-erkennung", type=float, help="Minimale Erkennungsrate (0-1), sonst Exit-Code 1")
+    parser.add_argument("--max-p95-ms", type=float, help="Maximale p95-Latenz in ms, sonst Exit-Code 1")
+    args = parser.parse_args(argumente)
+
+    if not args.synthetisch and not args.verzeichnis:
+        parser.error("Verzeichnis oder --synthetisch angeben.")
+    if args.synthetisch:
+        bilder = [(b.frame, b.code) for b in qr_synthetisch.erzeuge_bilder(args.synthetisch, args.seed)]
+    else:
+        bilder = bilder_laden(args.verzeichnis)
+    if not bilder:
+        logger.error("Keine Bilder gefunden.")
+        return 1
+
+    ergebnisse = []
+    for name in args.dekoder:
+        for skalierung in args.skalierung:
+            try:
+                dekoder = qr_dekoder.erstelle_dekoder(name, skalierung)
+            except (ImportError, ValueError) as e:
+                logger.warning("Dekoder %s nicht verfügbar: %s", name, e)
+                break
+            ergebnisse.append(messen(dekoder, bilder, args.wiederholungen))
+    if not ergebnisse:
+        logger.error("Kein Dekoder verfügbar.")
+        return 1
+    ausgeben(ergebnisse)
+    return 0 if grenzen_pruefen(ergebnisse, args.min_erkennung, args.max_p95_ms) else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    sys.exit(main())
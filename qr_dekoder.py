@@ -0,0 +1,175 @@
+"""
+Austauschbare QR-Dekoder.
+
+Alle Dekoder erhalten ein Graubild und liefern eine Liste von `Treffer`. Welcher
+Dekoder verwendet wird, steuert config.QR_DECODER; mit qr_benchmark.py lassen
+sich die Dekoder auf Bildern der eigenen Kamera vergleichen.
+"""
+
+import logging
+import os
+from collections import namedtuple
+from contextlib import redirect_stderr
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Inhalt eines erkannten Codes und seine Lage (x, y, breite, hoehe) im übergebenen Bild
+Treffer = namedtuple("Treffer", ["text", "rechteck"])
+
+
+class PyzbarDekoder:  # pylint: disable=too-few-public-methods
+    """Dekoder auf Basis von zbar (pyzbar)."""
+
+    name = "pyzbar"
+
+    def __init__(self):
+        # Erst hier importieren, damit der OpenCV-Dekoder auch ohne libzbar nutzbar ist
+        from pyzbar.pyzbar import decode, ZBarSymbol  # pylint: disable=import-outside-toplevel
+        self._decode = decode
+        self._symbole = [ZBarSymbol.QRCODE]
+        self._devnull = open(os.devnull, 'w', encoding='utf-8')  # pylint: disable=consider-using-with
+
+    def dekodiere(self, gray):
+        """
+        Args:
+            gray (numpy.ndarray): Das Graubild.
+
+        Returns:
+            list[Treffer]: Die erkannten Codes.
+        """
+        # zbar schreibt Warnungen zu unvollständigen Codes auf stderr
+        with redirect_stderr(self._devnull):
+            objekte = self._decode(gray, symbols=self._symbole)
+        return [Treffer(obj.data.decode('utf-8'), (obj.rect.left, obj.rect.top, obj.rect.width, obj.rect.height))
+                for obj in objekte]
+
+
+class OpenCVDekoder:  # pylint: disable=too-few-public-methods
+    """Dekoder auf Basis von cv2.QRCodeDetector (ohne zusätzliche Bibliotheken)."""
+
+    name = "opencv"
+
+    def __init__(self):
+        self._detektor = cv2.QRCodeDetector()
+
+    def dekodiere(self, gray):
+        """
+        Args:
+            gray (numpy.ndarray): Das Graubild.
+
+        Returns:
+            list[Treffer]: Die erkannten Codes.
+        """
+        text, punkte, _ = self._detektor.detectAndDecode(gray)
+        if not text or punkte is None:
+            return []
+        return [Treffer(text, tuple(int(wert) for wert in cv2.boundingRect(punkte.astype("float32"))))]
+
+
+class SkalierterDekoder:  # pylint: disable=too-few-public-methods
+    """
+    Versucht zuerst ein verkleinertes Bild und nur ohne Treffer das Originalbild.
+
+    Große, nahe Codes werden so mit einem Bruchteil der Rechenzeit erkannt;
+    kleine Codes kosten einen zusätzlichen, aber billigen Versuch.
+    """
+
+    def __init__(self, basis, faktor=0.5):
+        """
+        Args:
+            basis: Der eigentliche Dekoder (PyzbarDekoder oder OpenCVDekoder).
+            faktor (float): Verkleinerungsfaktor für den ersten Versuch (0-1).
+        """
+        self.basis = basis
+        self.faktor = faktor
+        self.name = f"{basis.name}+skaliert{faktor:g}"
+        self._klein = None  # wiederverwendeter Puffer für das verkleinerte Bild
+
+    def dekodiere(self, gray):
+        """
+        Args:
+            gray (numpy.ndarray): Das Graubild.
+
+        Returns:
+            list[Treffer]: Die erkannten Codes mit Koordinaten im Originalbild.
+        """
+        groesse = (int(gray.shape[1] * self.faktor), int(gray.shape[0] * self.faktor))
+        self._klein = cv2.resize(gray, groesse, dst=self._klein, interpolation=cv2.INTER_AREA)
+        treffer = self.basis.dekodiere(self._klein)
+        if not treffer:
+            return self.basis.dekodiere(gray)
+        return [Treffer(t.text, tuple(int(wert / self.faktor) for wert in t.rechteck)) for t in treffer]
+
+
+def suche(gray, dekoder, bereiche):
+    """
+    Dekodiert die Ausschnitte eines Graubildes nacheinander bis zum ersten Treffer.
+
+    Args:
+        gray (numpy.ndarray): Das Graubild.
+        dekoder: Der Dekoder (siehe `erstelle_dekoder`).
+        bereiche (list[tuple]): Ausschnitte (x, y, breite, hoehe) in der Reihenfolge der Suche.
+
+    Returns:
+        Treffer or None: Der erste Treffer mit Koordinaten im Gesamtbild.
+    """
+    for x, y, b, h in bereiche:
+        treffer = dekoder.dekodiere(gray[y:y + h, x:x + b])
+        if treffer:
+            tx, ty, tb, th = treffer[0].rechteck
+            return Treffer(treffer[0].text, (x + tx, y + ty, tb, th))
+    return None
+
+
+def dekodiere_frame(frame, dekoder, suchbereich=None):
+    """
+    Sucht in einem Kamerabild nach einem QR-Code (Graukonvertierung und Dekodierung).
+
+    Args:
+        frame (numpy.ndarray): Das Kamerabild (BGR oder bereits grau).
+        dekoder: Der Dekoder (siehe `erstelle_dekoder`).
+        suchbereich (qr_vorfilter.Suchbereich, optional): Die zu durchsuchenden Ausschnitte,
+                                                          ohne Angabe das ganze Bild.
+
+    Returns:
+        str or None: Der Inhalt des ersten gefundenen Codes.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    hoehe, breite = gray.shape[:2]
+    bereiche = suchbereich.bereiche(hoehe, breite) if suchbereich else [(0, 0, breite, hoehe)]
+    treffer = suche(gray, dekoder, bereiche)
+    if treffer is None:
+        return None
+    if suchbereich:
+        suchbereich.gefunden(treffer.rechteck, hoehe, breite)
+    return treffer.text
+
+
+DEKODER = {
+    PyzbarDekoder.name: PyzbarDekoder,
+    OpenCVDekoder.name: OpenCVDekoder,
+}
+
+
+def erstelle_dekoder(name, skalierung=0.0):
+    """
+    Erstellt einen Dekoder.
+
+    Args:
+        name (str): "pyzbar" oder "opencv".
+        skalierung (float): Faktor für den verkleinerten Vorab-Versuch, 0 = ohne.
+
+    Returns:
+        Ein Objekt mit Attribut `name` und Methode `dekodiere(gray) -> list[Treffer]`.
+
+    Raises:
+        ValueError: Bei einem unbekannten Namen.
+    """
+    if name not in DEKODER:
+        raise ValueError(f"Unbekannter QR-Dekoder '{name}', möglich: {', '.join(DEKODER)}")
+    dekoder = DEKODER[name]()
+    if 0 < skalierung < 1:
+        dekoder = SkalierterDekoder(dekoder, skalierung)
+    logger.debug("QR-Dekoder: %s", dekoder.name)
+    return dekoder
@@ -0,0 +1,109 @@
+"""
+Planung der Dekodierversuche nach Aktivität, Rechenzeit und Systemlast.
+
+Nach einer Bewegung vor der Kamera wird häufig dekodiert, bei ruhigem Bild
+seltener. Ist das Bild einige Minuten unverändert, wechselt der Planer in den
+Leerlauf: Bewegung wird nur noch selten geprüft und die Kamera kann mit
+niedrigerer Bildrate und Auflösung laufen. Unabhängig davon belegt die
+Dekodierung höchstens einen festen Anteil der Rechenzeit, und bei hoher
+Systemlast werden alle Abstände verlängert.
+"""
+
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sekunden, für die ein gelesener Wert der Systemlast gültig bleibt
+LAST_GUELTIGKEIT = 5.0
+# Höchster Faktor, um den die Abstände bei Überlast verlängert werden
+LAST_FAKTOR_MAX = 4.0
+
+
+def systemlast():
+    """
+    Returns:
+        float: Last der letzten Minute je CPU-Kern (1.0 = alle Kerne ausgelastet),
+               0.0 wenn das System keinen Wert liefert.
+    """
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class DekodierPlaner:  # pylint: disable=too-many-instance-attributes
+    """Bestimmt den Abstand bis zum nächsten Dekodierversuch."""
+
+    def __init__(self, intervall_aktiv=0.05, intervall_ruhe=0.15, intervall_leerlauf=1.0,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 leerlauf_nach=120.0, cpu_anteil=0.5, umschalten=None):
+        """
+        Args:
+            intervall_aktiv (float): Abstand in Sekunden nach einer Bewegung.
+            intervall_ruhe (float): Abstand in Sekunden bei ruhigem Bild.
+            intervall_leerlauf (float): Abstand in Sekunden im Leerlauf.
+            leerlauf_nach (float): Sekunden ohne Bewegung bis zum Leerlauf, 0 = nie.
+            cpu_anteil (float): Höchster Anteil der Zeit, den die Dekodierung belegen darf (0-1).
+            umschalten (callable, optional): Wird mit True beim Wechsel in den Leerlauf und
+                                             mit False beim Verlassen aufgerufen.
+        """
+        self.intervall_aktiv = intervall_aktiv
+        self.intervall_ruhe = intervall_ruhe
+        self.intervall_leerlauf = intervall_leerlauf
+        self.leerlauf_nach = leerlauf_nach
+        self.cpu_anteil = cpu_anteil
+        self.umschalten = umschalten
+        self._letzte_aktivitaet = time.monotonic()
+        self._leerlauf = False
+        self._lastfaktor = 1.0
+        self._last_gelesen = 0.0
+
+    @property
+    def leerlauf(self):
+        """True, solange der Planer im Leerlauf ist."""
+        return self._leerlauf
+
+    def aktivitaet(self):
+        """Meldet Aktivität vor der Kamera (Bewegung oder erkannter Code)."""
+        self._letzte_aktivitaet = time.monotonic()
+        if self._leerlauf:
+            self._wechseln(False)
+
+    def intervall(self, aktiv, dekodierdauer=0.0):
+        """
+        Bestimmt den Abstand bis zum nächsten Versuch.
+
+        Args:
+            aktiv (bool): True, wenn im aktuellen Bild Bewegung erkannt wurde.
+            dekodierdauer (float): Gemessene Rechenzeit je Bild in Sekunden.
+
+        Returns:
+            float: Der Abstand in Sekunden.
+        """
+        if aktiv:
+            self.aktivitaet()
+            intervall = self.intervall_aktiv
+        else:
+            ruhig_seit = time.monotonic() - self._letzte_aktivitaet
+            if not self._leerlauf and 0 < self.leerlauf_nach <= ruhig_seit:
+                self._wechseln(True)
+            intervall = self.intervall_leerlauf if self._leerlauf else self.intervall_ruhe
+        # Die Dekodierung soll höchstens cpu_anteil der Zeit belegen
+        if self.cpu_anteil > 0:
+            intervall = max(intervall, dekodierdauer / self.cpu_anteil)
+        return intervall * self._last()
+
+    def _last(self):
+        """Faktor für die Abstände bei Überlast (1 bis LAST_FAKTOR_MAX)."""
+        jetzt = time.monotonic()
+        if jetzt - self._last_gelesen >= LAST_GUELTIGKEIT:
+            self._last_gelesen = jetzt
+            self._lastfaktor = min(LAST_FAKTOR_MAX, max(1.0, systemlast()))
+        return self._lastfaktor
+
+    def _wechseln(self, leerlauf):
+        self._leerlauf = leerlauf
+        logger.info("QR-Leser %s Leerlauf.", "im" if leerlauf else "verlässt den")
+        if self.umschalten:
+            self.umschalten(leerlauf)
@@ -0,0 +1,140 @@
+"""
+Synthetische Kamerabilder mit QR-Codes für Benchmarks ohne Webcam.
+
+Die Bilder werden mit `qrcode` und Pillow erzeugt und mit typischen Störungen
+einer Webcam versehen (Unschärfe, Drehung, Rauschen). `FakeVideoCapture`
+liefert sie über dieselbe Schnittstelle wie cv2.VideoCapture.
+"""
+
+import random
+import string
+from collections import namedtuple
+import numpy as np
+import qrcode
+from PIL import Image, ImageFilter
+
+# Ein erzeugtes Bild (BGR wie von der Kamera) und der enthaltene Code
+SynthetischesBild = namedtuple("SynthetischesBild", ["frame", "code", "parameter"])
+
+AUFLOESUNGEN = ((640, 480), (1280, 720))
+CODE_GROESSEN = (0.25, 0.4, 0.6)   # Kantenlänge des Codes relativ zur Bildhöhe
+UNSCHAERFEN = (0.0, 1.0, 2.0)      # Radius des Gaußfilters in Pixeln
+DREHUNGEN = (0, 10, 30)            # Grad
+RAUSCHEN = (0.0, 8.0)              # Standardabweichung des Rauschens (Helligkeit 0-255)
+
+
+def benutzercode(zufall):
+    """
+    Erzeugt einen zufälligen Benutzercode (10 Zeichen Kennung + Aktion "a" oder "k").
+
+    Args:
+        zufall (random.Random): Zufallsgenerator.
+
+    Returns:
+        str: Der 11-stellige Code.
+    """
+    kennung = "".join(zufall.choices(string.ascii_lowercase + string.digits, k=10))
+    return kennung + zufall.choice("ak")
+
+
+def erzeuge_bild(code, aufloesung, groesse, unschaerfe=0.0, drehung=0, rauschen=0.0, zufall=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Erzeugt ein Kamerabild mit einem QR-Code vor grauem Hintergrund.
+
+    Args:
+        code (str): Inhalt des QR-Codes.
+        aufloesung (tuple): (breite, hoehe) des Bildes.
+        groesse (float): Kantenlänge des Codes relativ zur Bildhöhe.
+        unschaerfe (float): Radius des Gaußfilters, 0 = scharf.
+        drehung (float): Drehung des Codes in Grad.
+        rauschen (float): Standardabweichung des Helligkeitsrauschens, 0 = ohne.
+        zufall (random.Random, optional): Zufallsgenerator für Position und Rauschen.
+
+    Returns:
+        numpy.ndarray: Das Bild im BGR-Format (uint8).
+    """
+    zufall = zufall or random.Random(0)
+    breite, hoehe = aufloesung
+    kante = int(hoehe * groesse)
+
+    code_bild = qrcode.make(code, border=2).convert("L").resize((kante, kante), Image.NEAREST)
+    if drehung:
+        code_bild = code_bild.rotate(drehung, expand=True, fillcolor=255)
+
+    hintergrund = Image.new("L", (breite, hoehe), 120)
+    x = zufall.randint(0, max(0, breite - code_bild.width))
+    y = zufall.randint(0, max(0, hoehe - code_bild.height))
+    hintergrund.paste(code_bild, (x, y))
+    if unschaerfe:
+        hintergrund = hintergrund.filter(ImageFilter.GaussianBlur(unschaerfe))
+
+    gray = np.asarray(hintergrund, dtype=np.float32)
+    if rauschen:
+        gray = gray + np.random.default_rng(zufall.randrange(2 ** 32)).normal(0, rauschen, gray.shape)
+    gray = np.clip(gray, 0, 255).astype(np.uint8)
+    return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+def erzeuge_bilder(anzahl, seed=0):
+    """
+    Erzeugt eine reproduzierbare Mischung von Bildern über alle Störungsarten.
+
+    Args:
+        anzahl (int): Anzahl der Bilder.
+        seed (int): Startwert des Zufallsgenerators.
+
+    Returns:
+        list[SynthetischesBild]: Die Bilder.
+    """
+    zufall = random.Random(seed)
+    bilder = []
+    for _ in range(anzahl):
+        parameter = {
+            "aufloesung": zufall.choice(AUFLOESUNGEN),
+            "groesse": zufall.choice(CODE_GROESSEN),
+            "unschaerfe": zufall.choice(UNSCHAERFEN),
+            "drehung": zufall.choice(DREHUNGEN),
+            "rauschen": zufall.choice(RAUSCHEN),
+        }
+        code = benutzercode(zufall)
+        bilder.append(SynthetischesBild(erzeuge_bild(code, zufall=zufall, **parameter), code, parameter))
+    return bilder
+
+
+class FakeVideoCapture:
+    """Liefert vorgegebene Bilder über die Schnittstelle von cv2.VideoCapture."""
+
+    def __init__(self, frames, wiederholen=False):
+        """
+        Args:
+            frames (list[numpy.ndarray]): Die Bilder in der Reihenfolge der Ausgabe.
+            wiederholen (bool): Nach dem letzten Bild wieder von vorn beginnen.
+        """
+        self.frames = frames
+        self.wiederholen = wiederholen
+        self._index = 0
+        self._offen = True
+
+    def isOpened(self):  # pylint: disable=invalid-name
+        """Wie cv2.VideoCapture.isOpened."""
+        return self._offen
+
+    def read(self, _bild=None):
+        """Wie cv2.VideoCapture.read: (ret, frame), ret ist False nach dem letzten Bild."""
+        if not self._offen or (self._index >= len(self.frames) and not self.wiederholen):
+            return False, None
+        frame = self.frames[self._index % len(self.frames)]
+        self._index += 1
+        return True, frame
+
+    def get(self, _eigenschaft):
+        """Wie cv2.VideoCapture.get; Eigenschaften werden nicht unterstützt."""
+        return 0.0
+
+    def set(self, _eigenschaft, _wert):
+        """Wie cv2.VideoCapture.set; Eigenschaften werden nicht unterstützt."""
+        return False
+
+    def release(self):
+        """Wie cv2.VideoCapture.release."""
+        self._offen = False
@@ -0,0 +1,149 @@
+"""
+Vorfilter für die QR-Erkennung: Bewegungserkennung und Suchbereich (ROI).
+
+Der Dekoder läuft nur, wenn sich vor der Kamera etwas bewegt hat. Dafür wird ein
+stark verkleinertes Graubild mit dem vorherigen verglichen, was nur einen
+Bruchteil eines Dekodierversuchs kostet. Zusätzlich wird nur ein Ausschnitt des
+Bildes dekodiert: der Bereich um den zuletzt erkannten Code oder ein fest
+konfigurierter Bereich.
+"""
+
+import logging
+import time
+import cv2
+
+logger = logging.getLogger(__name__)
+
+
+class BewegungsFilter:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """Erkennt Bildänderungen über den Vergleich verkleinerter Graubilder."""
+
+    def __init__(self, schwelle=0.01, nachlauf=2.0, breite=80, pixel_schwelle=25):
+        """
+        Args:
+            schwelle (float): Anteil geänderter Pixel (0-1), ab dem eine Bewegung erkannt wird.
+            nachlauf (float): Sekunden, die nach der letzten Bewegung weiter dekodiert wird
+                              (z.B. wenn ein Code ruhig vor die Kamera gehalten wird).
+            breite (int): Breite des Vergleichsbildes in Pixeln.
+            pixel_schwelle (int): Helligkeitsunterschied (0-255), ab dem ein Pixel als geändert gilt.
+        """
+        self.schwelle = schwelle
+        self.nachlauf = nachlauf
+        self.breite = breite
+        self.pixel_schwelle = pixel_schwelle
+        self._vorher = None
+        self._letzte_bewegung = 0.0
+        # wiederverwendete Puffer: verkleinertes Bild, zwei Graubilder im Wechsel, Differenz
+        self._klein = None
+        self._grau = [None, None]
+        self._differenz = None
+
+    def aktiv(self, frame):
+        """
+        Prüft, ob für dieses Bild dekodiert werden soll.
+
+        Args:
+            frame (numpy.ndarray): Das Kamerabild (BGR).
+
+        Returns:
+            bool: True bei Bewegung oder innerhalb des Nachlaufs nach einer Bewegung.
+        """
+        hoehe = max(1, frame.shape[0] * self.breite // frame.shape[1])
+        # das Graubild des vorherigen Aufrufs bleibt als Vergleich erhalten
+        if self._grau[0] is self._vorher:
+            self._grau.reverse()
+        if frame.ndim == 3:
+            self._klein = cv2.resize(frame, (self.breite, hoehe), dst=self._klein, interpolation=cv2.INTER_AREA)
+            klein = self._grau[0] = cv2.cvtColor(self._klein, cv2.COLOR_BGR2GRAY, dst=self._grau[0])
+        else:
+            klein = self._grau[0] = cv2.resize(frame, (self.breite, hoehe), dst=self._grau[0],
+                                               interpolation=cv2.INTER_AREA)
+
+        jetzt = time.monotonic()
+        if self._vorher is None or self._vorher.shape != klein.shape:
+            self._letzte_bewegung = jetzt
+        else:
+            self._differenz = cv2.absdiff(klein, self._vorher, dst=self._differenz)
+            cv2.threshold(self._differenz, self.pixel_schwelle, 255, cv2.THRESH_BINARY, dst=self._differenz)
+            geaendert = cv2.countNonZero(self._differenz)
+            if geaendert >= self.schwelle * klein.size:
+                self._letzte_bewegung = jetzt
+        self._vorher = klein
+        return jetzt - self._letzte_bewegung <= self.nachlauf
+
+
+class Suchbereich:
+    """
+    Bestimmt die Bildausschnitte, in denen nach einem Code gesucht wird.
+
+    Zuerst wird der Bereich um den zuletzt erkannten Code versucht, danach der
+    konfigurierte Bereich bzw. das ganze Bild. Ist der Bereich des letzten Codes
+    größer als die Hälfte des festen Bereichs, wird er übersprungen, weil ein
+    Fehlversuch dort fast so teuer wäre wie die Suche im ganzen Bild.
+    """
+
+    def __init__(self, fest=None, rand=0.5):
+        """
+        Args:
+            fest (tuple, optional): Konfigurierter Bereich (x, y, breite, hoehe) als Anteile
+                                    des Bildes (0-1). None = ganzes Bild.
+            rand (float): Rand um den zuletzt erkannten Code, relativ zu dessen Größe.
+        """
+        self.fest = fest
+        self.rand = rand
+        self._letzter = None  # (x, y, breite, hoehe) in Pixeln
+
+    @staticmethod
+    def parse(wert):
+        """
+        Liest einen Bereich aus der Konfiguration ("x,y,breite,hoehe" als Anteile).
+
+        Args:
+            wert (str): Der Konfigurationswert, leer für das ganze Bild.
+
+        Returns:
+            tuple or None: Der Bereich oder None.
+        """
+        if not wert:
+            return None
+        try:
+            x, y, breite, hoehe = (float(teil) for teil in wert.split(","))
+        except ValueError:
+            logger.error("Ungültiger Bildbereich '%s', verwende das ganze Bild.", wert)
+            return None
+        return x, y, breite, hoehe
+
+    def bereiche(self, hoehe, breite):
+        """
+        Liefert die zu durchsuchenden Ausschnitte in der Reihenfolge der Suche.
+
+        Args:
+            hoehe (int): Höhe des Bildes in Pixeln.
+            breite (int): Breite des Bildes in Pixeln.
+
+        Returns:
+            list[tuple]: (x, y, breite, hoehe) in Pixeln, als letztes immer der feste Bereich.
+        """
+        if self.fest:
+            fx, fy, fb, fh = self.fest
+            fest = (int(fx * breite), int(fy * hoehe), int(fb * breite), int(fh * hoehe))
+        else:
+            fest = (0, 0, breite, hoehe)
+        if self._letzter and self._letzter[2] * self._letzter[3] * 2 <= fest[2] * fest[3]:
+            return [self._letzter, fest]
+        return [fest]
+
+    def gefunden(self, rechteck, hoehe, breite):
+        """
+        Merkt sich die Position eines erkannten Codes für die nächste Suche.
+
+        Args:
+            rechteck (tuple): (x, y, breite, hoehe) des Codes im Gesamtbild.
+            hoehe (int): Höhe des Bildes in Pixeln.
+            breite (int): Breite des Bildes in Pixeln.
+        """
+        x, y, b, h = rechteck
+        rand_x, rand_y = int(b * self.rand), int(h * self.rand)
+        x0, y0 = max(0, x - rand_x), max(0, y - rand_y)
+        x1, y1 = min(breite, x + b + rand_x), min(hoehe, y + h + rand_y)
+        self._letzter = (x0, y0, x1 - x0, y1 - y0)
@@ -0,0 +1,371 @@
+"""
+Dekodierung in eigenen Prozessen.
+
+Graukonvertierung und Dekodierung laufen sonst im selben Prozess wie Kamera,
+API-Aufrufe und Sprachausgabe und konkurrieren dort um den GIL. Mit
+`ProzessDekodierung` übernehmen Worker-Prozesse diese Arbeit auf eigenen Kernen.
+Die Bilder werden nicht gepickelt, sondern in einen Ringpuffer im Shared Memory
+kopiert; über die Queues laufen nur die Nummer des Platzes und die Treffer.
+
+`InProzessDekodierung` bietet dieselbe Schnittstelle ohne Worker-Prozesse.
+"""
+
+import logging
+import multiprocessing
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+import qr_dekoder
+
+logger = logging.getLogger(__name__)
+
+# Gewicht einer neuen Messung im gleitenden Mittel der Dekodierdauer
+GLAETTUNG = 0.2
+
+# Sekunden, nach denen ein belegter Pufferplatz als verloren gilt (Worker hängt oder ist abgestürzt)
+PLATZ_TIMEOUT = 5.0
+# Abstand der Prüfung, ob alle Worker noch arbeiten, in Sekunden
+PRUEF_INTERVALL = 1.0
+# Neustarts der Worker, danach wird im eigenen Prozess dekodiert
+NEUSTARTS_MAX = 3
+
+
+def _speicher_verbinden(name):
+    """Öffnet den Ringpuffer im Worker; freigegeben wird er nur vom Hauptprozess."""
+    # Vor Python 3.13 registriert sich auch der Worker beim Resource-Tracker. Der Tracker
+    # ist aber der des Hauptprozesses, der Puffer wird also nicht mit dem Worker gelöscht.
+    optionen = {"track": False} if sys.version_info >= (3, 13) else {}
+    return shared_memory.SharedMemory(name=name, **optionen)
+
+
+def _arbeiter(auftraege, ergebnisse, dekoder_name, skalierung):
+    """Hauptschleife eines Worker-Prozesses."""
+    cv2.setNumThreads(1)  # die Parallelität kommt von den Prozessen
+    dekoder = qr_dekoder.erstelle_dekoder(dekoder_name, skalierung)
+    speicher = None
+    gray_puffer = None
+    try:
+        while True:
+            auftrag = auftraege.get()
+            if auftrag is None:
+                break
+            name, platz, offset, form, bereiche, generation = auftrag
+            if speicher is None or speicher.name != name:
+                if speicher is not None:
+                    speicher.close()
+                speicher = _speicher_verbinden(name)
+            frame = np.ndarray(form, dtype=np.uint8, buffer=speicher.buf, offset=offset)
+            gray = None
+            try:
+                if frame.ndim == 3:
+                    gray = gray_puffer = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_puffer)
+                else:
+                    gray = frame
+                treffer = qr_dekoder.suche(gray, dekoder, bereiche)
+            except Exception as e:  # pylint: disable=W0718
+                logger.error("Fehler bei der Dekodierung: %s", e)
+                treffer = None
+            # Ansichten auf den Puffer freigeben, sonst schlägt close() fehl
+            del frame, gray
+            ergebnisse.put((platz, generation, treffer))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if speicher is not None:
+            speicher.close()
+
+
+class InProzessDekodierung:
+    """Dekodiert direkt beim Einreichen im aufrufenden Thread."""
+
+    def __init__(self, dekoder):
+        """
+        Args:
+            dekoder: Der QR-Dekoder (siehe qr_dekoder.erstelle_dekoder).
+        """
+        self.dekoder = dekoder
+        self.dekodierdauer = 0.0  # gleitendes Mittel in Sekunden je Bild
+        self._treffer = []
+        self._gray = None  # wiederverwendeter Puffer für das Graubild
+
+    def einreichen(self, frame, bereiche):
+        """
+        Dekodiert ein Bild.
+
+        Args:
+            frame (numpy.ndarray): Das Kamerabild (BGR oder grau).
+            bereiche (list[tuple]): Die zu durchsuchenden Ausschnitte (siehe qr_vorfilter.Suchbereich).
+
+        Returns:
+            bool: Immer True.
+        """
+        start = time.monotonic()
+        if frame.ndim == 3:
+            gray = self._gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            gray = frame
+        treffer = qr_dekoder.suche(gray, self.dekoder, bereiche)
+        self.dekodierdauer += GLAETTUNG * (time.monotonic() - start - self.dekodierdauer)
+        if treffer:
+            self._treffer.append(treffer)
+        return True
+
+    def ergebnisse(self, timeout=0.0):
+        """
+        Liefert die Treffer seit dem letzten Aufruf; ohne Treffer wird `timeout` gewartet.
+
+        Returns:
+            list[qr_dekoder.Treffer]: Die Treffer mit Koordinaten im Gesamtbild.
+        """
+        if not self._treffer and timeout > 0:
+            time.sleep(timeout)
+        treffer, self._treffer = self._treffer, []
+        return treffer
+
+    def verwerfen(self):
+        """Verwirft alle noch nicht abgeholten Treffer."""
+        self._treffer = []
+
+    def stoppen(self):
+        """Nichts zu tun, vorhanden für die gemeinsame Schnittstelle."""
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Leer, ohne Worker gibt es keine verworfenen Bilder.
+        """
+        return {}
+
+
+class ProzessDekodierung:  # pylint: disable=too-many-instance-attributes
+    """
+    Verteilt Bilder über einen Ringpuffer im Shared Memory an Worker-Prozesse.
+
+    Jeder Platz des Ringpuffers nimmt ein Bild auf und ist belegt, bis ein Worker
+    das Ergebnis zurückgemeldet hat. Sind alle Plätze belegt, wird ein neues Bild
+    verworfen statt zu warten - bis ein Platz frei wird, gibt es ohnehin ein
+    neueres. Der Puffer wird beim ersten Bild angelegt, weil erst dann die Größe
+    der Kamerabilder bekannt ist, und bei größeren Bildern neu angelegt.
+
+    Stirbt ein Worker oder bleibt ein Platz länger als PLATZ_TIMEOUT belegt, werden
+    alle Worker samt Queues neu gestartet (ein abgestürzter Worker kann die Sperre
+    der Auftrags-Queue halten). Nach NEUSTARTS_MAX Neustarts wird im eigenen
+    Prozess dekodiert (siehe InProzessDekodierung).
+    """
+
+    def __init__(self, anzahl, dekoder_name, skalierung=0.0, plaetze=0):
+        """
+        Args:
+            anzahl (int): Anzahl der Worker-Prozesse.
+            dekoder_name (str): Name des Dekoders (siehe qr_dekoder.erstelle_dekoder).
+            skalierung (float): Faktor für den verkleinerten Vorab-Versuch, 0 = ohne.
+            plaetze (int): Plätze im Ringpuffer, 0 = zwei je Worker.
+        """
+        # "spawn" statt "fork": der Hauptprozess hat bereits Threads (Kamera, Pipeline, Audio)
+        self._kontext = multiprocessing.get_context("spawn")
+        self._dekoder_name = dekoder_name
+        self._skalierung = skalierung
+        self.plaetze = plaetze or 2 * anzahl
+        self._auftraege = None
+        self._ergebnisse = None
+        self._prozesse = []
+        self._speicher = None
+        self._platz_bytes = 0
+        self._frei = []
+        self._generation = 0
+        self._gestartet = {}  # Platz -> Zeitpunkt des Einreichens
+        self.dekodierdauer = 0.0  # gleitendes Mittel in Sekunden je Bild, anteilig je Worker
+        self._eingereicht = 0
+        self._verworfen = 0
+        self._neustarts = 0
+        self._naechste_pruefung = 0.0
+        self._ersatz = None  # InProzessDekodierung, wenn die Worker immer wieder ausfallen
+        self._worker_starten(anzahl)
+        logger.info("QR-Dekodierung in %d Prozess(en) mit %d Pufferplätzen.", anzahl, self.plaetze)
+
+    def _worker_starten(self, anzahl):
+        """Startet die Worker mit neuen Queues; alle Pufferplätze sind danach frei."""
+        self._auftraege = self._kontext.Queue()
+        self._ergebnisse = self._kontext.Queue()
+        self._prozesse = [
+            self._kontext.Process(target=_arbeiter, args=(self._auftraege, self._ergebnisse, self._dekoder_name,
+                                                         self._skalierung),
+                                  name=f"qr-dekoder-{nummer}", daemon=True)
+            for nummer in range(anzahl)
+        ]
+        for prozess in self._prozesse:
+            prozess.start()
+        # Aufträge und Ergebnisse der alten Worker gehen mit deren Queues verloren
+        self._frei = list(range(self.plaetze))
+        self._gestartet.clear()
+
+    def _worker_beenden(self, timeout):
+        for prozess in self._prozesse:
+            prozess.join(timeout=timeout)
+            if prozess.is_alive():
+                prozess.terminate()
+                prozess.join(timeout=1)
+            if prozess.is_alive():
+                # Ein hängender Worker reagiert evtl. nicht auf SIGTERM
+                prozess.kill()
+                prozess.join(timeout=1)
+        for warteschlange in (self._auftraege, self._ergebnisse):
+            warteschlange.close()
+            warteschlange.cancel_join_thread()
+
+    def _pruefen(self):
+        """
+        Prüft höchstens alle PRUEF_INTERVALL Sekunden, ob die Worker noch arbeiten, und
+        startet sie sonst neu bzw. wechselt zur Dekodierung im eigenen Prozess.
+        """
+        jetzt = time.monotonic()
+        if self._ersatz is not None or jetzt < self._naechste_pruefung:
+            return
+        self._naechste_pruefung = jetzt + PRUEF_INTERVALL
+
+        tot = [prozess for prozess in self._prozesse if not prozess.is_alive()]
+        haengend = [platz for platz, start in self._gestartet.items() if jetzt - start > PLATZ_TIMEOUT]
+        if not tot and not haengend:
+            return
+        if tot:
+            logger.error("QR-Worker beendet: %s",
+                         ", ".join(f"{prozess.name} (Exit-Code {prozess.exitcode})" for prozess in tot))
+        else:
+            logger.error("%d Pufferplatz/-plätze seit über %.0f s ohne Ergebnis, QR-Worker hängen.",
+                         len(haengend), PLATZ_TIMEOUT)
+
+        anzahl = len(self._prozesse)
+        self._worker_beenden(timeout=0)
+        if self._neustarts >= NEUSTARTS_MAX:
+            logger.error("QR-Worker %d-mal neu gestartet, dekodiere ab jetzt im eigenen Prozess.", self._neustarts)
+            self._ersatz = InProzessDekodierung(qr_dekoder.erstelle_dekoder(self._dekoder_name, self._skalierung))
+            self._prozesse = []
+            self._puffer_freigeben()
+            self._platz_bytes = 0
+            return
+        self._neustarts += 1
+        self._worker_starten(anzahl)
+        logger.warning("QR-Worker neu gestartet (%d/%d).", self._neustarts, NEUSTARTS_MAX)
+
+    def einreichen(self, frame, bereiche):
+        """
+        Kopiert ein Bild in einen freien Platz des Ringpuffers und beauftragt einen Worker.
+
+        Args:
+            frame (numpy.ndarray): Das Kamerabild (BGR oder grau, uint8).
+            bereiche (list[tuple]): Die zu durchsuchenden Ausschnitte (siehe qr_vorfilter.Suchbereich).
+
+        Returns:
+            bool: False, wenn das Bild verworfen wurde, weil alle Plätze belegt sind.
+        """
+        self._pruefen()
+        if self._ersatz is not None:
+            self._eingereicht += 1
+            eingereicht = self._ersatz.einreichen(frame, bereiche)
+            self.dekodierdauer = self._ersatz.dekodierdauer
+            return eingereicht
+        if frame.nbytes > self._platz_bytes:
+            if len(self._frei) < self.plaetze:
+                # Ein größeres Bild (z.B. nach Wechsel der Auflösung) erst, wenn der Puffer leer ist
+                self._verworfen += 1
+                return False
+            self._puffer_anlegen(frame.nbytes)
+        if not self._frei:
+            self._verworfen += 1
+            return False
+
+        platz = self._frei.pop()
+        offset = platz * self._platz_bytes
+        ziel = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._speicher.buf, offset=offset)
+        ziel[...] = frame
+        del ziel
+        self._gestartet[platz] = time.monotonic()
+        self._auftraege.put((self._speicher.name, platz, offset, frame.shape, bereiche, self._generation))
+        self._eingereicht += 1
+        return True
+
+    def _puffer_anlegen(self, platz_bytes):
+        """Legt den Ringpuffer (neu) an; die Worker verbinden sich beim nächsten Auftrag."""
+        self._puffer_freigeben()
+        self._platz_bytes = platz_bytes
+        self._speicher = shared_memory.SharedMemory(create=True, size=self.plaetze * platz_bytes)
+
+    def _puffer_freigeben(self):
+        if self._speicher is not None:
+            self._speicher.close()
+            self._speicher.unlink()
+            self._speicher = None
+
+    def ergebnisse(self, timeout=0.0):
+        """
+        Holt die Ergebnisse der Worker ab und gibt deren Pufferplätze frei.
+
+        Args:
+            timeout (float): Maximale Wartezeit auf den ersten Treffer in Sekunden.
+
+        Returns:
+            list[qr_dekoder.Treffer]: Die Treffer mit Koordinaten im Gesamtbild.
+        """
+        self._pruefen()
+        if self._ersatz is not None:
+            return self._ersatz.ergebnisse(timeout)
+        ende = time.monotonic() + timeout
+        treffer = []
+        while True:
+            rest = ende - time.monotonic()
+            try:
+                if treffer or rest <= 0:
+                    platz, generation, ergebnis = self._ergebnisse.get_nowait()
+                else:
+                    platz, generation, ergebnis = self._ergebnisse.get(timeout=rest)
+            except queue.Empty:
+                return treffer
+            self._frei.append(platz)
+            dauer = (time.monotonic() - self._gestartet.pop(platz)) / len(self._prozesse)
+            self.dekodierdauer += GLAETTUNG * (dauer - self.dekodierdauer)
+            if ergebnis and generation == self._generation:
+                treffer.append(ergebnis)
+
+    def verwerfen(self):
+        """Verwirft die Ergebnisse aller bereits eingereichten Bilder (z.B. nach einem Scan)."""
+        self._generation += 1
+        if self._ersatz is not None:
+            self._ersatz.verwerfen()
+
+    def stoppen(self):
+        """Beendet die Worker-Prozesse und gibt den Ringpuffer frei."""
+        if self._prozesse:
+            for _ in self._prozesse:
+                self._auftraege.put(None)
+            self._worker_beenden(timeout=2)
+        self._puffer_freigeben()
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Anzahl eingereichter und mangels freiem Pufferplatz verworfener Bilder
+                  sowie der Neustarts der Worker.
+        """
+        return {"eingereicht": self._eingereicht, "verworfen": self._verworfen, "neustarts": self._neustarts}
+
+
+def erstelle_dekodierung(prozesse, dekoder_name, skalierung=0.0):
+    """
+    Erstellt die Dekodierung passend zur Konfiguration.
+
+    Args:
+        prozesse (int): Anzahl der Worker-Prozesse, 0 = im eigenen Prozess dekodieren.
+        dekoder_name (str): Name des Dekoders (siehe qr_dekoder.erstelle_dekoder).
+        skalierung (float): Faktor für den verkleinerten Vorab-Versuch, 0 = ohne.
+
+    Returns:
+        InProzessDekodierung or ProzessDekodierung: Die Dekodierung.
+    """
+    if prozesse <= 0:
+        return InProzessDekodierung(qr_dekoder.erstelle_dekoder(dekoder_name, skalierung))
+    # Fehler wie ein unbekannter Dekoder sollen hier auffallen und nicht erst im Worker
+    qr_dekoder.erstelle_dekoder(dekoder_name, skalierung)
+    return ProzessDekodierung(prozesse, dekoder_name, skalierung)
@@ -1,20 +1,39 @@
 """Liest QR-Codes über Webcam und agiert auf enhaltene Codes"""
 
 import logging
+import signal
 import sys
 import time
 import json
-import os
-from contextlib import redirect_stderr
 import cv2
 # import numpy as np # nur für optionale Visualisierung
-from pyzbar.pyzbar import decode
 import sound_ausgabe
 import config
 import api_client
+import api_client_async
+import dedupe_index
+import ereignis_schleife
+import kamera
+import pipeline
+import qr_dekoder
+import qr_planer
+import qr_vorfilter
+import qr_worker
+import sammel_fenster
 
 logger = logging.getLogger(__name__)
 
+# Spezialcode: Salden aller Benutzer ausgeben
+ADMIN_CODE = "39b3bca191be67164317227fec3bed"
+
+OFFLINE_ANSAGE = "Keine Verbindung zum Server. Deine Buchung wurde gespeichert und wird nachgetragen."
+KEINE_VERBINDUNG_ANSAGE = "Keine Verbindung zum Server. Bitte versuche es später noch einmal."
+API_FEHLER_ANSAGE = "API-Fehler, bitte informiere einen Administrator."
+# Feste Ansagen, die beim Start vorab erzeugt werden (ohne Verbindung geht das nicht mehr)
+VORAB_ANSAGEN = (OFFLINE_ANSAGE, KEINE_VERBINDUNG_ANSAGE, API_FEHLER_ANSAGE,
+                 "Benutzer nicht gefunden oder API-Fehler.",
+                 "Mit deinem QR-Code stimmt etwas nicht. Bitte wende dich an deinen Administrator.")
+
 
 def json_daten_ausgeben(daten):
     """
@@ -63,122 +82,322 @@ def json_daten_ausgeben(daten):
         return
 
 
-def qr_code_lesen(cap_video):
+def kamera_profil():
     """
-    Liest QR-Codes vor der Kamera.
+    Returns:
+        dict: Kamera-Eigenschaften laut CAMERA_PROFILE und den einzelnen Abweichungen davon.
+    """
+    if config.CAMERA_PROFILE not in kamera.PROFILE:
+        logger.error("Unbekanntes Kameraprofil '%s', möglich: %s. Verwende die Einstellungen des Treibers.",
+                     config.CAMERA_PROFILE, ", ".join(kamera.PROFILE))
+    profil = dict(kamera.PROFILE.get(config.CAMERA_PROFILE, {}))
+    aufloesung = kamera.aufloesung_parse(config.CAMERA_RESOLUTION)
+    if aufloesung:
+        profil["aufloesung"] = aufloesung
+    if config.CAMERA_FPS > 0:
+        profil["fps"] = config.CAMERA_FPS
+    if config.CAMERA_FOURCC:
+        profil["fourcc"] = config.CAMERA_FOURCC
+    return kamera.profil_eigenschaften(**profil)
+
+
+def leerlauf_profil():
+    """
+    Returns:
+        dict: Kamera-Eigenschaften für den Leerlauf laut Konfiguration (leer = unverändert).
+    """
+    profil = {}
+    if config.QR_SLEEP_FPS > 0:
+        profil[cv2.CAP_PROP_FPS] = config.QR_SLEEP_FPS
+    aufloesung = kamera.aufloesung_parse(config.QR_SLEEP_RESOLUTION)
+    if aufloesung:
+        profil[cv2.CAP_PROP_FRAME_WIDTH], profil[cv2.CAP_PROP_FRAME_HEIGHT] = aufloesung
+    return profil
+
+
+def erstelle_planer(bildquelle):
+    """
+    Erstellt den Dekodier-Planer laut Konfiguration.
 
     Args:
-        cap_video (cv2.VideoCapture): Das VideoCapture-Objekt der Kamera.
+        bildquelle (kamera.KameraLeser): Der Kamera-Thread, dessen Profil im Leerlauf gewechselt wird.
+
+    Returns:
+        qr_planer.DekodierPlaner: Der Planer.
+    """
+    if not config.QR_MOTION_GATE:
+        # Ohne Bewegungserkennung gibt es weder "aktiv" noch Leerlauf
+        return qr_planer.DekodierPlaner(config.QR_DECODE_INTERVAL, config.QR_DECODE_INTERVAL,
+                                        leerlauf_nach=0, cpu_anteil=config.QR_DECODE_CPU_SHARE)
+    profil = leerlauf_profil()
+    return qr_planer.DekodierPlaner(
+        config.QR_DECODE_INTERVAL_ACTIVE, config.QR_DECODE_INTERVAL, config.QR_DECODE_INTERVAL_SLEEP,
+        config.QR_SLEEP_AFTER, config.QR_DECODE_CPU_SHARE,
+        umschalten=(lambda leerlauf: bildquelle.profil_setzen(profil if leerlauf else None)) if profil else None)
+
+
+def qr_code_lesen(bildquelle, scan_pipeline=None, dekodierung=None, planer=None, dedupe=None, sammler=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
     """
+    Liest QR-Codes vor der Kamera.
 
-    letzter_inhalt = None
-    wartezeit_aktiv = False
-    wartezeit_start = 0
-    wartezeit_dauer = 5  # in Sekunden
+    Args:
+        bildquelle (kamera.KameraLeser): Der laufende Kamera-Thread.
+        scan_pipeline (pipeline.ScanPipeline, optional): Wenn gesetzt, werden erkannte Codes
+                      nur eingereiht, die Kamera liest währenddessen weiter.
+        dekodierung (optional): Die Dekodierung (siehe qr_worker.erstelle_dekodierung).
+                                Standard: im eigenen Prozess mit config.QR_DECODER.
+        planer (qr_planer.DekodierPlaner, optional): Bestimmt die Abstände der Versuche.
+                                                     Standard: laut Konfiguration.
+        dedupe (dedupe_index.DedupeIndex, optional): Die zuletzt verarbeiteten Codes.
+        sammler (sammel_fenster.SammelFenster, optional): Fasst wiederholte Buchungen
+                 desselben Benutzercodes zusammen (siehe erstelle_sammler).
+    """
+    if dekodierung is None:
+        dekodierung = qr_worker.InProzessDekodierung(
+            qr_dekoder.erstelle_dekoder(config.QR_DECODER, config.QR_DECODER_SCALE))
+    if planer is None:
+        planer = erstelle_planer(bildquelle)
+    if dedupe is None:
+        dedupe = dedupe_index.DedupeIndex()
 
     letzte_dekodierung_zeit = 0
-    dekodierungs_intervall = 0.15  # Dekodieren alle 150 ms (ca. 6-7 Mal pro Sekunde)
-
-    with open(os.devnull, 'w', encoding='utf-8') as devnull_file:
-        while True:
-            # 1. Immer einen Frame lesen, um den OpenCV-Kamerabuffer frisch zu halten
-            ret, frame = cap_video.read()
-            if not ret:
-                logger.error("Frame konnte nicht gelesen werden!")
+    intervall = planer.intervall_ruhe
+
+    # Ohne Bewegung vor der Kamera wird nicht dekodiert, bei Bewegung dafür häufiger
+    bewegung = qr_vorfilter.BewegungsFilter(config.QR_MOTION_THRESHOLD,
+                                            config.QR_MOTION_HOLD) if config.QR_MOTION_GATE else None
+    suchbereich = qr_vorfilter.Suchbereich(qr_vorfilter.Suchbereich.parse(config.QR_ROI), config.QR_ROI_MARGIN)
+    bildgroesse = (0, 0)  # (hoehe, breite) des zuletzt eingereichten Bildes
+
+    while True:
+        # 1. Drosselung der Dekodierung zur CPU-Schonung; der Kamera-Thread liest
+        #    währenddessen weiter und hält nur das neueste Bild vor. In der Wartezeit
+        #    werden die Ergebnisse der Dekodier-Prozesse abgeholt.
+        pause = letzte_dekodierung_zeit + intervall - time.time()
+        treffer = dekodierung.ergebnisse(timeout=max(pause, 0))
+        for code in {t.text for t in treffer}:
+            # 2. Derselbe Code wird erst wieder verarbeitet, wenn er QR_SCAN_COOLDOWN Sekunden
+            #    nicht mehr erkannt wurde; andere Codes werden sofort verarbeitet.
+            if dedupe.neu(code, config.QR_SCAN_COOLDOWN, verlaengern=True):
+                code_verarbeiten(code, scan_pipeline, sammler)
+        if treffer:
+            suchbereich.gefunden(treffer[0].rechteck, *bildgroesse)
+            planer.aktivitaet()
+        if time.time() < letzte_dekodierung_zeit + intervall:
+            continue
+
+        frame = bildquelle.neuestes_bild(timeout=5)
+        if frame is None:
+            if not bildquelle.laeuft():
                 break
+            logger.warning("Kamera liefert keine Bilder.")
+            continue
+        letzte_dekodierung_zeit = time.time()
 
-            # 2. Cooldown-Handling (Kamera auslesen, aber Dekodierung überspringen)
-            if wartezeit_aktiv:
-                if time.time() - wartezeit_start >= wartezeit_dauer:
-                    # Wartezeit abgelaufen
-                    wartezeit_aktiv = False
-                    letzter_inhalt = None  # Zurücksetzen, um neue Erkennung zu ermöglichen
-                continue
-
-            # 3. Drosselung der Dekodierung zur CPU-Schonung
-            jetzt = time.time()
-            if jetzt - letzte_dekodierung_zeit >= dekodierungs_intervall:
-                letzte_dekodierung_zeit = jetzt
-
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                with redirect_stderr(devnull_file):
-                    decoded_objects = decode(gray)
-
-                for obj in decoded_objects:
-                    qr_data = obj.data.decode('utf-8')
-                    if qr_data != letzter_inhalt:
-                        werte_qr_code_aus(str(qr_data))
-                        letzter_inhalt = qr_data
-                        wartezeit_aktiv = True
-                        wartezeit_start = time.time()
-                        break
+        aktiv = bewegung is None or bewegung.aktiv(frame)
+        intervall = planer.intervall(aktiv, dekodierung.dekodierdauer)
+        if not aktiv:
+            continue
 
+        bildgroesse = frame.shape[:2]
+        dekodierung.einreichen(frame, suchbereich.bereiche(*bildgroesse))
 
-def werte_qr_code_aus(qr_code):
+
+def code_verarbeiten(qr_data, scan_pipeline=None, sammler=None):
     """
-    Führt Code entsprechend der Anweisung auf dem QR-Code aus.
+    Reicht einen erkannten Code an die Pipeline weiter oder wertet ihn direkt aus.
+
+    Args:
+        qr_data (str): Der Inhalt des QR-Codes.
+        scan_pipeline (pipeline.ScanPipeline, optional): Die Scan-Pipeline.
+        sammler (sammel_fenster.SammelFenster, optional): Nimmt Buchungscodes entgegen,
+                 die erst nach Ablauf des Fensters gemeinsam gebucht werden.
+    """
+    if sammler is not None and ist_buchungscode(str(qr_data)):
+        sound_ausgabe.play_sound_effect("scan", warten=False)
+        anzahl = sammler.scan(str(qr_data))
+        logger.info("Code %s: %d. Scan im Sammelfenster.", str(qr_data)[:10], anzahl)
+    elif scan_pipeline is None:
+        werte_qr_code_aus(str(qr_data))
+    elif scan_pipeline.einreichen(str(qr_data)):
+        if ist_benutzercode(qr_data):
+            sound_ausgabe.play_sound_effect("scan", warten=False)
+    else:
+        sound_ausgabe.play_sound_effect("error", warten=False)
+
+
+def erstelle_sammler(scan_pipeline=None):
+    """
+    Erstellt das Sammelfenster für Buchungscodes laut config.SCAN_COALESCE_WINDOW.
+
+    Args:
+        scan_pipeline (pipeline.ScanPipeline, optional): Erhält die gesammelten Scans als
+                      (Code, Anzahl); ohne Pipeline wird direkt gebucht und angesagt.
+
+    Returns:
+        sammel_fenster.SammelFenster or None: Das Sammelfenster oder None, wenn es deaktiviert ist.
+    """
+    if config.SCAN_COALESCE_WINDOW <= 0:
+        return None
+
+    def abschliessen(usercode, anzahl):
+        if scan_pipeline is None:
+            with api_client.scan_budget():
+                ansagen = usercode_auswerten(usercode, anzahl)
+            sound_ausgabe.ansagen_abspielen(ansagen)
+        elif not scan_pipeline.einreichen((usercode, anzahl)):
+            logger.error("Pipeline voll, %d Scan(s) von Code %s wurden nicht gebucht.", anzahl, usercode[:10])
+            sound_ausgabe.play_sound_effect("error", warten=False)
+
+    return sammel_fenster.SammelFenster(config.SCAN_COALESCE_WINDOW, abschliessen, "qr")
+
+
+def ist_benutzercode(qr_code):
+    """
+    Prüft, ob es sich um einen Benutzercode handelt (11 Stellen).
+
+    Args:
+        qr_code (str): Der Inhalt des gelesenen QR-Codes.
+
+    Returns:
+        bool: True bei einem Benutzercode.
+    """
+    return qr_code != ADMIN_CODE and len(qr_code) == 11
+
+
+def ist_buchungscode(qr_code):
+    """
+    Prüft, ob ein Benutzercode eine Buchung auslöst (Aktion "a").
 
     Args:
         qr_code (str): Der Inhalt des gelesenen QR-Codes.
+
+    Returns:
+        bool: True bei einem Buchungscode.
+    """
+    return ist_benutzercode(qr_code) and qr_code[-1] == "a"
+
+
+def qr_code_auswerten(auftrag):
+    """
+    Führt die Anweisung auf dem QR-Code aus und liefert das akustische Feedback.
+
+    Wird als API-Stufe der Pipeline verwendet, die Ansagen spielt der Feedback-Worker ab.
+
+    Args:
+        auftrag (str or tuple): Der Inhalt des gelesenen QR-Codes oder (Inhalt, Anzahl)
+                                aus dem Sammelfenster.
+
+    Returns:
+        list: Liste von (Sound, Text) für sound_ausgabe.ansagen_abspielen.
     """
+    qr_code, anzahl = sammel_fenster.aufteilen(auftrag)
     # logger.info("Code gelesen: %s", qr_code)
-    if (qr_code) == "39b3bca191be67164317227fec3bed":
+    if qr_code == ADMIN_CODE:
         daten_alle = api_client.daten_lesen_alle()
         json_daten_ausgeben(daten_alle)
+        return []
+    if ist_benutzercode(qr_code):
+        with api_client.scan_budget():
+            return usercode_auswerten(qr_code, anzahl)
+    logger.warning("Unbekannter Code: %s", qr_code)
+    return []
+
+
+def werte_qr_code_aus(qr_code):
+    """
+    Führt Code entsprechend der Anweisung auf dem QR-Code aus.
+
+    Args:
+        qr_code (str): Der Inhalt des gelesenen QR-Codes.
+    """
+    if ist_benutzercode(qr_code):
+        its_a_usercode(qr_code)
     else:
-        if (len(qr_code)) == 11:
-            its_a_usercode(qr_code)
-        else:
-            logger.warning("Unbekannter Code: %s", qr_code)
+        sound_ausgabe.ansagen_abspielen(qr_code_auswerten(qr_code))
 
 
-def its_a_usercode(usercode):
+def usercode_auswerten(usercode, anzahl=1):
     """
-    Wenn es sich um einen Benutzercode handelt wird entsprechend der Aktion verfahren.
+    Führt die Aktion eines Benutzercodes über die API aus und ermittelt das Feedback.
 
     Args:
         usercode (str): Der gelesene Benutzercode.
+        anzahl (int): Anzahl der gebuchten Artikel bei Aktion "a" (mehrere Scans im Sammelfenster).
+
+    Returns:
+        list: Liste von (Sound, Text) für sound_ausgabe.ansagen_abspielen.
     """
 
     code = usercode[:10]  # die ersten 10 Stellen des usercodes sind dem Benutzer zugeordnet
     aktion = usercode[-1]  # letztes Zeichen im usercode bestimmt die auszuführende Aktion
     beschreibung = config.MY_NAME
 
-    logger.info("Benutzer: %s - Aktion: %s.", code, aktion)
-
-    # beep sound wenn Token gescannt wurde
-    sound_ausgabe.play_sound_effect("scan")
+    logger.info("Benutzer: %s - Aktion: %s - Anzahl: %d.", code, aktion, anzahl)
 
     if (aktion) == "a":
-        # lade den Benutzer aus der DB
-        response = api_client.person_transaktion_erstellen(code, beschreibung)
-        if response is None:
-            sound_ausgabe.sprich_text("error", "API-Fehler, bitte informiere einen Administrator.", sprache="de")
-        elif response.json().get('action') == 'block':
-            sound_ausgabe.sprich_text("blocked", f"{response.json()['message']}", sprache="de")
-        elif response.json().get('action') == 'locked':
-            sound_ausgabe.sprich_text("locked", f"{response.json()['message']}", sprache="de")
-        else:
-            new_saldo = int(response.json().get('saldo'))
-            if new_saldo == 0:
-                sound_ausgabe.sprich_text("zero_balance", f"Grüße {response.json().get('vorname')}! Dein Kontostand beträgt momentan {new_saldo}€.", sprache="de")
-            else:
-                sound_ausgabe.sprich_text("success", f"{response.json()['message']}", sprache="de")
-            sound_ausgabe.play_sound_effect("transaction_end")
-    elif (aktion) == "k":
-        # Personendaten und aktuelles Saldo holen
-        abfrage = api_client.person_daten_lesen(code)
-        if abfrage:
-            nachname, vorname, saldo = abfrage
-            logger.info("Der Saldo für %s %s ist %s€.", vorname, nachname, saldo)
-            sound_ausgabe.sprich_text("info", f"Grüße {vorname}! Dein Kontostand beträgt momentan {saldo}€.", sprache="de")
-        else:
-            sound_ausgabe.sprich_text("error", "Benutzer nicht gefunden oder API-Fehler.", sprache="de")
-    else:
-        logger.error("Mit dem QR-Code stimmt etwas nicht!")
-        sound_ausgabe.sprich_text("error", "Mit deinem QR-Code stimmt etwas nicht. Bitte wende dich an deinen Administrator.", sprache="de")
+        return _buchung_ausfuehren(code, beschreibung, anzahl)
+    if (aktion) == "k":
+        return _kontostand_abfragen(code)
+    logger.error("Mit dem QR-Code stimmt etwas nicht!")
+    return [("error", "Mit deinem QR-Code stimmt etwas nicht. Bitte wende dich an deinen Administrator.")]
+
+
+def _buchung_ausfuehren(code, beschreibung, anzahl):
+    """Aktion "a": bucht für den Benutzer und liefert das Feedback."""
+    # lade den Benutzer aus der DB
+    response, vorgemerkt = api_client.transaktion_buchen("person", code, beschreibung, anzahl)
+    if vorgemerkt:
+        return [("success", OFFLINE_ANSAGE)]
+    if response is None:
+        if not api_client.api_erreichbar():
+            return [("error", KEINE_VERBINDUNG_ANSAGE)]
+        return [("error", API_FEHLER_ANSAGE)]
+    antwort_json = response.json()
+    sperre = {'block': "blocked", 'locked': "locked"}.get(antwort_json.get('action'))
+    if sperre:
+        return [(sperre, f"{antwort_json['message']}")]
+    new_saldo = int(antwort_json.get('saldo'))
+    if new_saldo == 0:
+        return [("zero_balance", f"Grüße {antwort_json.get('vorname')}! Dein Kontostand beträgt momentan {new_saldo}€."),
+                ("transaction_end", None)]
+    return [("success", f"{antwort_json['message']}"), ("transaction_end", None)]
+
+
+def _kontostand_abfragen(code):
+    """Aktion "k": liest den Kontostand (bevorzugt aus dem Personen-Cache) und liefert das Feedback."""
+    abfrage = api_client.person_daten_lesen(code)
+    if abfrage:
+        nachname, vorname, saldo = abfrage
+        logger.info("Der Saldo für %s %s ist %s€.", vorname, nachname, saldo)
+        return [("info", f"Grüße {vorname}! Dein Kontostand beträgt momentan {saldo}€.")]
+    if not api_client.api_erreichbar():
+        return [("error", KEINE_VERBINDUNG_ANSAGE)]
+    return [("error", "Benutzer nicht gefunden oder API-Fehler.")]
 
 
+def its_a_usercode(usercode):
+    """
+    Wenn es sich um einen Benutzercode handelt wird entsprechend der Aktion verfahren.
+
+    Args:
+        usercode (str): Der gelesene Benutzercode.
+    """
+
+    # Die API-Anfrage startet, während der Piepton noch läuft
+    piepton = sound_ausgabe.starte_sound_effect("scan")
+    with api_client.scan_budget():
+        ansagen = usercode_auswerten(usercode)
+    sound_ausgabe.ansagen_abspielen(ansagen, vorher=piepton)
+
+
+def beenden_bei_sigterm(signum, frame):  # pylint: disable=unused-argument
+    """
+    Behandelt SIGTERM (systemctl stop) wie Strg+C, damit die finally-Blöcke offene Scans
+    im Sammelfenster noch buchen. Ein weiteres SIGTERM unterbricht das Aufräumen nicht.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
 
 
 def exit_gracefully(cap_video=None):
@@ -190,6 +409,7 @@ def exit_gracefully(cap_video=None):
     """
 
     logger.info('Räume auf und beende das Programm ordentlich')
+    api_client.verbindungen_schliessen()
     if cap_video:
         cap_video.release()
         cv2.destroyAllWindows()
@@ -197,21 +417,47 @@ def exit_gracefully(cap_video=None):
 
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, beenden_bei_sigterm)
     config.validate_config()
+    sound_ausgabe.initialisieren()
+    cap = None  # pylint: disable=C0103
+    kamera_leser = None  # pylint: disable=C0103
+    qr_pipeline = None  # pylint: disable=C0103
+    journal_replay = None  # pylint: disable=C0103
+    health_monitor = None  # pylint: disable=C0103
+    qr_dekodierung = None  # pylint: disable=C0103
+    qr_sammler = None  # pylint: disable=C0103
 
     try:
-        health_status = api_client.healthcheck()
+        # Healthcheck, Version und Benutzerliste gleichzeitig abfragen
+        health_status, version, alle_personen = ereignis_schleife.SCHLEIFE.ausfuehren(
+            api_client_async.startdaten_lesen(mit_personen=True))
         if health_status is None:
             logger.critical("Healthcheck fehlgeschlagen. Beende Skript")
             sys.exit(1)
 
-        version = api_client.get_api_version()
+        # Begrüßungen aller Benutzer als Bausteine vorbereiten
+        alle_personen = alle_personen or []
+        sound_ausgabe.fragmente_vorrendern(
+            f"Grüße {person['vorname']}! Dein Kontostand beträgt momentan 0€."
+            for person in alle_personen if isinstance(person, dict) and person.get('vorname'))
+        sound_ausgabe.ansagen_vorrendern(VORAB_ANSAGEN)
 
         cap = cv2.VideoCapture(config.CAMERA_INDEX)
         if not cap.isOpened():
             raise IOError("Kamera konnte nicht geöffnet werden.")
+        if config.PIPELINE_ENABLED:
+            qr_pipeline = pipeline.ScanPipeline("qr", qr_code_auswerten, sound_ausgabe.ansagen_abspielen,
+                                                config.PIPELINE_QUEUE_SIZE, config.PIPELINE_TIMEOUT)
+        journal_replay = api_client.journal_replay_starten()
+        health_monitor = api_client.health_monitor_starten()
+        qr_dekodierung = qr_worker.erstelle_dekodierung(config.QR_DECODE_PROCESSES, config.QR_DECODER,
+                                                         config.QR_DECODER_SCALE)
+        kamera_leser = kamera.KameraLeser(cap, config.CAMERA_BUFFER_SIZE, kamera_profil())
+        kamera_leser.starten()
+        qr_sammler = erstelle_sammler(qr_pipeline)
         logger.info("Bereitschaft (Version %s).", version)
-        qr_code_lesen(cap)
+        qr_code_lesen(kamera_leser, qr_pipeline, qr_dekodierung, sammler=qr_sammler)
     except ImportError as e:
         logger.critical("Ein Importfehler ist aufgetreten: %s.", e)
     except IOError as e:
@@ -222,6 +468,24 @@ if __name__ == "__main__":
         logger.critical("Ein unerwarteter Fehler im Hauptteil ist aufgetreten: %s", e)
         sys.exit(1)
     finally:
+        if kamera_leser is not None:
+            kamera_leser.stoppen()
+            logger.info("Kamera: %s", kamera_leser.statistik())
+        if qr_dekodierung is not None:
+            qr_dekodierung.stoppen()
+            logger.info("QR-Dekodierung: %s", qr_dekodierung.statistik())
+        if qr_sammler is not None:
+            # Offene Scans buchen, solange die Pipeline noch läuft
+            qr_sammler.stoppen()
+            logger.info("Sammelfenster: %s", qr_sammler.statistik())
+        if qr_pipeline is not None:
+            qr_pipeline.stoppen()
+        if journal_replay is not None:
+            journal_replay.stoppen()
+        if health_monitor is not None:
+            health_monitor.stoppen()
+        if api_client.PERSONEN_CACHE:
+            logger.info("Personen-Cache: %s", api_client.PERSONEN_CACHE.statistik())
         if cap and cap.isOpened():
             exit_gracefully(cap)
         exit_gracefully()
@@ -0,0 +1,126 @@
+"""Fasst wiederholte Scans desselben Tokens oder Codes zu einer Buchung mit Anzahl zusammen."""
+
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def aufteilen(auftrag):
+    """
+    Zerlegt einen Pipeline-Auftrag in Schlüssel und Anzahl.
+
+    Args:
+        auftrag (str or tuple): Ein einzelner Scan oder (Schlüssel, Anzahl) aus dem Sammelfenster.
+
+    Returns:
+        tuple: (Schlüssel, Anzahl)
+    """
+    if isinstance(auftrag, tuple):
+        return auftrag
+    return auftrag, 1
+
+
+class SammelFenster:  # pylint: disable=too-many-instance-attributes
+    """
+    Sammelt die Scans je Schlüssel und bucht sie gemeinsam, sobald das Fenster abläuft.
+
+    Wer vier Getränke nimmt, scannt viermal; statt vier Buchungen und vier
+    Ansagen gibt es eine Buchung mit Anzahl 4 und eine Ansage. Das Fenster
+    beginnt mit jedem Scan desselben Schlüssels neu, andere Schlüssel laufen
+    unabhängig davon. Die Fristen liegen wie im dedupe_index.DedupeIndex in
+    einem Heap, veraltete Einträge werden beim Entnehmen übersprungen.
+    """
+
+    def __init__(self, fenster, abschliessen, name="scans"):
+        """
+        Args:
+            fenster (float): Sekunden nach dem letzten Scan, bis gebucht wird.
+            abschliessen (callable): Wird im Thread des Sammelfensters mit (Schlüssel, Anzahl) aufgerufen.
+            name (str): Name für Thread und Logs (z.B. "nfc" oder "qr").
+        """
+        self.fenster = fenster
+        self.abschliessen = abschliessen
+        self._offen = {}  # Schlüssel -> [Anzahl, Frist (time.monotonic)]
+        self._heap = []   # (Frist, Schlüssel), früheste zuerst
+        self._beendet = False
+        self._zaehler = {"scans": 0, "buchungen": 0}
+        self._bedingung = threading.Condition()
+        self._thread = threading.Thread(target=self._lauf, name=f"sammeln-{name}", daemon=True)
+        self._thread.start()
+
+    def scan(self, schluessel):
+        """
+        Zählt einen Scan und startet das Fenster des Schlüssels neu.
+
+        Args:
+            schluessel (str): Der Token oder Code.
+
+        Returns:
+            int: Anzahl der bisher gesammelten Scans dieses Schlüssels.
+        """
+        frist = time.monotonic() + self.fenster
+        with self._bedingung:
+            eintrag = self._offen.setdefault(schluessel, [0, frist])
+            eintrag[0] += 1
+            eintrag[1] = frist
+            heapq.heappush(self._heap, (frist, schluessel))
+            self._zaehler["scans"] += 1
+            self._bedingung.notify()
+            return eintrag[0]
+
+    def stoppen(self, timeout=5.0):
+        """
+        Bucht alle noch offenen Scans sofort und beendet den Thread.
+
+        Args:
+            timeout (float): Maximale Wartezeit in Sekunden.
+        """
+        with self._bedingung:
+            self._beendet = True
+            self._bedingung.notify()
+        self._thread.join(timeout)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Anzahl gesammelter Scans, daraus entstandener Buchungen und offener Schlüssel.
+        """
+        with self._bedingung:
+            return {"offen": len(self._offen), **self._zaehler}
+
+    def _lauf(self):
+        beendet = False
+        while not beendet:
+            with self._bedingung:
+                while True:
+                    beendet = self._beendet
+                    faellig = self._entnehmen(None if beendet else time.monotonic())
+                    if faellig or beendet:
+                        break
+                    self._bedingung.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                self._zaehler["buchungen"] += len(faellig)
+            for schluessel, anzahl in faellig:
+                logger.info("Sammelfenster für %s abgelaufen, buche %d Scan(s).", schluessel, anzahl)
+                try:
+                    self.abschliessen(schluessel, anzahl)
+                except Exception as e:  # pylint: disable=W0718
+                    logger.error("Fehler beim Buchen von %d Scan(s) für %s: %s", anzahl, schluessel, e, exc_info=True)
+
+    def _entnehmen(self, bis):
+        """Entnimmt alle Schlüssel mit Frist bis `bis` (None = alle) als Liste von (Schlüssel, Anzahl)."""
+        if bis is None:
+            faellig = [(schluessel, eintrag[0]) for schluessel, eintrag in self._offen.items()]
+            self._offen.clear()
+            self._heap.clear()
+            return faellig
+        faellig = []
+        while self._heap and self._heap[0][0] <= bis:
+            frist, schluessel = heapq.heappop(self._heap)
+            eintrag = self._offen.get(schluessel)
+            if eintrag is not None and eintrag[1] == frist:
+                del self._offen[schluessel]
+                faellig.append((schluessel, eintrag[0]))
+        return faellig
@@ -1,15 +1,23 @@
 """ Test App für Sprachsynthese mit Pygame und gTTS """
 
+import atexit
+import functools
 import os
 import logging
-import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import redirect_stdout
 from io import StringIO
 with redirect_stdout(StringIO()):
     import pygame
-import asyncio
 import edge_tts
+import audio_engine
 import config
+import ereignis_schleife
+import tts_cache
+import tts_fragmente
+import tts_stream
 
 DEFAULT_VOICES = {
     "de": "de-DE-KillianNeural",
@@ -23,79 +31,132 @@ EVENT_SOUND_MAP = config.SOUND_CONFIG
 
 logger = logging.getLogger(__name__)
 
+SOUND_VERZEICHNIS = "static/sounds/"
+
+# Besitzt den Mixer für die gesamte Prozesslaufzeit
+AUDIO_ENGINE = audio_engine.AudioEngine(SOUND_VERZEICHNIS)
+atexit.register(AUDIO_ENGINE.beenden)
+
+# Persistenter Cache für bereits synthetisierte Ansagen
+TTS_CACHE = (tts_cache.TTSCache(config.TTS_CACHE_DIR, config.TTS_CACHE_MAX_MB * 1024 * 1024)
+             if config.TTS_CACHE_MAX_MB > 0 else None)
+
+# Bereitet Ansagen im Hintergrund vor, während noch ein Piepton oder eine andere Ansage läuft
+VORBEREITUNG = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts-vorbereiten")
+
 
 def _initialize_mixer():
-    """Initializes pygame.mixer if not already initialized."""
+    """Initialisiert die Audio-Engine (Mixer und vorgeladene Soundeffekte), falls nötig."""
+    AUDIO_ENGINE.starten()
 
-    if not pygame.mixer.get_init():
-        try:
-            pygame.mixer.init()
-            logging.debug("Pygame mixer wurde initialisiert.")
-        except pygame.error as e:  # pylint: disable=no-member
-            logging.error("Pygame-Mixer konnte nicht initialisiert werden: %s", e)
-            raise  # Re-raise the exception to be caught by the main function
 
+def initialisieren() -> bool:
+    """
+    Öffnet das Audiogerät und dekodiert alle Soundeffekte vorab.
+
+    Sollte beim Programmstart aufgerufen werden, damit der erste Scan-Ton ohne
+    Verzögerung abgespielt wird.
 
-def play_sound_effect(sound_datei_name: str | None) -> bool:
+    Returns:
+        bool: True, wenn die Audio-Engine bereit ist.
     """
-    Spielt einen Soundeffekt ab, falls angegeben und gefunden.
+    try:
+        _initialize_mixer()
+        return True
+    except pygame.error:  # pylint: disable=no-member
+        return False
 
-    Args:
-        sound_datei_name (str | None): Der Name der Sounddatei (z. B. "alarm"),
-                                       ein Event-Name oder None.
+
+def beenden() -> None:
+    """Stoppt alle Wiedergaben und gibt das Audiogerät frei."""
+    AUDIO_ENGINE.beenden()
+
+
+def _starte_effekt(sound_datei_name: str | None):
+    """
+    Startet einen Soundeffekt, ohne auf dessen Ende zu warten.
 
     Returns:
-        bool: True, wenn kein Sound angefordert, deaktiviert oder der Sound erfolgreich
-              abgespielt wurde. False, bei einem Fehler oder wenn die Datei
-              nicht gefunden wurde.
+        tuple: (Erfolg wie bei play_sound_effect, audio_engine.Wiedergabe oder None)
     """
 
     if not sound_datei_name:
-        return True
+        return True, None
 
     resolved_name = EVENT_SOUND_MAP.get(sound_datei_name, sound_datei_name)
 
     if not resolved_name or str(resolved_name).lower() in ("none", "false", ""):
         logging.debug("Sound-Ausgabe deaktiviert für: %s", sound_datei_name)
-        return True
-
-    sound_datei_name = resolved_name
+        return True, None
 
-    if not pygame.mixer.get_init():
-        try:
-            _initialize_mixer()
-        except pygame.error:  # pylint: disable=no-member
-            logging.error("Pygame-Mixer konnte nicht initialisiert werden.")
-            return False
+    sound_name = resolved_name[:-4] if resolved_name.endswith(".mp3") else resolved_name
 
-    success = False
-    full_sound_path = ""
     try:
-        base_path = "static/sounds/"
-        sound_file = f"{sound_datei_name}.mp3" if not sound_datei_name.endswith(".mp3") else sound_datei_name
-        full_sound_path = os.path.join(base_path, sound_file)
+        _initialize_mixer()
+    except pygame.error:  # pylint: disable=no-member
+        logging.error("Pygame-Mixer konnte nicht initialisiert werden.")
+        return False, None
 
-        if not os.path.exists(full_sound_path):
-            logging.warning("Sound-Datei nicht gefunden: %s", full_sound_path)
-        else:
-            effekt = pygame.mixer.Sound(full_sound_path)
-            logging.info("Spiele Soundeffekt ab: %s", full_sound_path)
-            effekt.play()
-            time.sleep(effekt.get_length())  # Warten, bis der Sound zu Ende ist
-            success = True
+    try:
+        effekt = AUDIO_ENGINE.sound(sound_name)
+        if effekt is None:
+            logging.warning("Sound-Datei nicht gefunden: %s", os.path.join(SOUND_VERZEICHNIS, f"{sound_name}.mp3"))
+            return False, None
+        logging.info("Spiele Soundeffekt ab: %s", sound_name)
+        return True, AUDIO_ENGINE.abspielen(effekt)
 
     except pygame.error as e:  # pylint: disable=no-member
-        logging.error("Pygame-Fehler beim Abspielen des Sounds '%s': %s", full_sound_path, e)
+        logging.error("Pygame-Fehler beim Abspielen des Sounds '%s': %s", sound_name, e)
 
     except Exception as e:  # pylint: disable=W0718
         logging.error("Unerwarteter Fehler in play_sound_effect: %s", e, exc_info=True)
 
+    return False, None
+
+
+def starte_sound_effect(sound_datei_name: str | None):
+    """
+    Startet einen Soundeffekt, ohne zu blockieren.
+
+    Args:
+        sound_datei_name (str | None): Der Name der Sounddatei (z. B. "alarm"),
+                                       ein Event-Name oder None.
+
+    Returns:
+        audio_engine.Wiedergabe | None: Handle der laufenden Wiedergabe oder None,
+                                        wenn nichts abgespielt wird.
+    """
+    return _starte_effekt(sound_datei_name)[1]
+
+
+def play_sound_effect(sound_datei_name: str | None, warten: bool = True) -> bool:
+    """
+    Spielt einen Soundeffekt ab, falls angegeben und gefunden.
+
+    Args:
+        sound_datei_name (str | None): Der Name der Sounddatei (z. B. "alarm"),
+                                       ein Event-Name oder None.
+        warten (bool, optional): Wenn True, kehrt die Funktion erst nach dem Ende
+                                 des Sounds zurück. Standard: True.
+
+    Returns:
+        bool: True, wenn kein Sound angefordert, deaktiviert oder der Sound erfolgreich
+              abgespielt wurde. False, bei einem Fehler oder wenn die Datei
+              nicht gefunden wurde.
+    """
+
+    success, wiedergabe = _starte_effekt(sound_datei_name)
+    if wiedergabe and warten:
+        wiedergabe.warte()  # Warten, bis der Sound zu Ende ist
     return success
 
 
 def _cleanup_tts_resources(filename: str | None = None) -> None:
     """
-    Stoppt den Pygame-Mixer und entfernt optional die TTS-Ausgabedatei.
+    Entfernt optional die temporäre TTS-Ausgabedatei.
+
+    Der Mixer bleibt geöffnet, er gehört der Audio-Engine und wird erst beim
+    Programmende freigegeben.
 
     Args:
         filename (str, optional): Der Name der temporären TTS-Datei, die entfernt
@@ -103,17 +164,6 @@ def _cleanup_tts_resources(filename: str | None = None) -> None:
                                   entfernt. Standard ist None.
     """
 
-    # pylint: disable=no-member
-    if pygame.mixer.get_init():
-        try:
-            # Stellt sicher, dass die Musik gestoppt ist, bevor der Mixer beendet wird
-            if pygame.mixer.music.get_busy():
-                pygame.mixer.music.stop()
-            pygame.mixer.quit()
-            logging.debug("Pygame-Mixer wurde beendet.")
-        except pygame.error as e:
-            logging.error("Fehler beim Beenden des Pygame-Mixers: %s", e)
-
     # Datei nur entfernen, wenn ein Dateiname angegeben wurde und existiert
     if filename and os.path.exists(filename):
         try:
@@ -129,31 +179,219 @@ async def _generate_tts_edge(text: str, voice: str, rate: str, filename: str) ->
     await communicate.save(filename)
 
 
-def sprich_text(sound_datei=None, text="Hier ist was kaputt!", sprache='de', slow=False):
+def _synthetisiere_in_cache(text: str, voice: str, rate: str) -> str:
+    """
+    Erzeugt eine Ansage mit edge-tts und legt sie im TTS-Cache ab.
+
+    Args:
+        text (str): Der Text, der gesprochen werden soll.
+        voice (str): Die Stimme.
+        rate (str): Die Sprechgeschwindigkeit.
+
+    Returns:
+        str: Pfad der Datei im Cache.
+    """
+    temp_filename = TTS_CACHE.neue_temp_datei()
+    try:
+        logging.debug("Erzeuge TTS für: '%s' mit Stimme %s", text, voice)
+        ereignis_schleife.SCHLEIFE.ausfuehren(_generate_tts_edge(text, voice, rate, temp_filename))
+        return TTS_CACHE.speichere_datei(text, voice, rate, temp_filename)
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+
+# Zusammensetzen dynamischer Ansagen aus einzeln gecachten Textbausteinen
+FRAGMENT_SYNTHESE = (tts_fragmente.FragmentSynthese(TTS_CACHE, _synthetisiere_in_cache,
+                                                     pause_ms=config.TTS_FRAGMENT_PAUSE_MS,
+                                                     satz_pause_ms=config.TTS_SATZ_PAUSE_MS)
+                     if TTS_CACHE and config.TTS_FRAGMENTS else None)
+
+
+def _bestimme_stimme(sprache='de', slow=False):
+    """Liefert Stimme und Sprechgeschwindigkeit für edge-tts."""
+    voice = config.TTS_VOICE
+    if not voice:
+        voice = DEFAULT_VOICES.get(sprache, "de-DE-KillianNeural")
+    rate = "-20%" if slow else "+0%"
+    return voice, rate
+
+
+def fragmente_vorrendern(texte=None, sprache='de', slow=False):
+    """
+    Erzeugt häufig benötigte Textbausteine im Hintergrund vorab.
+
+    Vorab erzeugt werden kleine Zahlen, "minus", "Komma", "Euro" sowie die
+    Bausteine der übergebenen Texte (z.B. Begrüßungen mit Vornamen).
+
+    Args:
+        texte (iterable[str], optional): Zusätzliche Ansagen, deren Bausteine erzeugt werden sollen.
+        sprache (str, optional): Sprachcode (z.B. 'de'). Standard: 'de'.
+        slow (bool, optional): Wenn True, für langsame Sprechgeschwindigkeit. Standard: False.
+
+    Returns:
+        threading.Thread or None: Der Hintergrund-Thread oder None, wenn die Bausteine deaktiviert sind.
+    """
+    if FRAGMENT_SYNTHESE is None:
+        return None
+
+    voice, rate = _bestimme_stimme(sprache, slow)
+    bausteine = ["minus", "Komma", "Euro", "Euro."]
+    bausteine += [str(zahl) for zahl in range(config.TTS_FRAGMENT_ZAHLEN_MAX + 1)]
+    bausteine += [f"{zahl}." for zahl in range(config.TTS_FRAGMENT_ZAHLEN_MAX + 1)]
+    for text in texte or []:
+        bausteine += tts_fragmente.zerlege(text)
+
+    def _vorrendern():
+        neu = FRAGMENT_SYNTHESE.vorrendern(dict.fromkeys(bausteine), voice, rate)
+        logging.info("TTS-Bausteine vorbereitet (%d neu erzeugt).", neu)
+
+    thread = threading.Thread(target=_vorrendern, name="tts-vorrendern", daemon=True)
+    thread.start()
+    return thread
+
+
+def ansagen_vorrendern(texte, sprache='de', slow=False):
+    """
+    Erzeugt feste Ansagen im Hintergrund vorab und legt sie als Ganzes im TTS-Cache ab.
+
+    Gedacht für die möglichen Ergebnisse eines Scans, die schon vorher feststehen
+    (z.B. "Keine Verbindung zum Server."). Gerade bei fehlender Verbindung kann
+    edge-tts sie nicht mehr live erzeugen.
+
+    Args:
+        texte (iterable[str]): Die Ansagen.
+        sprache (str, optional): Sprachcode (z.B. 'de'). Standard: 'de'.
+        slow (bool, optional): Wenn True, für langsame Sprechgeschwindigkeit. Standard: False.
+
+    Returns:
+        threading.Thread or None: Der Hintergrund-Thread oder None ohne TTS-Cache.
+    """
+    if TTS_CACHE is None:
+        return None
+
+    voice, rate = _bestimme_stimme(sprache, slow)
+    texte = list(dict.fromkeys(texte))
+
+    def _vorrendern():
+        neu = 0
+        for text in texte:
+            if TTS_CACHE.enthaelt(text, voice, rate):
+                continue
+            try:
+                _synthetisiere_in_cache(text, voice, rate)
+                neu += 1
+            except Exception as e:  # pylint: disable=W0718
+                logging.warning("Ansage '%s' konnte nicht vorab erzeugt werden: %s", text, e)
+        logging.info("Feste Ansagen vorbereitet (%d neu erzeugt).", neu)
+
+    thread = threading.Thread(target=_vorrendern, name="tts-ansagen-vorrendern", daemon=True)
+    thread.start()
+    return thread
+
+
+def _bereite_ansage_vor(text, voice, rate):
+    """
+    Stellt die Audiodaten für eine Ansage bereit.
+
+    Reihenfolge: ganzer Text aus dem Cache, dynamischer Text aus Bausteinen,
+    ansonsten Live-Synthese mit edge-tts (gestreamt, falls TTS_STREAMING aktiv ist).
+
+    Args:
+        text (str): Der Text, der gesprochen werden soll.
+        voice (str): Die Stimme.
+        rate (str): Die Sprechgeschwindigkeit.
+
+    Returns:
+        tuple: (Pfad der MP3-Datei oder None, Pfad einer zu löschenden temporären Datei oder None,
+                zusammengesetzter pygame.mixer.Sound bzw. laufender tts_stream.TTSStream oder None)
+    """
+    cache_datei = TTS_CACHE.hole(text, voice, rate) if TTS_CACHE else None
+    if cache_datei:
+        logging.debug("TTS aus Cache: '%s' (%s)", text, cache_datei)
+        return cache_datei, None, None
+
+    if FRAGMENT_SYNTHESE and tts_fragmente.ist_dynamisch(text):
+        bausteine = tts_fragmente.zerlege(text)
+        if len(bausteine) > 1:
+            _initialize_mixer()
+            try:
+                ansage = FRAGMENT_SYNTHESE.zusammensetzen(bausteine, voice, rate)
+                logging.debug("TTS aus Bausteinen zusammengesetzt: %s", bausteine)
+                return None, None, ansage
+            except Exception as e:  # pylint: disable=W0718
+                logging.warning("Zusammensetzen aus Bausteinen fehlgeschlagen, erzeuge ganzen Text: %s", e)
+
+    if config.TTS_STREAMING:
+        # Wiedergabe beginnt, während edge-tts noch sendet; danach landet die Ansage im Cache
+        bei_fertig = functools.partial(TTS_CACHE.speichere_daten, text, voice, rate) if TTS_CACHE else None
+        return None, None, tts_stream.TTSStream(AUDIO_ENGINE, text, voice, rate, bei_fertig=bei_fertig)
+
+    if TTS_CACHE:
+        tts_filename = _synthetisiere_in_cache(text, voice, rate)
+        logging.debug("TTS gespeichert in %s", tts_filename)
+        return tts_filename, None, None
+
+    # Generiere das Audio via edge-tts (auf der gemeinsamen Ereignisschleife). Eigene
+    # Datei je Ansage, weil mehrere Ansagen gleichzeitig vorbereitet werden können.
+    datei, tts_filename = tempfile.mkstemp(prefix="tts-", suffix=".mp3")
+    os.close(datei)
+    logging.debug("Erzeuge TTS für: '%s' mit Stimme %s", text, voice)
+    try:
+        ereignis_schleife.SCHLEIFE.ausfuehren(_generate_tts_edge(text, voice, rate, tts_filename))
+    except Exception:
+        _cleanup_tts_resources(tts_filename)
+        raise
+    logging.debug("TTS gespeichert in %s", tts_filename)
+    return tts_filename, tts_filename, None
+
+
+def ansage_vorbereiten(text, sprache='de', slow=False):
+    """
+    Beginnt im Hintergrund mit der Vorbereitung einer Ansage (Cache, Bausteine oder Synthese).
+
+    Args:
+        text (str): Der Text, der gesprochen werden soll.
+        sprache (str, optional): Sprachcode (z.B. 'de'). Standard: 'de'.
+        slow (bool, optional): Wenn True, wird der Text langsamer gesprochen. Standard: False.
+
+    Returns:
+        concurrent.futures.Future: Für den Parameter `vorbereitung` von sprich_text.
+    """
+    voice, rate = _bestimme_stimme(sprache, slow)
+    return VORBEREITUNG.submit(_bereite_ansage_vor, text, voice, rate)
+
+
+def sprich_text(sound_datei=None, text="Hier ist was kaputt!", sprache='de', slow=False, vorbereitung=None):
     """
     Synthetisiert den übergebenen Text in Sprache und spielt ihn über Pygame ab.
 
+    Liegt ein dynamischer Text (mit Zahlen oder Beträgen) nicht als Ganzes im
+    Cache, wird er aus gecachten Bausteinen (Satzteile, Zahlen, Währung) zusammengesetzt.
+
     Args:
         sound_datei (str, optional): Name of the sound file (e.g., "alarm") to play before speech.
         text (str): Der Text, der gesprochen werden soll.
         sprache (str, optional): Sprachcode (z.B. 'de'). Standard: 'de'.
         slow (bool, optional): Wenn True, wird der Text langsamer gesprochen. Standard: False.
+        vorbereitung (concurrent.futures.Future, optional): Bereits begonnene Vorbereitung
+                     desselben Textes (siehe ansage_vorbereiten).
     """
 
-    temp_tts_filename = "output.mp3"
+    temp_tts_filename = None
+    tts_filename = None
 
     try:
-        # Bestimme die neuronale Stimme
-        voice = config.TTS_VOICE
-        if not voice:
-            voice = DEFAULT_VOICES.get(sprache, "de-DE-KillianNeural")
-
-        rate = "-20%" if slow else "+0%"
+        if vorbereitung is None:
+            vorbereitung = ansage_vorbereiten(text, sprache, slow)
+        tts_filename, temp_tts_filename, ansage = vorbereitung.result()
 
-        # Generiere das Audio via edge-tts (asynchroner Aufruf synchron ausgeführt)
-        logging.debug("Erzeuge TTS für: '%s' mit Stimme %s", text, voice)
-        asyncio.run(_generate_tts_edge(text, voice, rate, temp_tts_filename))
-        logging.debug("TTS gespeichert in %s", temp_tts_filename)
+        if isinstance(ansage, tts_stream.TTSStream):
+            # Effekt und Synthese laufen parallel, die Ansage folgt direkt auf den Effekt
+            logging.info("Spiele TTS ab '%s' (Stream)", text)
+            ansage.abspielen(starte_sound_effect(sound_datei))
+            logging.debug("TTS abspielen beendet.")
+            return
 
         play_sound_effect(sound_datei)
 
@@ -164,14 +402,14 @@ def sprich_text(sound_datei=None, text="Hier ist was kaputt!", sprache='de', slo
                 logging.error("Ich kann ohne pygame mixer nicht fortfahren.")
                 return
 
-        # Play the generated speech
-        pygame.mixer.music.load(temp_tts_filename)
-        logging.info("Spiele TTS ab '%s' aus Datei %s", text, temp_tts_filename)
-        pygame.mixer.music.play()
+        if ansage is None:
+            ansage = pygame.mixer.Sound(tts_filename)
+            logging.info("Spiele TTS ab '%s' aus Datei %s", text, tts_filename)
+        else:
+            logging.info("Spiele TTS ab '%s' aus Bausteinen", text)
 
-        # Wait for speech to finish
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
+        # Play the generated speech and wait for it to finish
+        AUDIO_ENGINE.abspielen(ansage).warte()
         logging.debug("TTS abspielen beendet.")
 
     except pygame.error as e:  # pylint: disable=no-member
@@ -179,14 +417,38 @@ def sprich_text(sound_datei=None, text="Hier ist was kaputt!", sprache='de', slo
         logging.error("Pygame Fehler während der TTS Wiedergabe: %s", e)
     except IOError as e:
         # This could be from saving the file
-        logging.error("IO Fehler (z.B. speichern von '%s'): %s", temp_tts_filename, e)
+        logging.error("IO Fehler (z.B. speichern von '%s'): %s", tts_filename, e)
     except Exception as e:  # pylint: disable=W0718
         logging.error("Ein unerwarteter Fehler bei sprich_text ist aufgetreten: %s", e, exc_info=True)
     finally:
-        # Cleanup resources regardless of success or failure
+        # Cleanup resources regardless of success or failure. Dateien im Cache bleiben erhalten.
         _cleanup_tts_resources(temp_tts_filename)
 
 
+def ansagen_abspielen(ansagen, vorher=None):
+    """
+    Spielt eine Folge von Soundeffekten und Ansagen nacheinander ab.
+
+    Alle Ansagen werden sofort vorbereitet, die Synthese läuft also schon, während
+    `vorher` (z.B. der Piepton beim Scan) oder eine vorherige Ansage noch spielt.
+
+    Args:
+        ansagen (list[tuple]): Liste von (Sound/Event-Name, Text). Ist der Text None,
+                               wird nur der Soundeffekt abgespielt.
+        vorher (audio_engine.Wiedergabe, optional): Eine laufende Wiedergabe, deren Ende
+                                                    vor der ersten Ausgabe abgewartet wird.
+    """
+    ansagen = list(ansagen or [])
+    vorbereitungen = [None if text is None else ansage_vorbereiten(text, sprache="de") for _, text in ansagen]
+    if vorher:
+        vorher.warte()
+    for (sound_datei, text), vorbereitung in zip(ansagen, vorbereitungen):
+        if text is None:
+            play_sound_effect(sound_datei)
+        else:
+            sprich_text(sound_datei, text, sprache="de", vorbereitung=vorbereitung)
+
+
 if __name__ == "__main__":
     play_sound_effect("beep1.mp3")
     # sprich_text("alarm", "Du hast kein Guthaben mehr, stell das Getränk zurück in den Schrank!", sprache="de")
@@ -0,0 +1,113 @@
+"""Merkt sich je Reader und ATR, wie ein NFC-Token identifiziert wird (UID oder ATS)."""
+
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+UID = "uid"
+ATS = "ats"
+GEMISCHT = "gemischt"  # der ATR kam mit beiden Strategien vor, keine Abkürzung
+
+
+class StrategieCache:
+    """
+    Klassifiziert Token nach Reader und ATR.
+
+    Handys melden eine Zufalls-UID (beginnt mit 08) und werden über die ATS
+    identifiziert; dafür sind zwei APDUs nötig (UID, dann ATS). Wurde ein ATR
+    `bestaetigungen` Mal hintereinander über die ATS identifiziert, wird bei
+    diesem ATR direkt die ATS gelesen. Damit eine Karte mit fester UID und
+    gleichem ATR auffällt, liest jeder `pruefintervall`-te dieser Scans trotzdem
+    zuerst die UID. Kommt derselbe ATR auch mit einer festen UID vor, wird er
+    dauerhaft als gemischt markiert, damit keine Karte mit fester UID über ihre
+    ATS identifiziert wird. Reguläre Karten brauchen ohnehin nur eine APDU (UID).
+
+    Zusätzlich wird gezählt, wie viele APDUs je Scan gesendet wurden.
+    """
+
+    def __init__(self, bestaetigungen=3, max_eintraege=256, pruefintervall=10):
+        """
+        Args:
+            bestaetigungen (int): Übereinstimmende Beobachtungen, bevor die ATS direkt gelesen wird,
+                                  0 = nie abkürzen (nur zählen).
+            max_eintraege (int): Maximale Anzahl gemerkter (Reader, ATR)-Paare.
+            pruefintervall (int): Jeder n-te abgekürzte Scan liest doch zuerst die UID, 0 = nie.
+        """
+        self.bestaetigungen = bestaetigungen
+        self.max_eintraege = max_eintraege
+        self.pruefintervall = pruefintervall
+        self._eintraege = {}  # (reader, atr) -> [strategie, anzahl, abgekürzte Scans]
+        self._apdus_je_scan = Counter()
+        self._lock = threading.Lock()
+
+    def strategie(self, reader, atr):
+        """
+        Args:
+            reader (str): Name des Readers.
+            atr (list[int]): ATR des Tokens.
+
+        Returns:
+            str or None: ATS, wenn direkt die ATS gelesen werden soll, sonst None (UID zuerst,
+                         das Ergebnis ist dann mit `beobachtet` zu melden).
+        """
+        if self.bestaetigungen <= 0 or not atr:
+            return None
+        with self._lock:
+            eintrag = self._eintraege.get((reader, tuple(atr)))
+            if not eintrag or eintrag[0] != ATS or eintrag[1] < self.bestaetigungen:
+                return None
+            eintrag[2] += 1
+            if self.pruefintervall > 0 and eintrag[2] % self.pruefintervall == 0:
+                return None  # Stichprobe: UID erneut prüfen
+        return ATS
+
+    def beobachtet(self, reader, atr, strategie):
+        """
+        Merkt sich, über welche Strategie ein Token identifiziert wurde.
+
+        Args:
+            reader (str): Name des Readers.
+            atr (list[int]): ATR des Tokens.
+            strategie (str): UID oder ATS.
+        """
+        if not atr:
+            return
+        schluessel = (reader, tuple(atr))
+        with self._lock:
+            eintrag = self._eintraege.get(schluessel)
+            if eintrag is None:
+                if len(self._eintraege) >= self.max_eintraege:
+                    return
+                self._eintraege[schluessel] = [strategie, 1, 0]
+            elif eintrag[0] == strategie:
+                eintrag[1] += 1
+            elif eintrag[0] != GEMISCHT:
+                logger.info("ATR %s auf %s kommt mit UID und ATS vor, keine Abkürzung.",
+                            bytes(atr).hex(" ").upper(), reader)
+                eintrag[0] = GEMISCHT
+
+    def scan_gezaehlt(self, apdus):
+        """
+        Zählt die APDUs eines Scans.
+
+        Args:
+            apdus (int): Anzahl der gesendeten APDUs.
+        """
+        with self._lock:
+            self._apdus_je_scan[apdus] += 1
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Scans je Anzahl APDUs, APDUs im Mittel und Anzahl der ATRs je Strategie.
+        """
+        with self._lock:
+            scans = sum(self._apdus_je_scan.values())
+            apdus = sum(anzahl * scans_ for anzahl, scans_ in self._apdus_je_scan.items())
+            return {
+                "apdus_je_scan": dict(sorted(self._apdus_je_scan.items())),
+                "apdus_mittel": round(apdus / scans, 2) if scans else 0.0,
+                "atrs": dict(Counter(eintrag[0] for eintrag in self._eintraege.values())),
+            }
@@ -0,0 +1,266 @@
+"""
+Lokales Journal aller Transaktionen (SQLite im WAL-Modus).
+
+Jede Buchung wird vor dem Senden an die API festgehalten. Ist die API nicht
+erreichbar, bleibt der Eintrag offen und wird im Hintergrund nachgetragen,
+sobald die Verbindung wieder steht. Die Eintrags-ID wird als Idempotency-Key
+mitgeschickt, damit ein wiederholtes Senden nicht doppelt bucht. Ob die Buchung
+ausgeführt wurde, wenn nach dem Senden keine Antwort kam, ist offen; solche
+Einträge stehen auf UNKLAR und werden nicht automatisch nachgetragen.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Status eines Journal-Eintrags
+SENDEN = "senden"          # wird gerade live gesendet
+OFFEN = "offen"            # wartet auf Nachtragen
+ERLEDIGT = "erledigt"      # von der API bestätigt (2xx)
+ABGELEHNT = "abgelehnt"    # von der API abgewiesen (4xx), wird nicht wiederholt
+UNKLAR = "unklar"          # gesendet, aber ohne Antwort (evtl. gebucht), wird nicht wiederholt
+
+# Sekunden, nach denen ein Eintrag im Status SENDEN als verwaist gilt (Prozess abgestürzt).
+# Deutlich länger als ein Sendeversuch samt Wiederholungen dauern kann.
+SENDEN_VERALTET = 300.0
+
+
+class TransaktionsJournal:
+    """
+    Persistentes Journal der Transaktionen eines oder mehrerer Terminals.
+
+    Mehrere Prozesse (z.B. NFC- und QR-Leser) können sich ein Journal teilen. Jeder
+    Eintrag im Status SENDEN trägt den Prozess, der ihn gerade sendet, und den
+    Zeitpunkt. Andere Prozesse übernehmen ihn erst, wenn er SENDEN_VERALTET
+    Sekunden alt ist, laufende Sendungen eines anderen Prozesses bleiben also unberührt.
+    """
+
+    def __init__(self, pfad):
+        """
+        Args:
+            pfad (str): Pfad der SQLite-Datenbank.
+        """
+        self.pfad = pfad
+        self.besitzer = f"{os.getpid()}@{time.time():.0f}"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(pfad, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS transaktionen (
+                id TEXT PRIMARY KEY,
+                art TEXT NOT NULL,
+                kennung TEXT NOT NULL,
+                beschreibung TEXT,
+                anzahl INTEGER NOT NULL DEFAULT 1,
+                terminal TEXT,
+                erstellt REAL NOT NULL,
+                status TEXT NOT NULL,
+                versuche INTEGER NOT NULL DEFAULT 0,
+                letzter_fehler TEXT,
+                abgeschlossen REAL,
+                besitzer TEXT,
+                gesendet_seit REAL
+            )""")
+        # Spalten, die in älteren Journalen fehlen
+        spalten = {zeile["name"] for zeile in self._db.execute("PRAGMA table_info(transaktionen)")}
+        for spalte, definition in (("anzahl", "INTEGER NOT NULL DEFAULT 1"), ("besitzer", "TEXT"),
+                                   ("gesendet_seit", "REAL")):
+            if spalte not in spalten:
+                self._db.execute(f"ALTER TABLE transaktionen ADD COLUMN {spalte} {definition}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_status ON transaktionen (status, erstellt)")
+        # Sendungen eines abgestürzten Prozesses werden nicht hier, sondern erst nach
+        # SENDEN_VERALTET von `beanspruchen` übernommen: ein anderer Prozess mit
+        # demselben Journal könnte sie gerade noch senden.
+
+    def erfassen(self, art, kennung, beschreibung, terminal, anzahl=1):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Hält eine Transaktion vor dem Senden fest.
+
+        Args:
+            art (str): "nfc" oder "person".
+            kennung (str): Base64-Token bzw. Benutzercode.
+            beschreibung (str): Die Beschreibung der Buchung.
+            terminal (str): Name des Terminals.
+            anzahl (int): Anzahl der gebuchten Artikel (siehe sammel_fenster).
+
+        Returns:
+            str: Die ID des Eintrags (wird als Idempotency-Key verwendet).
+        """
+        eintrag_id = str(uuid.uuid4())
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO transaktionen (id, art, kennung, beschreibung, anzahl, terminal, erstellt, status, "
+                "besitzer, gesendet_seit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (eintrag_id, art, kennung, beschreibung, anzahl, terminal, time.time(), SENDEN,
+                 self.besitzer, time.time()))
+        return eintrag_id
+
+    def abschliessen(self, eintrag_id, status_code):
+        """
+        Schließt einen Eintrag nach einer Antwort der API ab.
+
+        Args:
+            eintrag_id (str): Die ID des Eintrags.
+            status_code (int): HTTP-Statuscode der Antwort.
+        """
+        status = ERLEDIGT if status_code < 400 else ABGELEHNT
+        with self._lock:
+            self._db.execute(
+                "UPDATE transaktionen SET status = ?, versuche = versuche + 1, abgeschlossen = ?, "
+                "letzter_fehler = ? WHERE id = ?",
+                (status, time.time(), None if status == ERLEDIGT else f"HTTP {status_code}", eintrag_id))
+
+    def fehlversuch(self, eintrag_id, fehler, status=OFFEN):
+        """
+        Markiert einen Eintrag nach einem Sendeversuch ohne gültige Antwort.
+
+        Args:
+            eintrag_id (str): Die ID des Eintrags.
+            fehler (str): Beschreibung des Fehlers.
+            status (str): OFFEN (wird nachgetragen) oder UNKLAR (evtl. schon gebucht, bleibt liegen).
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE transaktionen SET status = ?, versuche = versuche + 1, letzter_fehler = ? WHERE id = ?",
+                (status, fehler, eintrag_id))
+
+    def beanspruchen(self, limit):
+        """
+        Liefert die ältesten offenen Einträge und markiert sie als in Arbeit.
+
+        Dazu zählen auch verwaiste Einträge, die seit SENDEN_VERALTET Sekunden im
+        Status SENDEN stehen (Absturz während des Sendens). Das Markieren passiert
+        in einer Schreibtransaktion, damit zwei Terminals mit gemeinsamem Journal
+        denselben Eintrag nicht gleichzeitig nachtragen.
+
+        Args:
+            limit (int): Maximale Anzahl.
+
+        Returns:
+            list[sqlite3.Row]: Die Einträge (Spalten id, art, kennung, beschreibung, anzahl, ...).
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                jetzt = time.time()
+                eintraege = self._db.execute(
+                    "SELECT * FROM transaktionen WHERE status = ? "
+                    "OR (status = ? AND COALESCE(gesendet_seit, 0) < ?) ORDER BY erstellt LIMIT ?",
+                    (OFFEN, SENDEN, jetzt - SENDEN_VERALTET, limit)).fetchall()
+                for eintrag in eintraege:
+                    if eintrag["status"] == SENDEN:
+                        logger.warning("Verwaiste Sendung %s von %s wird übernommen.",
+                                       eintrag["id"], eintrag["besitzer"] or "unbekannt")
+                self._db.executemany("UPDATE transaktionen SET status = ?, besitzer = ?, gesendet_seit = ? WHERE id = ?",
+                                     [(SENDEN, self.besitzer, jetzt, eintrag["id"]) for eintrag in eintraege])
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+            return eintraege
+
+    def anzahl_offen(self):
+        """
+        Returns:
+            int: Anzahl der noch nicht nachgetragenen Transaktionen.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM transaktionen WHERE status IN (?, ?)", (OFFEN, SENDEN)).fetchone()[0]
+
+    def anzahl_unklar(self):
+        """
+        Returns:
+            int: Anzahl der Transaktionen, deren Ausführung ungewiss ist (Status UNKLAR).
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM transaktionen WHERE status = ?", (UNKLAR,)).fetchone()[0]
+
+    def schliessen(self):
+        """Schließt die Datenbankverbindung."""
+        with self._lock:
+            self._db.close()
+
+
+class JournalReplay:
+    """Trägt offene Journal-Einträge im Hintergrund in Stapeln nach."""
+
+    def __init__(self, journal, senden, intervall=30.0, stapel=20):
+        """
+        Args:
+            journal (TransaktionsJournal): Das Journal.
+            senden (callable): Funktion (art, kennung, beschreibung, idempotency_key, anzahl) ->
+                               (Response oder None, None oder (Status OFFEN/UNKLAR, Fehler)),
+                               siehe api_client.transaktion_zustellen.
+            intervall (float): Sekunden zwischen zwei Durchläufen.
+            stapel (int): Maximale Anzahl Einträge je Durchlauf.
+        """
+        self.journal = journal
+        self.senden = senden
+        self.intervall = intervall
+        self.stapel = stapel
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._laufen, name="journal-replay", daemon=True)
+
+    def starten(self):
+        """Startet den Hintergrund-Thread."""
+        self._thread.start()
+
+    def stoppen(self):
+        """Beendet den Hintergrund-Thread."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _laufen(self):
+        while not self._stop.wait(self.intervall):
+            try:
+                self.durchlauf()
+            except Exception as e:  # pylint: disable=W0718
+                logger.error("Fehler beim Nachtragen der Transaktionen: %s", e, exc_info=True)
+
+    def durchlauf(self):
+        """
+        Sendet einen Stapel offener Einträge. Bricht ab, sobald die API nicht erreichbar ist.
+
+        Returns:
+            int: Anzahl der abgeschlossenen Einträge.
+        """
+        eintraege = self.journal.beanspruchen(self.stapel)
+        if not eintraege:
+            return 0
+
+        logger.info("Trage %d offene Transaktion(en) nach...", len(eintraege))
+        abgeschlossen = 0
+        for index, eintrag in enumerate(eintraege):
+            if self._stop.is_set():
+                self._freigeben(eintraege[index:])
+                break
+            response, fehlschlag = self.senden(eintrag["art"], eintrag["kennung"], eintrag["beschreibung"],
+                                               eintrag["id"], eintrag["anzahl"])
+            if fehlschlag:
+                status, fehler = fehlschlag
+                if status == UNKLAR:
+                    # Evtl. schon gebucht: nicht erneut senden, nur die übrigen freigeben
+                    self.journal.fehlversuch(eintrag["id"], fehler, UNKLAR)
+                self._freigeben(eintraege[index + 1:] if status == UNKLAR else eintraege[index:])
+                logger.info("API weiterhin nicht erreichbar, nächster Versuch in %.0f s.", self.intervall)
+                break
+            self.journal.abschliessen(eintrag["id"], response.status_code)
+            if response.status_code >= 400:
+                logger.warning("Nachgetragene Transaktion %s wurde abgelehnt (Status %s).",
+                               eintrag["id"], response.status_code)
+            abgeschlossen += 1
+        return abgeschlossen
+
+    def _freigeben(self, eintraege):
+        """Gibt beanspruchte, aber nicht gesendete Einträge wieder frei."""
+        for eintrag in eintraege:
+            self.journal.fehlversuch(eintrag["id"], "API nicht erreichbar")
@@ -0,0 +1,234 @@
+"""Persistenter, inhaltsadressierter Cache für TTS-Audiodateien mit LRU-Verdrängung."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Legt synthetisierte Sprachausgaben als MP3-Dateien auf der Festplatte ab.
+
+    Der Dateiname ist ein Hash über (Text, Stimme, Sprechgeschwindigkeit), damit
+    identische Ansagen ohne erneuten Netzwerkaufruf abgespielt werden können. Die
+    Gesamtgröße ist begrenzt, bei Überschreitung werden die am längsten nicht mehr
+    genutzten Einträge gelöscht. Die Reihenfolge wird über die Änderungszeit der
+    Dateien persistiert und überlebt damit einen Neustart.
+    """
+
+    ENDUNG = ".mp3"
+    # Temporäre Dateien ab diesem Alter (Sekunden) stammen von einem abgebrochenen Schreibvorgang.
+    # Jüngere können gerade von einem anderen Prozess mit demselben Cache geschrieben werden.
+    TEMP_MAX_ALTER = 3600
+
+    def __init__(self, verzeichnis, max_bytes):
+        """
+        Args:
+            verzeichnis (str): Verzeichnis, in dem die Audiodateien abgelegt werden.
+            max_bytes (int): Maximale Gesamtgröße des Caches in Bytes.
+        """
+        self.verzeichnis = verzeichnis
+        self.max_bytes = max_bytes
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self._lock = threading.Lock()
+        self._eintraege = OrderedDict()  # Schlüssel -> Dateigröße, älteste zuerst
+        self._groesse = 0
+
+        os.makedirs(self.verzeichnis, exist_ok=True)
+        self._einlesen()
+
+    @staticmethod
+    def schluessel(text, voice, rate):
+        """
+        Berechnet den Cache-Schlüssel für eine Ansage.
+
+        Args:
+            text (str): Der gesprochene Text.
+            voice (str): Die verwendete Stimme.
+            rate (str): Die Sprechgeschwindigkeit (z.B. "+0%").
+
+        Returns:
+            str: Hex-Digest des SHA-256-Hashes.
+        """
+        roh = json.dumps([text, voice, rate], ensure_ascii=False)
+        return hashlib.sha256(roh.encode("utf-8")).hexdigest()
+
+    def _pfad(self, schluessel):
+        return os.path.join(self.verzeichnis, schluessel + self.ENDUNG)
+
+    def _einlesen(self):
+        """Liest vorhandene Dateien ein und sortiert sie nach letzter Nutzung."""
+        dateien = []
+        grenze = time.time() - self.TEMP_MAX_ALTER
+        for name in os.listdir(self.verzeichnis):
+            pfad = os.path.join(self.verzeichnis, name)
+            if name.startswith(".tmp"):
+                # Überbleibsel eines abgebrochenen Schreibvorgangs
+                try:
+                    if os.stat(pfad).st_mtime < grenze:
+                        os.remove(pfad)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(self.ENDUNG):
+                continue
+            try:
+                stat = os.stat(pfad)
+            except OSError:
+                continue
+            dateien.append((stat.st_mtime, name[:-len(self.ENDUNG)], stat.st_size))
+
+        for _, schluessel, groesse in sorted(dateien):
+            self._eintraege[schluessel] = groesse
+            self._groesse += groesse
+
+        logger.debug("TTS-Cache geladen: %d Einträge, %d Bytes.", len(self._eintraege), self._groesse)
+        with self._lock:
+            self._verdraengen()
+
+    def hole(self, text, voice, rate):
+        """
+        Sucht eine Ansage im Cache.
+
+        Args:
+            text (str): Der gesprochene Text.
+            voice (str): Die verwendete Stimme.
+            rate (str): Die Sprechgeschwindigkeit.
+
+        Returns:
+            str or None: Pfad zur MP3-Datei oder None, wenn sie nicht im Cache liegt.
+        """
+        schluessel = self.schluessel(text, voice, rate)
+        pfad = self._pfad(schluessel)
+        with self._lock:
+            if schluessel not in self._eintraege:
+                self.fehlschlaege += 1
+                return None
+            try:
+                os.utime(pfad)  # Zuletzt genutzt, auch über einen Neustart hinweg
+            except OSError:
+                # Datei wurde von außen gelöscht
+                self._groesse -= self._eintraege.pop(schluessel)
+                self.fehlschlaege += 1
+                return None
+            self._eintraege.move_to_end(schluessel)
+            self.treffer += 1
+        return pfad
+
+    def enthaelt(self, text, voice, rate):
+        """
+        Prüft, ob eine Ansage im Cache liegt, ohne die Zähler oder die LRU-Reihenfolge zu verändern.
+
+        Args:
+            text (str): Der gesprochene Text.
+            voice (str): Die verwendete Stimme.
+            rate (str): Die Sprechgeschwindigkeit.
+
+        Returns:
+            bool: True, wenn die Ansage im Cache liegt.
+        """
+        with self._lock:
+            return self.schluessel(text, voice, rate) in self._eintraege
+
+    def neue_temp_datei(self):
+        """
+        Legt eine leere temporäre Datei im Cache-Verzeichnis an.
+
+        Die Datei liegt auf demselben Dateisystem wie der Cache, damit sie mit
+        `speichere_datei` atomar übernommen werden kann.
+
+        Returns:
+            str: Pfad der temporären Datei.
+        """
+        fd, pfad = tempfile.mkstemp(prefix=".tmp", suffix=self.ENDUNG, dir=self.verzeichnis)
+        os.close(fd)
+        return pfad
+
+    def speichere_datei(self, text, voice, rate, quellpfad):
+        """
+        Übernimmt eine fertig geschriebene Audiodatei atomar in den Cache.
+
+        Args:
+            text (str): Der gesprochene Text.
+            voice (str): Die verwendete Stimme.
+            rate (str): Die Sprechgeschwindigkeit.
+            quellpfad (str): Pfad der Datei aus `neue_temp_datei`.
+
+        Returns:
+            str: Pfad der Datei im Cache.
+        """
+        schluessel = self.schluessel(text, voice, rate)
+        pfad = self._pfad(schluessel)
+        groesse = os.path.getsize(quellpfad)
+        os.replace(quellpfad, pfad)
+
+        with self._lock:
+            if schluessel in self._eintraege:
+                self._groesse -= self._eintraege[schluessel]
+            self._eintraege[schluessel] = groesse
+            self._eintraege.move_to_end(schluessel)
+            self._groesse += groesse
+            self._verdraengen(behalte=schluessel)
+        return pfad
+
+    def speichere_daten(self, text, voice, rate, daten):
+        """
+        Schreibt Audiodaten atomar in den Cache.
+
+        Args:
+            text (str): Der gesprochene Text.
+            voice (str): Die verwendete Stimme.
+            rate (str): Die Sprechgeschwindigkeit.
+            daten (bytes): Die MP3-Daten.
+
+        Returns:
+            str: Pfad der Datei im Cache.
+        """
+        temp_pfad = self.neue_temp_datei()
+        try:
+            with open(temp_pfad, "wb") as datei:
+                datei.write(daten)
+            return self.speichere_datei(text, voice, rate, temp_pfad)
+        except OSError:
+            if os.path.exists(temp_pfad):
+                os.remove(temp_pfad)
+            raise
+
+    def _verdraengen(self, behalte=None):
+        """Löscht die ältesten Einträge, bis die Maximalgröße eingehalten wird."""
+        while self._groesse > self.max_bytes and self._eintraege:
+            schluessel, groesse = next(iter(self._eintraege.items()))
+            if schluessel == behalte:
+                break
+            del self._eintraege[schluessel]
+            self._groesse -= groesse
+            try:
+                os.remove(self._pfad(schluessel))
+            except OSError as e:
+                logger.warning("TTS-Cache-Datei konnte nicht gelöscht werden: %s", e)
+            logger.debug("TTS-Cache: Eintrag %s verdrängt.", schluessel)
+
+    def statistik(self):
+        """
+        Liefert Kennzahlen zum Cache.
+
+        Returns:
+            dict: Treffer, Fehlschläge, Trefferquote, Anzahl Einträge und Größe in Bytes.
+        """
+        with self._lock:
+            anfragen = self.treffer + self.fehlschlaege
+            return {
+                "treffer": self.treffer,
+                "fehlschlaege": self.fehlschlaege,
+                "trefferquote": self.treffer / anfragen if anfragen else 0.0,
+                "eintraege": len(self._eintraege),
+                "bytes": self._groesse,
+            }
@@ -0,0 +1,227 @@
+"""
+Setzt Ansagen aus vorab synthetisierten Textbausteinen zusammen.
+
+Dynamische Ansagen ("Grüße Max! Dein Kontostand beträgt momentan 5€.") sind als
+ganzer Satz praktisch nie im TTS-Cache. Zerlegt in Bausteine (feste Satzteile,
+Zahlen, Währung, Namen) lassen sie sich dagegen fast vollständig aus dem Cache
+bedienen. Die Bausteine werden dekodiert, von Stille am Anfang und Ende befreit
+und zu einem einzigen Audiopuffer zusammengefügt.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from io import StringIO
+import numpy as np
+with redirect_stdout(StringIO()):
+    import pygame
+
+logger = logging.getLogger(__name__)
+
+# Beträge direkt vor "€" oder "Euro": optional Vorzeichen, Tausenderpunkte ("1.000") und
+# Nachkommastellen ("5,50" oder "5.5"). Andere Zahlen (Uhrzeiten, Versionen) bleiben im Satz.
+_BETRAG = re.compile(r"(-?(?:\d{1,3}(?:\.\d{3})+(?![.\d])|\d+)(?:[.,]\d+(?![.\d]))?)\s?(€|Euro\b)")
+_TAUSENDER = re.compile(r"\.(?=\d{3}(?!\d))")
+# Satzteile werden nach Satzzeichen getrennt, das Satzzeichen bleibt am Teil
+_SATZTEIL = re.compile(r"[^.!?,;:]+[.!?,;:]*|[.!?,;:]+")
+_SATZENDE = (".", "!", "?")
+
+# Mixer-Formate von pygame -> numpy-Datentyp der Samples
+_SAMPLE_TYPEN = {
+    -16: np.int16,
+    16: np.uint16,
+    -8: np.int8,
+    8: np.uint8,
+    32: np.float32,
+}
+
+
+def ist_dynamisch(text):
+    """
+    Prüft, ob ein Text dynamische Anteile (Geldbeträge) enthält.
+
+    Nur solche Texte werden aus Bausteinen zusammengesetzt, feste Ansagen und
+    Texte mit anderen Zahlen ("12:30 Uhr", "Version 1.2.3") werden als Ganzes
+    synthetisiert und gecacht, weil das natürlicher klingt bzw. richtig gelesen wird.
+
+    Args:
+        text (str): Der Ansagetext.
+
+    Returns:
+        bool: True, wenn der Text einen Betrag direkt vor "€" oder "Euro" enthält.
+    """
+    return _BETRAG.search(text) is not None
+
+
+def zerlege(text):
+    """
+    Zerlegt einen Ansagetext in wiederverwendbare Bausteine.
+
+    Beträge werden einzeln ("minus", Vorkomma ohne Tausenderpunkte, "Komma",
+    Nachkomma), die Währung als "Euro" abgelegt, der übrige Text in Satzteilen.
+    Satzzeichen hinter der Währung werden an diesen Baustein angehängt, damit
+    die Betonung stimmt.
+
+    Args:
+        text (str): Der Ansagetext.
+
+    Returns:
+        list[str]: Die Bausteine in Sprechreihenfolge.
+    """
+    bausteine = []
+    position = 0
+    for betrag in _BETRAG.finditer(text):
+        _satzteile(text[position:betrag.start()], bausteine)
+        zahl = betrag.group(1)
+        if zahl.startswith("-"):
+            bausteine.append("minus")
+            zahl = zahl[1:]
+        ganz, _, nachkomma = _TAUSENDER.sub("", zahl).replace(".", ",").partition(",")
+        bausteine.append(ganz)
+        if nachkomma:
+            bausteine.extend(["Komma", nachkomma])
+        bausteine.append("Euro")
+        position = betrag.end()
+    _satzteile(text[position:], bausteine)
+    return bausteine
+
+
+def _satzteile(text, bausteine):
+    """Hängt die Satzteile eines Textes ohne Beträge an die Bausteine an."""
+    for satzteil in _SATZTEIL.findall(text):
+        satzteil = satzteil.strip()
+        if not satzteil:
+            continue
+        if not satzteil.strip(".!?,;:") and bausteine:
+            # Reines Satzzeichen (z.B. hinter "5€") an den Vorgänger hängen
+            bausteine[-1] += satzteil
+        else:
+            bausteine.append(satzteil)
+
+
+class FragmentSynthese:
+    """
+    Fügt Textbausteine aus dem TTS-Cache zu einem lückenlosen Audiopuffer zusammen.
+
+    Fehlende Bausteine werden über die übergebene Synthesefunktion einzeln live
+    erzeugt und landen danach ebenfalls im Cache.
+    """
+
+    def __init__(self, cache, synthese, pause_ms=60, satz_pause_ms=250, max_dekodiert=256):
+        """
+        Args:
+            cache (tts_cache.TTSCache): Der Cache für die MP3-Dateien der Bausteine.
+            synthese (callable): Funktion (text, voice, rate) -> Pfad, die einen fehlenden
+                                 Baustein synthetisiert und im Cache ablegt.
+            pause_ms (int): Pause zwischen zwei Bausteinen in Millisekunden.
+            satz_pause_ms (int): Pause nach einem Satzende in Millisekunden.
+            max_dekodiert (int): Anzahl dekodierter Bausteine, die im Speicher gehalten werden.
+        """
+        self.cache = cache
+        self.synthese = synthese
+        self.pause_ms = pause_ms
+        self.satz_pause_ms = satz_pause_ms
+        self.max_dekodiert = max_dekodiert
+        self._dekodiert = OrderedDict()  # (text, voice, rate, mixer-format) -> Samples
+        self._lock = threading.Lock()
+
+    def _baustein_pfad(self, text, voice, rate):
+        pfad = self.cache.hole(text, voice, rate)
+        if pfad is None:
+            logger.debug("Baustein '%s' nicht im Cache, erzeuge live.", text)
+            pfad = self.synthese(text, voice, rate)
+        return pfad
+
+    def _samples(self, text, voice, rate, mixer_format):
+        """Liefert die dekodierten und zugeschnittenen Samples eines Bausteins."""
+        schluessel = (text, voice, rate, mixer_format)
+        with self._lock:
+            if schluessel in self._dekodiert:
+                self._dekodiert.move_to_end(schluessel)
+                return self._dekodiert[schluessel]
+
+        pfad = self._baustein_pfad(text, voice, rate)
+        _, bits, kanaele = mixer_format
+        dtype = _SAMPLE_TYPEN.get(bits, np.int16)
+        samples = np.frombuffer(pygame.mixer.Sound(pfad).get_raw(), dtype=dtype).reshape(-1, kanaele)
+        samples = _stille_abschneiden(samples)
+
+        with self._lock:
+            self._dekodiert[schluessel] = samples
+            if len(self._dekodiert) > self.max_dekodiert:
+                self._dekodiert.popitem(last=False)
+        return samples
+
+    def zusammensetzen(self, bausteine, voice, rate):
+        """
+        Erzeugt einen abspielbaren Sound aus mehreren Bausteinen.
+
+        Der pygame-Mixer muss bereits initialisiert sein.
+
+        Args:
+            bausteine (list[str]): Die Bausteine, z.B. aus `zerlege`.
+            voice (str): Die Stimme.
+            rate (str): Die Sprechgeschwindigkeit.
+
+        Returns:
+            pygame.mixer.Sound: Die zusammengesetzte Ansage.
+        """
+        mixer_format = pygame.mixer.get_init()
+        frequenz, bits, kanaele = mixer_format
+        dtype = _SAMPLE_TYPEN.get(bits, np.int16)
+
+        teile = []
+        for baustein in bausteine:
+            teile.append(self._samples(baustein, voice, rate, mixer_format))
+            pause = self.satz_pause_ms if baustein.endswith(_SATZENDE) else self.pause_ms
+            teile.append(np.zeros((frequenz * pause // 1000, kanaele), dtype=dtype))
+
+        puffer = np.concatenate(teile[:-1]) if teile else np.zeros((0, kanaele), dtype=dtype)
+        return pygame.mixer.Sound(buffer=puffer.tobytes())
+
+    def vorrendern(self, bausteine, voice, rate):
+        """
+        Synthetisiert alle Bausteine, die noch nicht im Cache liegen.
+
+        Args:
+            bausteine (iterable[str]): Die Bausteine.
+            voice (str): Die Stimme.
+            rate (str): Die Sprechgeschwindigkeit.
+
+        Returns:
+            int: Anzahl der neu erzeugten Bausteine.
+        """
+        neu = 0
+        for baustein in bausteine:
+            if not self.cache.enthaelt(baustein, voice, rate):
+                try:
+                    self.synthese(baustein, voice, rate)
+                    neu += 1
+                except Exception as e:  # pylint: disable=W0718
+                    logger.warning("Baustein '%s' konnte nicht vorab erzeugt werden: %s", baustein, e)
+        return neu
+
+
+def _stille_abschneiden(samples, schwelle=0.02, rand_samples=240):
+    """
+    Entfernt Stille am Anfang und Ende eines Bausteins.
+
+    Args:
+        samples (numpy.ndarray): Samples im Format (Anzahl, Kanäle).
+        schwelle (float): Anteil des Maximalpegels, ab dem ein Sample als hörbar gilt.
+        rand_samples (int): Anzahl Samples, die vor und nach dem hörbaren Bereich erhalten bleiben.
+
+    Returns:
+        numpy.ndarray: Die zugeschnittenen Samples.
+    """
+    if samples.size == 0 or samples.dtype != np.int16:
+        return samples
+    pegel = np.abs(samples.astype(np.int32)).max(axis=1)
+    hoerbar = np.flatnonzero(pegel > schwelle * np.iinfo(np.int16).max)
+    if hoerbar.size == 0:
+        return samples
+    start = max(hoerbar[0] - rand_samples, 0)
+    ende = min(hoerbar[-1] + rand_samples + 1, len(samples))
+    return samples[start:ende]
@@ -0,0 +1,238 @@
+"""
+Streaming-Wiedergabe für edge-tts: spielt die Ansage ab, während sie noch übertragen wird.
+
+edge-tts liefert die MP3-Daten in kleinen Stücken. Die bisher empfangenen Daten
+werden jeweils komplett dekodiert und nur die neu hinzugekommenen Samples an den
+Mixer-Kanal angehängt. Dadurch entstehen keine Lücken oder Knackser an den
+Übergängen (einzeln dekodierte MP3-Abschnitte hätten eigene Decoder-Verzögerung
+und fehlende Bit-Reservoir-Daten). Damit der Aufwand nicht quadratisch wächst,
+wird erst wieder dekodiert, wenn die Daten um einen festen Anteil gewachsen sind.
+"""
+
+import asyncio
+import io
+import logging
+import queue
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+import edge_tts
+import ereignis_schleife
+with redirect_stdout(StringIO()):
+    import pygame
+
+logger = logging.getLogger(__name__)
+
+_ENDE = object()
+
+# Neu dekodiert wird ab MIN_NEU Bytes neuer Daten, bei längeren Ansagen erst ab
+# 1/NEU_ANTEIL der bereits dekodierten Daten. Insgesamt wird so jedes Byte nur
+# wenige Male dekodiert, statt einmal je Kilobyte.
+MIN_NEU = 1024
+NEU_ANTEIL = 4
+
+
+class TTSStream:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """
+    Startet die Synthese sofort im Hintergrund; `abspielen` gibt die Audiodaten
+    aus, sobald die ersten Stücke angekommen sind.
+    """
+
+    def __init__(self, engine, text, voice, rate,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 vorlauf_ms=150, rueckhalt_ms=100, bei_fertig=None, timeout=10.0):
+        """
+        Args:
+            engine (audio_engine.AudioEngine): Die Audio-Engine für die Wiedergabe.
+            text (str): Der Text, der gesprochen werden soll.
+            voice (str): Die Stimme.
+            rate (str): Die Sprechgeschwindigkeit.
+            vorlauf_ms (int): Mindestlänge des ersten abgespielten Stücks in Millisekunden.
+            rueckhalt_ms (int): Audio am Ende der bisher empfangenen Daten, das erst mit dem
+                                nächsten Stück ausgegeben wird (der letzte MP3-Frame ist
+                                eventuell noch unvollständig).
+            bei_fertig (callable, optional): Wird mit den vollständigen MP3-Daten aufgerufen,
+                                             z.B. um sie im TTS-Cache abzulegen.
+            timeout (float): Maximale Wartezeit in Sekunden auf das nächste Stück von edge-tts.
+        """
+        self.engine = engine
+        self.text = text
+        self.vorlauf_ms = vorlauf_ms
+        self.rueckhalt_ms = rueckhalt_ms
+        self.bei_fertig = bei_fertig
+        self.timeout = timeout
+        self.zeit_bis_erster_ton = None
+
+        self._start = time.monotonic()
+        self._stuecke = queue.Queue()
+        self._empfang = ereignis_schleife.SCHLEIFE.einplanen(self._empfangen(text, voice, rate))
+
+    async def _empfangen(self, text, voice, rate):
+        """Empfängt die Audiodaten von edge-tts (läuft auf der gemeinsamen Ereignisschleife)."""
+        # Das Ende wird immer gemeldet, auch bei Abbruch der Koroutine, sonst wartet `abspielen` vergeblich
+        ende = _ENDE
+        try:
+            communicate = edge_tts.Communicate(text, voice, rate=rate)
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    self._stuecke.put(chunk["data"])
+        except asyncio.CancelledError:
+            ende = ConnectionAbortedError("Übertragung von edge-tts abgebrochen")
+            raise
+        except Exception as e:  # pylint: disable=W0718
+            ende = e
+        finally:
+            self._stuecke.put(ende)
+
+    @staticmethod
+    def _dekodieren(daten):
+        """Dekodiert die bisher empfangenen MP3-Daten ins Mixer-Format."""
+        try:
+            return pygame.mixer.Sound(file=io.BytesIO(bytes(daten))).get_raw()
+        except pygame.error:  # pylint: disable=no-member
+            return b""  # Noch nicht genug Daten für einen vollständigen Frame
+
+    def _naechstes_stueck(self, kurz):
+        """
+        Wartet auf das nächste Stück von edge-tts.
+
+        Args:
+            kurz (bool): Nur kurz warten, weil noch Samples auf den Kanal warten.
+
+        Returns:
+            bytes, _ENDE oder None (nach kurzem Warten ohne neues Stück).
+        """
+        try:
+            stueck = self._stuecke.get(timeout=0.02 if kurz else self.timeout)
+        except queue.Empty:
+            if not kurz:
+                self._empfang.cancel()
+                raise TimeoutError(f"edge-tts hat {self.timeout:g} s lang keine Daten gesendet") from None
+            return None
+        if isinstance(stueck, Exception):
+            raise stueck
+        return stueck
+
+    def _neue_samples(self, daten, ausgegeben, rueckhalt, frame_bytes, fertig):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Dekodiert die bisher empfangenen Daten und liefert die noch nicht ausgegebenen Samples.
+
+        Ohne `fertig` bleiben die letzten `rueckhalt` Bytes zurück, weil der letzte
+        MP3-Frame eventuell noch unvollständig ist.
+        """
+        roh = self._dekodieren(daten)
+        grenze = len(roh) if fertig else max(len(roh) - rueckhalt, 0)
+        grenze -= grenze % frame_bytes
+        return roh[ausgegeben:grenze] if grenze > ausgegeben else b""
+
+    def abspielen(self, vor_wiedergabe=None):
+        """
+        Spielt die Ansage ab, während sie noch empfangen wird, und blockiert bis zum Ende.
+
+        Args:
+            vor_wiedergabe (audio_engine.Wiedergabe, optional): Ein laufender Soundeffekt,
+                                                               dessen Ende abgewartet wird.
+
+        Returns:
+            bytes: Die vollständigen MP3-Daten.
+
+        Raises:
+            TimeoutError: Wenn edge-tts länger als `timeout` Sekunden nichts sendet.
+            Exception: Fehler von edge-tts, falls die Übertragung fehlschlägt oder abgebrochen wird.
+        """
+        self.engine.starten()
+        frequenz, bits, kanaele = pygame.mixer.get_init()
+        frame_bytes = abs(bits) // 8 * kanaele
+        rueckhalt = frequenz * self.rueckhalt_ms // 1000 * frame_bytes
+        wiedergabe = _Wiedergabe(self.engine, frequenz * self.vorlauf_ms // 1000 * frame_bytes, vor_wiedergabe)
+
+        daten = bytearray()
+        dekodiert_bis = 0    # Länge der MP3-Daten bei der letzten Dekodierung
+        ausgegeben = 0       # Bytes der dekodierten Samples, die bereits an die Wiedergabe gingen
+        fertig = False
+
+        while not fertig or wiedergabe.ausstehend:
+            # Solange Samples ausstehen, nur kurz warten und dann den Kanal erneut prüfen
+            stueck = self._naechstes_stueck(kurz=bool(wiedergabe.ausstehend))
+            if stueck is _ENDE:
+                fertig = True
+            elif stueck is not None:
+                daten.extend(stueck)
+
+            # Erst ab ca. 1 KB neuer Daten (ca. 170 ms Sprache) bzw. einem Viertel der
+            # bisherigen Daten erneut dekodieren
+            if fertig or len(daten) - dekodiert_bis >= max(MIN_NEU, dekodiert_bis // NEU_ANTEIL):
+                dekodiert_bis = len(daten)
+                samples = self._neue_samples(daten, ausgegeben, rueckhalt, frame_bytes, fertig)
+                wiedergabe.ausstehend += samples
+                ausgegeben += len(samples)
+
+            if wiedergabe.ausgeben(fertig):
+                self.zeit_bis_erster_ton = time.monotonic() - self._start
+                logger.info("Zeit bis zum ersten Ton: %.0f ms", self.zeit_bis_erster_ton * 1000)
+
+        wiedergabe.warte_auf_ende()
+
+        mp3 = bytes(daten)
+        if self.bei_fertig and mp3:
+            self.bei_fertig(mp3)
+        return mp3
+
+
+class _Wiedergabe:
+    """Hängt dekodierte Samples lückenlos an den Stream-Kanal der Audio-Engine an."""
+
+    def __init__(self, engine, vorlauf, vor_wiedergabe=None):
+        """
+        Args:
+            engine (audio_engine.AudioEngine): Die Audio-Engine.
+            vorlauf (int): Mindestlänge des ersten Stücks in Bytes.
+            vor_wiedergabe (audio_engine.Wiedergabe, optional): Wird vor dem ersten Stück abgewartet.
+        """
+        self.engine = engine
+        self.vorlauf = vorlauf
+        self.vor_wiedergabe = vor_wiedergabe
+        self.ausstehend = b""  # Samples, die auf einen freien Platz in der Kanal-Warteschlange warten
+        self._kanal = None
+        self._letzte = None
+
+    def ausgeben(self, fertig):
+        """
+        Gibt ausstehende Samples an den Kanal, sobald dort Platz ist.
+
+        Args:
+            fertig (bool): Es kommen keine Daten mehr (das erste Stück darf kürzer als der Vorlauf sein).
+
+        Returns:
+            bool: True, wenn damit die Wiedergabe begonnen hat.
+        """
+        if not self.ausstehend:
+            return False
+        if self._kanal is None:
+            if len(self.ausstehend) < self.vorlauf and not fertig:
+                return False
+            if self.vor_wiedergabe:
+                self.vor_wiedergabe.warte()
+            self._kanal = self.engine.stream_kanal()
+            self._anhaengen(self._kanal.play)
+            return True
+        if not self._kanal.get_busy():
+            # Puffer leergelaufen, direkt weiterspielen
+            self._anhaengen(self._kanal.play)
+        elif self._kanal.get_queue() is None:
+            self._anhaengen(self._kanal.queue)
+        return False
+
+    def _anhaengen(self, funktion):
+        self._letzte = pygame.mixer.Sound(buffer=self.ausstehend)
+        funktion(self._letzte)
+        self.ausstehend = b""
+
+    def warte_auf_ende(self):
+        """Wartet, bis das zuletzt angehängte Stück zu Ende gespielt ist."""
+        if self._letzte is None:
+            return
+        # Früher kann es nicht fertig sein, danach nur noch kurz nachfragen
+        time.sleep(self._letzte.get_length())
+        while self._kanal.get_busy() and (self._kanal.get_sound() is self._letzte
+                                          or self._kanal.get_queue() is self._letzte):
+            time.sleep(0.02)